@@ -1,4 +1,7 @@
 import os
+import gzip
+import json
+import random
 import requests
 import base64
 import time
@@ -7,6 +10,11 @@ import argparse
 from datetime import datetime
 from dotenv import load_dotenv
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # Load environment variables
 load_dotenv()
 
@@ -26,6 +34,33 @@ headers = {
     "Authorization": f"Basic {base64_auth_string}"
 }
 
+# Lines requested per query_range page
+PAGE_SIZE = 1000
+
+# Retry throttled (429) and server error responses with jittered backoff
+MAX_ATTEMPTS = 4
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def get_with_retry(request_url):
+    """
+    Performs a GET, retrying throttling and server errors with jittered
+    exponential backoff. A numeric Retry-After header is honoured.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            response = requests.get(request_url, headers=headers, timeout=30)
+        except requests.exceptions.ConnectionError:
+            if attempt + 1 == MAX_ATTEMPTS:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt + 1 == MAX_ATTEMPTS:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                time.sleep(min(int(retry_after), 30))
+                continue
+        time.sleep(random.uniform(0, min(10, 0.5 * (2 ** attempt))))
+
 def test_connection():
     """
     Tests the connection to Grafana Loki and prints the status.
@@ -50,68 +85,191 @@ def test_connection():
         print(f"An error occurred during connection test: {err}")
         return False
 
+def iter_log_entries(logql_query, start_time, end_time, page_size=PAGE_SIZE):
+    """
+    Yields (timestamp_ns, log_line, labels) for a query, newest first, paging
+    backwards through the time range until it is exhausted.
+
+    Each page moves the 'end' cursor back to the oldest timestamp received.
+    Lines sharing that boundary timestamp come back on the next page and are
+    skipped, so only a single page is ever held in memory.
+    """
+    query_endpoint = "/loki/api/v1/query_range"
+    cursor = end_time
+    boundary_timestamp = None
+    boundary_seen = set()
+
+    while cursor > start_time:
+        params = {
+            "query": logql_query,
+            "start": str(start_time),
+            "end": str(cursor),
+            "limit": page_size,
+            "direction": "backward",
+        }
+        request_url = f"{grafana_url}{query_endpoint}?{urlencode(params)}"
+        response = get_with_retry(request_url)
+        response.raise_for_status()
+
+        response_json = response.json()
+        if response_json.get("status") != "success":
+            raise RuntimeError(f"Log query failed with status: {response_json.get('status')}")
+
+        page = []
+        for stream in response_json.get("data", {}).get("result", []):
+            labels = stream.get("stream", {})
+            for timestamp_ns, log_line in stream.get("values", []):
+                page.append((int(timestamp_ns), log_line, labels))
+        page.sort(key=lambda entry: entry[0], reverse=True)
+
+        new_lines = 0
+        for entry in page:
+            pair = entry[:2]
+            if pair[0] == boundary_timestamp and pair in boundary_seen:
+                continue
+            if pair[0] != boundary_timestamp:
+                boundary_timestamp = pair[0]
+                boundary_seen = set()
+            boundary_seen.add(pair)
+            new_lines += 1
+            yield entry
+
+        if len(page) < page_size:
+            break
+
+        # Loki's end bound is exclusive; keep the boundary timestamp in range
+        # unless the whole page shared it, in which case step past it.
+        cursor = page[-1][0] if new_lines == 0 else page[-1][0] + 1
+
+def build_query(correlation_id_to_search, environment):
+    """
+    Builds the LogQL query for a correlation ID, optionally filtered by environment.
+    """
+    if environment:
+        # Filter by environment label, then search for the correlation ID in the line
+        return f'{{deployment_environment="{environment}"}} |= "{correlation_id_to_search}"'
+    # Fallback to a broad search if no environment is specified
+    return f'{{job=~".+"}} |= "{correlation_id_to_search}"'
+
+def search_window(days_back=7):
+    """
+    Returns (start_time, end_time) in nanoseconds for the last N days.
+    """
+    end_time = int(time.time() * 1_000_000_000)  # nanoseconds
+    start_time = end_time - (days_back * 24 * 60 * 60 * 1_000_000_000)
+    return start_time, end_time
+
 def search_by_correlation_id(correlation_id_to_search, environment):
     """
-    Searches for logs containing the given correlation ID within the last hour,
-    optionally filtering by a deployment environment.
+    Searches for logs containing the given correlation ID within the last 7 days,
+    optionally filtering by a deployment environment. Results are paged so busy
+    correlation IDs are not truncated.
     """
     print(f"\nSearching for Correlation ID: {correlation_id_to_search}...")
     if environment:
         print(f"Filtering by environment: {environment}")
 
-    # Build the LogQL query dynamically
-    if environment:
-        # Filter by environment label, then search for the correlation ID in the line
-        logql_query = f'{{deployment_environment="{environment}"}} |= "{correlation_id_to_search}"'
-    else:
-        # Fallback to a broad search if no environment is specified
-        logql_query = f'{{job=~".+"}} |= "{correlation_id_to_search}"'
-
+    logql_query = build_query(correlation_id_to_search, environment)
     print(f"Using LogQL query: {logql_query}")
 
     # Time range: last 7 days
-    end_time = int(time.time() * 1_000_000_000)  # nanoseconds
-    start_time = end_time - (7 * 24 * 60 * 60 * 1_000_000_000)  # 7 days ago
-
-    # Construct the query URL
-    query_endpoint = "/loki/api/v1/query_range"
-    params = {
-        "query": logql_query,
-        "start": str(start_time),
-        "end": str(end_time),
-        "limit": 100, # Max number of lines to return
-    }
-    request_url = f"{grafana_url}{query_endpoint}?{urlencode(params)}"
+    start_time, end_time = search_window(7)
 
     try:
-        response = requests.get(request_url, headers=headers)
-        response.raise_for_status()
+        total_lines = 0
+        for timestamp_ns, log_line, _ in iter_log_entries(logql_query, start_time, end_time):
+            # Convert nanosecond timestamp to a readable format
+            timestamp_s = timestamp_ns / 1_000_000_000
+            readable_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp_s))
+            print(f"[{readable_time}] {log_line}")
+            total_lines += 1
 
-        response_json = response.json()
-        if response_json.get("status") == "success":
-            result_data = response_json.get("data", {}).get("result", [])
-            if not result_data:
-                print("No logs found for this Correlation ID in the last hour.")
-                return
-
-            print(f"Found {len(result_data)} log stream(s).")
-            for stream in result_data:
-                print(f"\n--- Log Stream: {stream.get('stream')} ---")
-                for value_pair in stream.get("values", []):
-                    timestamp_ns, log_line = value_pair
-                    # Convert nanosecond timestamp to a readable format
-                    timestamp_s = int(timestamp_ns) / 1_000_000_000
-                    readable_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp_s))
-                    print(f"[{readable_time}] {log_line}")
+        if total_lines == 0:
+            print("No logs found for this Correlation ID in the last 7 days.")
         else:
-            print(f"Log query failed with status: {response_json.get('status')}")
+            print(f"\nFound {total_lines} log line(s).")
 
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error occurred during log search: {http_err}")
-        print(f"Response body: {response.text}")
+        print(f"Response body: {http_err.response.text}")
     except Exception as err:
         print(f"An error occurred during log search: {err}")
 
+def resolve_export_compression(path, compression):
+    """
+    Picks zstd, gzip or no compression for an export.
+    With "auto" the extension decides, falling back to zstd if installed, else gzip.
+    """
+    if compression == "auto":
+        if path.endswith(".gz"):
+            compression = "gzip"
+        elif path.endswith((".ndjson", ".jsonl")):
+            compression = "none"
+        else:
+            compression = "zstd" if zstandard is not None else "gzip"
+    if compression == "zstd" and zstandard is None:
+        raise RuntimeError("zstd compression needs the zstandard package (pip install zstandard)")
+    return compression
+
+def open_export_file(path, compression):
+    """
+    Opens a binary file for an export, compressed with zstd, gzip or not at all.
+    """
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, "wb"), closefd=True)
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6)
+    return open(path, "wb")
+
+def export_by_correlation_id(correlation_id_to_search, environment, path, compression="auto", days_back=7):
+    """
+    Streams every log line for a correlation ID into a compressed NDJSON file,
+    one page at a time so memory stays constant, and prints lines/s and bytes written.
+    Each line holds "timestamp" (ns), "labels" and "message". The file is written
+    under a temporary name and only renamed to path once complete, so a failed
+    export leaves no partial file and keeps any earlier export at path.
+    """
+    logql_query = build_query(correlation_id_to_search, environment)
+    start_time, end_time = search_window(days_back)
+    print(f"\nExporting Correlation ID: {correlation_id_to_search} to {path}...")
+    print(f"Using LogQL query: {logql_query}")
+
+    started = time.perf_counter()
+    total_lines = 0
+    raw_bytes = 0
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        compression = resolve_export_compression(path, compression)
+        with open_export_file(temp_path, compression) as output:
+            chunk = []
+            for timestamp_ns, log_line, labels in iter_log_entries(logql_query, start_time, end_time):
+                line = json.dumps(
+                    {"timestamp": timestamp_ns, "labels": labels, "message": log_line}, ensure_ascii=False
+                ).encode("utf-8") + b"\n"
+                chunk.append(line)
+                raw_bytes += len(line)
+                total_lines += 1
+                if len(chunk) >= PAGE_SIZE:
+                    output.write(b"".join(chunk))
+                    chunk = []
+            output.write(b"".join(chunk))
+        os.replace(temp_path, path)
+    except requests.exceptions.HTTPError as http_err:
+        print(f"HTTP error occurred during export: {http_err}")
+        print(f"Response body: {http_err.response.text}")
+        return
+    except Exception as err:
+        print(f"An error occurred during export: {err}")
+        return
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    elapsed = time.perf_counter() - started
+    written = os.path.getsize(path)
+    print(f"Exported {total_lines} log line(s) in {elapsed:.1f}s ({total_lines / elapsed if elapsed else 0:.0f} lines/s).")
+    print(f"Wrote {written} bytes ({compression}) from {raw_bytes} bytes of NDJSON.")
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -124,13 +282,32 @@ if __name__ == "__main__":
         default=None,
         help="The Correlation ID to search for (optional). If not provided, the script uses the 'correlation_id' variable."
     )
+    parser.add_argument(
+        "--export",
+        metavar="PATH",
+        help="Export every matching line to a compressed NDJSON file instead of printing them (e.g. logs.ndjson.gz)."
+    )
+    parser.add_argument(
+        "--compression",
+        choices=["auto", "zstd", "gzip", "none"],
+        default="auto",
+        help="Compression for --export; auto uses the file extension, else zstd if installed, else gzip."
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=7,
+        help="Number of days to export with --export (default: 7)."
+    )
     args = parser.parse_args()
 
     # Determine which correlation ID to use
     id_to_search = args.correlation_id_arg if args.correlation_id_arg is not None else correlation_id
 
     if test_connection():
-        if id_to_search:
+        if id_to_search and args.export:
+            export_by_correlation_id(id_to_search, deployment_environment, args.export, args.compression, args.days)
+        elif id_to_search:
             search_by_correlation_id(id_to_search, deployment_environment)
         else:
             print("\nNo Correlation ID provided.")
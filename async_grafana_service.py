@@ -0,0 +1,541 @@
+"""
+Async Grafana service for searching logs via Loki API without blocking the event loop.
+"""
+
+import asyncio
+import time
+from typing import Optional, Dict, Any, List, Tuple, Awaitable
+
+import httpx
+
+from grafana_service import (
+    GrafanaService,
+    LokiQueryError,
+    MAX_QUERY_LIMIT,
+    NANOSECONDS_PER_HOUR,
+    NANOSECONDS_PER_SECOND,
+    LABELS_ENDPOINT,
+    QUERY_RANGE_ENDPOINT,
+    STREAM_CHUNK_BYTES,
+    build_correlation_query,
+    density_counts,
+    density_query,
+    locate_ranges,
+    locate_stats,
+    merge_shards,
+    search_key,
+    search_window,
+    shard_result,
+    split_time_range,
+)
+from search_cache import delta_start
+from shard_planner import plan_shards
+from loki_stream import LokiStreamDecoder
+from log_entries import LogEntries
+from log_filter import LogFilter
+
+
+class AsyncGrafanaService:
+    """Async variant of GrafanaService backed by a pooled httpx client."""
+
+    def __init__(
+        self,
+        service: GrafanaService,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0
+    ):
+        """
+        Initialize the async Grafana service.
+
+        Args:
+            service: The synchronous service whose configuration (URL, credentials) is shared
+            max_connections: Maximum number of concurrent connections to Grafana
+            max_keepalive_connections: Maximum number of idle connections kept open
+            keepalive_expiry: Seconds an idle connection is kept before being closed
+        """
+        self.service = service
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the shared async client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.service.grafana_url,
+                headers=self.service.headers,
+                limits=self.limits
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the underlying connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def run_sync(self, func, *args, **kwargs):
+        """
+        Run a blocking GrafanaService method in a worker thread.
+
+        Args:
+            func: The blocking callable to run
+
+        Returns:
+            The callable's return value
+        """
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def test_connection(self) -> bool:
+        """
+        Test the connection to Grafana Loki.
+
+        Returns:
+            True if connection successful, False otherwise
+        """
+        try:
+            response = await self.client.get(LABELS_ENDPOINT, timeout=10)
+
+            if response.status_code == 200:
+                data = response.json()
+                return data.get("status") == "success"
+            else:
+                return False
+
+        except Exception:
+            return False
+
+    async def query_entries(
+        self,
+        logql_query: str,
+        start_time: int,
+        end_time: int,
+        limit: int = MAX_QUERY_LIMIT,
+        direction: str = "backward"
+    ) -> Tuple[LogEntries, int]:
+        """
+        Run a log query_range request, decoding entries as the body streams in.
+
+        Args:
+            logql_query: The LogQL log query to run
+            start_time: Start of the window in nanoseconds
+            end_time: End of the window in nanoseconds
+            limit: Maximum number of entries to return
+            direction: "backward" (newest first) or "forward"
+
+        Returns:
+            Tuple of (log_entries, total_entries)
+
+        Raises:
+            LokiQueryError: If Loki returns an HTTP error or a non-success status,
+                or the circuit breaker is open
+        """
+        params = {
+            "query": logql_query,
+            "start": start_time,
+            "end": end_time,
+            "limit": limit,
+            "direction": direction
+        }
+
+        decoder = await self._request(QUERY_RANGE_ENDPOINT, params, stream_entries=True)
+        return decoder.entries, decoder.total_entries
+
+    async def _query_range(self, logql_query: str, start_time: int, end_time: int, step: int) -> Dict[str, Any]:
+        """
+        Run a metric query_range request.
+
+        Args:
+            logql_query: The LogQL metric query to run
+            start_time: Start of the window in nanoseconds
+            end_time: End of the window in nanoseconds
+            step: Resolution in seconds
+
+        Returns:
+            Decoded JSON body of a successful response
+
+        Raises:
+            LokiQueryError: If Loki returns an HTTP error or a non-success status,
+                or the circuit breaker is open
+        """
+        params = {"query": logql_query, "start": start_time, "end": end_time, "step": step}
+        return await self._request(QUERY_RANGE_ENDPOINT, params)
+
+    async def _send(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        timeout: float,
+        stream: bool = False
+    ) -> httpx.Response:
+        """
+        Send a GET, firing a hedged duplicate if the first is slow to respond.
+
+        Args:
+            endpoint: API path relative to the Grafana URL
+            params: Query string parameters
+            timeout: Request timeout in seconds
+            stream: Leave the body unread so it can be decoded incrementally
+
+        Returns:
+            Whichever response arrives first
+        """
+        def get():
+            request = self.client.build_request("GET", endpoint, params=params, timeout=timeout)
+            return self.client.send(request, stream=stream)
+
+        hedge_after = self.service.requests.hedge_after_seconds
+        if not hedge_after:
+            return await get()
+
+        primary = asyncio.ensure_future(get())
+        done, _ = await asyncio.wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        self.service.requests.record_hedge()
+        hedge = asyncio.ensure_future(get())
+        done, pending = await asyncio.wait([primary, hedge], return_when=asyncio.FIRST_COMPLETED)
+        if pending and all(task.exception() is not None for task in done):
+            # The first to finish failed; give the other request its chance
+            done, pending = await asyncio.wait(pending)
+        for task in pending:
+            # A loser that answers before the cancellation lands must still release its connection
+            task.add_done_callback(_close_response)
+            task.cancel()
+
+        succeeded = [task for task in (primary, hedge) if task in done and task.exception() is None]
+        if not succeeded:
+            return primary.result()
+        winner = succeeded[0]
+        for task in succeeded[1:]:
+            # Both answered at once; only one response is used
+            _close_response(task)
+        if winner is hedge:
+            self.service.requests.record_hedge(won=True)
+        return winner.result()
+
+    async def _request(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        timeout: float = 30,
+        stream_entries: bool = False
+    ) -> Any:
+        """
+        Issue a GET against the Loki API with retries and the circuit breaker.
+
+        Follows the synchronous service's LokiRequests, so both clients share
+        one retry policy, circuit breaker and set of counters. Bodies are
+        decoded in a worker thread to keep the event loop free.
+
+        Args:
+            endpoint: API path, e.g. "/loki/api/v1/labels"
+            params: Query string parameters
+            timeout: Request timeout in seconds
+            stream_entries: Decode the body incrementally into log entries
+
+        Returns:
+            The decoded JSON body, or a finished LokiStreamDecoder when
+            stream_entries is set
+
+        Raises:
+            LokiQueryError: If Loki returns an HTTP error or a non-success status,
+                or the circuit breaker is open
+        """
+        requests = self.service.requests
+
+        for attempt in requests.attempts(endpoint):
+            try:
+                response = await self._send(endpoint, params, timeout, stream=stream_entries)
+                if response.status_code == 200:
+                    decode_started = time.perf_counter()
+                    if stream_entries:
+                        body = await self._decode_stream(response)
+                        status, response_bytes = body.status, body.bytes_received
+                    else:
+                        body = await asyncio.to_thread(response.json)
+                        status, response_bytes = body.get("status"), len(response.content)
+                    requests.record_decode(endpoint, time.perf_counter() - decode_started)
+                else:
+                    await response.aread()
+                    await response.aclose()
+            except (httpx.HTTPError, ValueError) as e:
+                attempt.failed(e)
+            else:
+                if response.status_code == 200:
+                    attempt.succeeded(status, response_bytes)
+                    return body
+                attempt.rejected(
+                    response.status_code, response.text, len(response.content), response.headers.get("Retry-After")
+                )
+            await asyncio.sleep(attempt.delay)
+
+    async def _decode_stream(self, response: httpx.Response) -> LokiStreamDecoder:
+        """
+        Decode a streamed query_range body chunk by chunk in a worker thread.
+
+        Args:
+            response: A successful response whose body has not been read
+
+        Returns:
+            The finished decoder holding the entries
+
+        Raises:
+            ValueError: If the body is truncated or malformed
+        """
+        decoder = LokiStreamDecoder()
+        try:
+            async for chunk in response.aiter_bytes(STREAM_CHUNK_BYTES):
+                await asyncio.to_thread(decoder.feed, chunk)
+            decoder.close()
+        finally:
+            await response.aclose()
+        return decoder
+
+    async def _fetch_shards(
+        self,
+        logql_query: str,
+        shards: List[Tuple[int, int]],
+        max_workers: int
+    ) -> Tuple[LogEntries, List[Dict[str, Any]]]:
+        """
+        Query disjoint time shards concurrently and merge them newest first.
+
+        Args:
+            logql_query: The LogQL query to run
+            shards: (start, end) nanosecond ranges, oldest first
+            max_workers: Maximum number of shards queried at once
+
+        Returns:
+            Tuple of (log_entries newest first, per-shard stats newest first)
+        """
+        slots = asyncio.Semaphore(max(1, max_workers))
+
+        async def run_shard(shard: Tuple[int, int]) -> Tuple[LogEntries, Dict[str, Any]]:
+            async with slots:
+                started = time.perf_counter()
+                entries, _ = await self.query_entries(logql_query, shard[0], shard[1])
+                return await self.run_sync(shard_result, shard, entries, started)
+
+        if not shards:
+            return LogEntries(), []
+        shard_results = await asyncio.gather(*(run_shard(shard) for shard in shards))
+        return await self.run_sync(merge_shards, list(shard_results))
+
+    async def _locate_and_fetch(
+        self,
+        logql_query: str,
+        start_time: int,
+        end_time: int,
+        step_seconds: int,
+        max_workers: int
+    ) -> Tuple[LogEntries, Dict[str, Any]]:
+        """Probe match density, then fetch only matching buckets; see GrafanaService._locate_and_fetch()."""
+        started = time.perf_counter()
+        data = await self._query_range(density_query(logql_query, step_seconds), start_time, end_time, step_seconds)
+        ranges, probed, expected = locate_ranges(data, start_time, end_time, step_seconds)
+        probe_ms = (time.perf_counter() - started) * 1000
+
+        log_entries, shard_stats = await self._fetch_shards(logql_query, ranges, max_workers)
+        fetch_ms = (time.perf_counter() - started) * 1000 - probe_ms
+
+        return log_entries, locate_stats(step_seconds, probed, expected, probe_ms, fetch_ms, shard_stats)
+
+    async def _adaptive_search(
+        self,
+        logql_query: str,
+        start_time: int,
+        end_time: int,
+        max_workers: int
+    ) -> Tuple[LogEntries, List[Dict[str, Any]], Dict[str, Any]]:
+        """Shard a window by expected matches; see GrafanaService._adaptive_search()."""
+        density = self.service.density
+        step_seconds = density.bucket_ns // NANOSECONDS_PER_SECOND
+
+        started = time.perf_counter()
+        counts, missing = density.known(logql_query, start_time, end_time)
+        known_buckets = len(counts)
+        for range_start, range_end in missing:
+            data = await self._query_range(density_query(logql_query, step_seconds), range_start, range_end, step_seconds)
+            probed = density_counts(data, range_start, density.bucket_ns)
+            density.observe(logql_query, range_start, range_end, probed)
+            counts.update(probed)
+        probe_ms = (time.perf_counter() - started) * 1000
+
+        plan = plan_shards(counts, start_time, end_time, density.bucket_ns, self.service.target_shard_lines)
+        log_entries, shard_stats = await self._fetch_shards(
+            logql_query, [(shard["start"], shard["end"]) for shard in plan], max_workers
+        )
+        fetch_ms = (time.perf_counter() - started) * 1000 - probe_ms
+
+        shard_plan = await self.run_sync(
+            self.service.finish_adaptive_search, logql_query, start_time, end_time, plan, missing,
+            known_buckets, log_entries, shard_stats, probe_ms, fetch_ms
+        )
+        return log_entries, shard_stats, shard_plan
+
+    async def _fetch(
+        self,
+        logql_query: str,
+        start_time: int,
+        end_time: int,
+        shard_hours: Optional[int],
+        max_workers: int,
+        locate_first: bool,
+        locate_step_minutes: int,
+        adaptive_shards: bool
+    ) -> Tuple[str, LogEntries, Dict[str, Any]]:
+        """Fetch a whole window with the requested strategy; see GrafanaService._fetch()."""
+        if locate_first:
+            log_entries, stats = await self._locate_and_fetch(
+                logql_query, start_time, end_time, locate_step_minutes * 60, max_workers
+            )
+            return "locate", log_entries, {"locate": stats, "truncated": stats["truncated"]}
+        if adaptive_shards:
+            log_entries, shard_stats, shard_plan = await self._adaptive_search(
+                logql_query, start_time, end_time, max_workers
+            )
+            return "adaptive", log_entries, {
+                "shards": shard_stats,
+                "shard_plan": shard_plan,
+                "truncated": shard_plan["truncated_shards"] > 0
+            }
+        if shard_hours:
+            shards = split_time_range(start_time, end_time, shard_hours * NANOSECONDS_PER_HOUR)
+            log_entries, shard_stats = await self._fetch_shards(logql_query, shards, max_workers)
+            return "sharded", log_entries, {
+                "shards": shard_stats,
+                "truncated": any(shard["entries"] >= MAX_QUERY_LIMIT for shard in shard_stats)
+            }
+        log_entries, total_entries = await self.query_entries(logql_query, start_time, end_time)
+        await self.run_sync(log_entries.sort_newest_first)
+        return "single", log_entries, {"truncated": total_entries >= MAX_QUERY_LIMIT}
+
+    async def search_by_correlation_id(
+        self,
+        correlation_id: str,
+        deployment_environment: Optional[str] = None,
+        days_back: int = 7,
+        shard_hours: Optional[int] = None,
+        max_workers: int = 4,
+        locate_first: bool = False,
+        locate_step_minutes: int = 60,
+        log_filter: Optional[LogFilter] = None,
+        adaptive_shards: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Search for logs containing the given correlation ID.
+
+        Args:
+            correlation_id: The correlation ID to search for
+            deployment_environment: Optional environment filter (e.g., "test", "production")
+            days_back: Number of days to search back (default: 7)
+            shard_hours: Optional shard size in hours for a concurrent sharded search
+            max_workers: Maximum number of shards queried at once (default: 4)
+            locate_first: Probe match density first and fetch only matching buckets
+            locate_step_minutes: Bucket size of the density probe (default: 60)
+            log_filter: Optional structured filters and field projection applied by Loki
+            adaptive_shards: Plan shards from the observed match density
+
+        Returns:
+            Dictionary containing search results and metadata; a result shared
+            with an identical search that was already in flight is marked
+            "coalesced"
+        """
+        def search() -> Awaitable[Dict[str, Any]]:
+            return self._search(
+                correlation_id, deployment_environment, days_back,
+                shard_hours, max_workers, locate_first, locate_step_minutes, log_filter,
+                adaptive_shards
+            )
+
+        singleflight = self.service.singleflight
+        if singleflight is None:
+            return await search()
+
+        key = search_key(
+            correlation_id, deployment_environment, days_back,
+            shard_hours, locate_first, locate_step_minutes, log_filter, adaptive_shards
+        )
+        result, shared = await singleflight.run_async(key, search)
+        return self.service.share_result(result, shared)
+
+    async def _search(
+        self,
+        correlation_id: str,
+        deployment_environment: Optional[str],
+        days_back: int,
+        shard_hours: Optional[int],
+        max_workers: int,
+        locate_first: bool,
+        locate_step_minutes: int,
+        log_filter: Optional[LogFilter],
+        adaptive_shards: bool
+    ) -> Dict[str, Any]:
+        """Run one search; see search_by_correlation_id() for the arguments."""
+        try:
+            start_time, end_time = search_window(days_back)
+            logql_query = build_correlation_query(correlation_id, deployment_environment, log_filter=log_filter)
+
+            result = {
+                "success": True,
+                "correlation_id": correlation_id,
+                "environment": deployment_environment,
+                "query": logql_query,
+                "search_period_days": days_back
+            }
+            if log_filter is not None:
+                result["filters"] = log_filter.describe()
+
+            # The cache helpers may read and write the SQLite store, so they run off the event loop
+            log_entries = None
+            cached = await self.run_sync(self.service.lookup_cache, result, start_time)
+
+            if cached is not None:
+                # Only fetch what was logged since the previous search
+                delta_entries, delta_total = await self.query_entries(
+                    logql_query, delta_start(cached, start_time), end_time
+                )
+                log_entries = await self.run_sync(
+                    self.service.merge_cached, result, cached, delta_entries, delta_total, start_time, end_time
+                )
+
+            if log_entries is None:
+                started = time.perf_counter()
+                strategy, log_entries, details = await self._fetch(
+                    logql_query, start_time, end_time, shard_hours, max_workers,
+                    locate_first, locate_step_minutes, adaptive_shards
+                )
+                await self.run_sync(
+                    self.service.record_fetch, result, strategy, details, log_entries, start_time, end_time,
+                    (time.perf_counter() - started) * 1000
+                )
+
+            result["total_entries"] = len(log_entries)
+            result["entries"] = log_entries
+            return result
+
+        except LokiQueryError as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "correlation_id": correlation_id
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception occurred: {str(e)}",
+                "correlation_id": correlation_id
+            }
+
+
+def _close_response(task: "asyncio.Future") -> None:
+    """Close the response of a finished request task, if it produced one."""
+    if not task.cancelled() and task.exception() is None:
+        asyncio.ensure_future(task.result().aclose())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Offline checks for the live tail (log_tail.py) against a live fake Loki.
+
+Runs LogTail and TailBuffer against ``start_fake_loki(SyntheticConfig(live=True))``,
+which keeps logging a line every few milliseconds, and verifies that:
+
+- lines re-read in the overlap between polls are not buffered twice,
+- a full page is followed up immediately so no lines are skipped,
+- a full ring buffer drops the oldest lines and counts them in ``dropped``.
+
+Usage:
+    python benchmarks/check_tail.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+from typing import Callable, Awaitable, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_loki import SyntheticConfig, start_fake_loki
+from grafana_service import GrafanaService
+from async_grafana_service import AsyncGrafanaService
+from log_tail import LogTail
+
+# Every line of the fake matches a query without a line filter
+TAIL_QUERY = '{job=~".+"}'
+INTERVAL_MS = 5
+
+
+def assert_contiguous(lines: List[Tuple[int, str, dict]], interval_ns: int):
+    """Fail unless lines are unique, oldest first and one interval apart."""
+    keys = [(timestamp_ns, message) for timestamp_ns, message, _ in lines]
+    assert len(set(keys)) == len(keys), f"{len(keys) - len(set(keys))} duplicate lines buffered"
+    gaps = [
+        later[0] - earlier[0] for earlier, later in zip(lines, lines[1:])
+        if later[0] - earlier[0] != interval_ns
+    ]
+    assert not gaps, f"lines are not contiguous: unexpected spacing {gaps[:5]} ns"
+
+
+async def check_overlap_dedup(service: AsyncGrafanaService, interval_ns: int):
+    """Lines returned again inside the overlap window are buffered once."""
+    tail = LogTail(
+        service.query_entries, TAIL_QUERY, time.time_ns() - 500_000_000,
+        buffer_size=10_000, overlap_ns=2_000_000_000
+    )
+    for _ in range(5):
+        await tail.poll()
+        await asyncio.sleep(0.05)
+    lines = tail.buffer.drain()
+    assert len(lines) >= 100, f"expected at least 100 lines, got {len(lines)}"
+    assert_contiguous(lines, interval_ns)
+    assert tail.buffer.dropped == 0
+
+
+async def check_full_page_follow_up(service: AsyncGrafanaService, interval_ns: int):
+    """A poll whose first page is full keeps requesting until it has every line."""
+    tail = LogTail(
+        service.query_entries, TAIL_QUERY, time.time_ns() - 2_000_000_000,
+        buffer_size=10_000, page_size=50
+    )
+    new_lines = await tail.poll()
+    lines = tail.buffer.drain()
+    # Two seconds at one line per interval, in pages of 50
+    assert new_lines >= 2_000_000_000 // interval_ns - 1, f"only {new_lines} lines fetched"
+    assert tail.polls > new_lines // 50, f"{tail.polls} requests for {new_lines} lines"
+    assert_contiguous(lines, interval_ns)
+
+
+async def check_ring_buffer_drops(service: AsyncGrafanaService, interval_ns: int):
+    """Undrained lines beyond the buffer capacity drop the oldest and are counted."""
+    tail = LogTail(
+        service.query_entries, TAIL_QUERY, time.time_ns() - 1_000_000_000,
+        buffer_size=30
+    )
+    new_lines = await tail.poll()
+    newest = tail.buffer.latest()
+    stats = tail.stats()
+    assert new_lines > 30, f"only {new_lines} lines fetched"
+    assert stats["buffered"] == 30
+    assert stats["dropped"] == stats["received"] - 30, stats
+    lines = tail.buffer.drain()
+    assert lines[-1] == newest, "the newest lines must be kept"
+    assert_contiguous(lines, interval_ns)
+
+
+CHECKS: List[Callable[[AsyncGrafanaService, int], Awaitable[None]]] = [
+    check_overlap_dedup,
+    check_full_page_follow_up,
+    check_ring_buffer_drops,
+]
+
+
+async def run_checks(url: str) -> int:
+    """Run every check and return the number that failed."""
+    service = AsyncGrafanaService(
+        GrafanaService(url, "bench", "bench", cache_ttl_seconds=0)
+    )
+    failures = 0
+    try:
+        for check in CHECKS:
+            try:
+                await check(service, INTERVAL_MS * 1_000_000)
+                print(f"ok    {check.__name__}")
+            except AssertionError as e:
+                failures += 1
+                print(f"FAIL  {check.__name__}: {e}")
+    finally:
+        await service.aclose()
+        service.service.close()
+    return failures
+
+
+def main() -> int:
+    server, url = start_fake_loki(SyntheticConfig(lines=100_000, interval_ms=INTERVAL_MS, live=True))
+    try:
+        failures = asyncio.run(run_checks(url))
+    finally:
+        server.shutdown()
+    print(f"{len(CHECKS) - failures}/{len(CHECKS)} tail checks passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Loki HTTP API backed by deterministic synthetic logs.
+
+Lines are generated on demand from their index, so a "dataset" of millions of
+lines costs no memory. Line i is logged at ``anchor - i * interval`` on stream
+``i % streams``; every ``match_every``-th line carries the hot correlation ID.
+In live mode negative indexes become visible as wall-clock time passes the
+anchor, so new lines keep arriving at the configured interval.
+
+Run standalone:
+    python benchmarks/fake_loki.py --port 3100 --lines 5000000 --latency-ms 20
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List, Tuple, Callable
+from urllib.parse import urlparse, parse_qs
+
+
+HOT_CORRELATION_ID = "bench-7f3a9c1e-0d4b-4e8a-9a51-2c6f0e8d7b13"
+
+ENVIRONMENTS = ("production", "test")
+LEVELS = ("info", "info", "info", "debug", "warn", "error")
+MESSAGES = (
+    "Handled request in {n}ms",
+    "Cache miss for key order:{n}",
+    "Published event OrderUpdated version {n}",
+    "Retrying downstream call attempt {n}",
+    "Payment authorised for amount {n}",
+)
+
+
+@dataclass
+class SyntheticConfig:
+    """Shape of the synthetic dataset and the fault injection applied to it."""
+    lines: int = 1_000_000
+    streams: int = 50
+    interval_ms: int = 100
+    match_every: int = 499
+    line_bytes: int = 200
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 42
+    live: bool = False
+
+
+class SyntheticLogs:
+    """Deterministic generator of log lines addressed by index."""
+
+    def __init__(self, config: SyntheticConfig, anchor_ns: Optional[int] = None):
+        """
+        Initialize the generator.
+
+        Args:
+            config: Dataset shape
+            anchor_ns: Timestamp of line 0 (the newest line); defaults to now
+        """
+        self.config = config
+        self.anchor_ns = anchor_ns if anchor_ns is not None else time.time_ns()
+        self.interval_ns = config.interval_ms * 1_000_000
+        self._padding = "x" * max(config.line_bytes - 120, 0)
+
+    def timestamp(self, index: int) -> int:
+        """Timestamp of line ``index`` in nanoseconds."""
+        return self.anchor_ns - index * self.interval_ns
+
+    def labels(self, stream: int) -> Dict[str, str]:
+        """Stream labels for a stream number."""
+        return {
+            "job": f"app/svc-{stream % 10}",
+            "service_name": f"svc-{stream % 10}",
+            "deployment_environment": ENVIRONMENTS[stream % len(ENVIRONMENTS)],
+            "pod": f"svc-{stream % 10}-{stream}",
+        }
+
+    def line(self, index: int) -> str:
+        """The log line at ``index``."""
+        stream = index % self.config.streams
+        correlation_id = HOT_CORRELATION_ID if index % self.config.match_every == 0 else f"req-{index:012x}"
+        message = MESSAGES[index % len(MESSAGES)].format(n=index % 997)
+        return json.dumps({
+            "level": LEVELS[(index // 7) % len(LEVELS)],
+            "service": f"svc-{stream % 10}",
+            "correlation_id": correlation_id,
+            "msg": message,
+            "pad": self._padding,
+        })
+
+    def index_range(self, start_ns: int, end_ns: int) -> Tuple[int, int]:
+        """Return the [first, last] line indexes with start <= ts < end."""
+        newest = 0
+        if self.config.live:
+            newest = -((time.time_ns() - self.anchor_ns) // self.interval_ns)
+        first = max(newest, (self.anchor_ns - end_ns) // self.interval_ns + 1)
+        last = min(self.config.lines - 1, (self.anchor_ns - start_ns) // self.interval_ns)
+        return first, last
+
+    def matching(
+        self,
+        start_ns: int,
+        end_ns: int,
+        needle: Optional[str],
+        environment: Optional[str],
+        oldest_first: bool = False
+    ):
+        """
+        Yield matching line indexes newest first, or oldest first if requested.
+
+        Only the hot correlation ID matches a line filter; any other needle
+        matches nothing, which mirrors searching for an absent ID.
+        """
+        first, last = self.index_range(start_ns, end_ns)
+        if first > last:
+            return
+        if needle is None:
+            step = 1
+        elif needle == HOT_CORRELATION_ID:
+            step = self.config.match_every
+        else:
+            return
+        if oldest_first:
+            index, stop, step = last // step * step, first - 1, -step
+        else:
+            index, stop = -(-first // step) * step, last + 1
+        while (index < stop) if step > 0 else (index > stop):
+            stream = index % self.config.streams
+            if environment is None or ENVIRONMENTS[stream % len(ENVIRONMENTS)] == environment:
+                yield index
+            index += step
+
+
+def parse_query(query: str) -> Tuple[Optional[str], Optional[str], Optional[int]]:
+    """
+    Extract what the fake understands from a LogQL query.
+
+    Returns:
+        Tuple of (line filter needle, environment, count_over_time range seconds)
+    """
+    environment = None
+    match = re.search(r'deployment_environment="([^"]+)"', query)
+    if match:
+        environment = match.group(1)
+
+    needle = None
+    match = re.search(r'\|= "([^"]*)"', query) or re.search(r"\|~ `([^`]*)`", query)
+    if match:
+        needle = match.group(1).replace("\\", "")
+        if "|" in needle:
+            # Multi-ID regex: the hot ID matches if it is among the alternatives
+            needle = HOT_CORRELATION_ID if HOT_CORRELATION_ID in needle.split("|") else needle
+
+    metric_range = None
+    match = re.search(r"count_over_time\(.*\[(\d+)s\]\)", query)
+    if match:
+        metric_range = int(match.group(1))
+
+    return needle, environment, metric_range
+
+
+LOGQL_STRING = r'"((?:[^"\\]|\\.)*)"'
+
+
+def unquote_logql(value: str) -> str:
+    """Undo LogQL double-quoted string escaping."""
+    return re.sub(r"\\(.)", r"\1", value)
+
+
+def parse_pipeline(query: str) -> Optional[Callable[[str], Optional[str]]]:
+    """
+    Build the subset of a LogQL pipeline that structured filters use.
+
+    Understands a ``|~ "regex"`` line filter, ``| json label="path"``
+    extraction, ``=`` and ``=~`` label filters on extracted labels and a
+    ``line_format`` projection of extracted labels.
+
+    Returns:
+        Function mapping a line to its output, or None if the line is dropped;
+        None if the query has no such stages
+    """
+    stages = []
+    match = re.search(r"\|~ " + LOGQL_STRING, query)
+    if match:
+        pattern = re.compile(unquote_logql(match.group(1)))
+        stages.append(lambda line, fields: line if pattern.search(line) else None)
+
+    match = re.search(r"\| json ((?:\w+=" + LOGQL_STRING + r"(?:, )?)+)", query)
+    paths = {}
+    if match:
+        paths = {
+            label: unquote_logql(path)
+            for label, path in re.findall(r"(\w+)=" + LOGQL_STRING, match.group(1))
+        }
+
+    for label, operator, value in re.findall(r"\| (\w+)(=~|=)" + LOGQL_STRING, query):
+        if label not in paths:
+            continue
+        value = unquote_logql(value)
+        if operator == "=~":
+            expected = re.compile(value)
+            keep = lambda fields, label=label, expected=expected: expected.fullmatch(fields.get(label, ""))
+        else:
+            keep = lambda fields, label=label, value=value: fields.get(label, "") == value
+        stages.append(lambda line, fields, keep=keep: line if keep(fields) else None)
+
+    match = re.search(r"\| line_format `([^`]*)`", query)
+    if match:
+        projected = re.findall(r'(\w+)=\{\{printf "%q" \.(\w+)\}\}', match.group(1))
+        stages.append(lambda line, fields: " ".join(
+            f"{name}={json.dumps(fields.get(label, ''))}" for name, label in projected
+        ))
+
+    if not stages:
+        return None
+
+    def apply(line: str) -> Optional[str]:
+        fields = {}
+        if paths:
+            parsed = json.loads(line)
+            for label, path in paths.items():
+                value: Any = parsed
+                for key in path.split("."):
+                    value = value.get(key) if isinstance(value, dict) else None
+                fields[label] = "" if value is None else str(value)
+        for stage in stages:
+            line = stage(line, fields)
+            if line is None:
+                return None
+        return line
+
+    return apply
+
+
+class FakeLokiHandler(BaseHTTPRequestHandler):
+    """Serves query_range, labels, label values and series from SyntheticLogs."""
+
+    logs: SyntheticLogs = None
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+    requests_served = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        config = self.logs.config
+        with self.rng_lock:
+            type(self).requests_served += 1
+            delay = config.latency_ms + self.rng.uniform(0, config.jitter_ms)
+            fail = self.rng.random() < config.error_rate
+        if delay:
+            time.sleep(delay / 1000)
+        if fail:
+            self._send_json(503, {"status": "error", "error": "injected failure"}, {"Retry-After": "0"})
+            return
+
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/loki/api/v1/labels":
+            self._send_json(200, {"status": "success", "data": list(self.logs.labels(0))})
+        elif url.path.startswith("/loki/api/v1/label/") and url.path.endswith("/values"):
+            name = url.path.split("/")[-2]
+            values = sorted({self.logs.labels(stream).get(name) for stream in range(config.streams)} - {None})
+            self._send_json(200, {"status": "success", "data": values})
+        elif url.path == "/loki/api/v1/series":
+            _, environment, _ = parse_query(params.get("match[]", ""))
+            series = [
+                self.logs.labels(stream) for stream in range(config.streams)
+                if environment is None or self.logs.labels(stream)["deployment_environment"] == environment
+            ]
+            self._send_json(200, {"status": "success", "data": series})
+        elif url.path == "/loki/api/v1/query_range":
+            self._query_range(params)
+        else:
+            self._send_json(404, {"status": "error", "error": "not found"})
+
+    def _query_range(self, params: Dict[str, str]):
+        needle, environment, metric_range = parse_query(params.get("query", ""))
+        pipeline = parse_pipeline(params.get("query", ""))
+        start_ns = int(params.get("start", 0))
+        end_ns = int(params.get("end", time.time_ns()))
+
+        if metric_range is not None:
+            step_ns = int(params.get("step", metric_range)) * 1_000_000_000
+            counts: Dict[int, int] = {}
+            for index in self.logs.matching(start_ns, end_ns, needle, environment):
+                if pipeline is not None and pipeline(self.logs.line(index)) is None:
+                    continue
+                bucket = -(-(self.logs.timestamp(index) - start_ns) // step_ns) * step_ns + start_ns
+                counts[bucket] = counts.get(bucket, 0) + 1
+            values = [[bucket / 1_000_000_000, str(count)] for bucket, count in sorted(counts.items())]
+            result = [{"metric": {}, "values": values}] if values else []
+            self._send_json(200, {"status": "success", "data": {"resultType": "matrix", "result": result}})
+            return
+
+        limit = int(params.get("limit", 100))
+        streams: Dict[int, List[List[str]]] = {}
+        oldest_first = params.get("direction") == "forward"
+        count = 0
+        for index in self.logs.matching(start_ns, end_ns, needle, environment, oldest_first):
+            if count >= limit:
+                break
+            line = self.logs.line(index)
+            if pipeline is not None:
+                line = pipeline(line)
+                if line is None:
+                    continue
+            count += 1
+            stream = index % self.logs.config.streams
+            streams.setdefault(stream, []).append([str(self.logs.timestamp(index)), line])
+        result = [{"stream": self.logs.labels(stream), "values": values} for stream, values in streams.items()]
+        self._send_json(200, {"status": "success", "data": {"resultType": "streams", "result": result}})
+
+
+def start_fake_loki(config: SyntheticConfig, port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the fake Loki server in a background thread.
+
+    Args:
+        config: Dataset shape and fault injection
+        port: Port to listen on; 0 picks a free port
+
+    Returns:
+        Tuple of (server, base URL)
+    """
+    handler = type("BoundFakeLokiHandler", (FakeLokiHandler,), {
+        "logs": SyntheticLogs(config),
+        "rng": random.Random(config.seed),
+        "rng_lock": threading.Lock(),
+        "requests_served": 0,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-loki", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    """Add dataset and fault-injection options to an argument parser."""
+    defaults = SyntheticConfig()
+    parser.add_argument("--lines", type=int, default=defaults.lines, help="Total synthetic log lines")
+    parser.add_argument("--streams", type=int, default=defaults.streams, help="Number of log streams")
+    parser.add_argument("--interval-ms", type=int, default=defaults.interval_ms, help="Time between consecutive lines")
+    parser.add_argument("--match-every", type=int, default=defaults.match_every, help="Every Nth line carries the hot correlation ID")
+    parser.add_argument("--line-bytes", type=int, default=defaults.line_bytes, help="Approximate size of each line")
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=defaults.jitter_ms, help="Random extra latency per request")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Seed for latency jitter and error injection")
+    parser.add_argument("--live", action="store_true", help="Keep logging new lines after startup")
+
+
+def config_from_args(args: argparse.Namespace) -> SyntheticConfig:
+    """Build a SyntheticConfig from parsed arguments."""
+    return SyntheticConfig(
+        lines=args.lines,
+        streams=args.streams,
+        interval_ms=args.interval_ms,
+        match_every=args.match_every,
+        line_bytes=args.line_bytes,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        live=args.live,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local fake Loki server with synthetic logs.")
+    parser.add_argument("--port", type=int, default=3100, help="Port to listen on")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server, url = start_fake_loki(config_from_args(args), args.port)
+    print(f"Fake Loki listening on {url} (hot correlation ID: {HOT_CORRELATION_ID})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
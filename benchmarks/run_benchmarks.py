@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the Grafana search, pagination and formatting paths.
+
+Starts a local fake Loki (see fake_loki.py) and reports throughput, latency
+percentiles and peak Python heap for each scenario. No network access is needed.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --lines 5000000 --latency-ms 25 --repeat 10
+    python benchmarks/run_benchmarks.py --scenarios search,paginate --json results.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import weakref
+from typing import Callable, Dict, Any, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_loki import (
+    HOT_CORRELATION_ID,
+    add_config_arguments,
+    config_from_args,
+    start_fake_loki,
+    SyntheticLogs,
+)
+from grafana_service import GrafanaService, build_correlation_query, search_window
+from log_entries import LogEntries
+from log_patterns import PatternMiner
+from result_handles import ResultRegistry
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def measure(name: str, run: Callable[[], int], repeat: int) -> Dict[str, Any]:
+    """
+    Run a scenario several times and summarise it.
+
+    Args:
+        name: Scenario name
+        run: Callable returning the number of entries it processed
+        repeat: Number of timed runs
+
+    Returns:
+        Dictionary of latency percentiles, throughput and peak memory
+    """
+    run()  # warm-up: connection pool
+
+    durations = []
+    entries = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        entries = run()
+        durations.append(time.perf_counter() - started)
+
+    # Tracing slows Python code several times over, so memory gets its own run
+    tracemalloc.start()
+    run()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mean = statistics.mean(durations)
+    return {
+        "scenario": name,
+        "runs": repeat,
+        "entries": entries,
+        "p50_ms": round(percentile(durations, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(durations, 0.95) * 1000, 1),
+        "max_ms": round(max(durations) * 1000, 1),
+        "entries_per_s": round(entries / mean, 1) if mean else 0.0,
+        "peak_mb": round(peak_bytes / (1024 * 1024), 2),
+    }
+
+
+def build_scenarios(service: GrafanaService, args: argparse.Namespace) -> Dict[str, Callable[[], int]]:
+    """Build the benchmark scenarios keyed by name."""
+
+    def search() -> int:
+        result = service.search_by_correlation_id(HOT_CORRELATION_ID, None, args.days_back)
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+        return result["total_entries"]
+
+    def search_sharded() -> int:
+        result = service.search_by_correlation_id(
+            HOT_CORRELATION_ID, None, args.days_back, shard_hours=args.shard_hours
+        )
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+        return result["total_entries"]
+
+    def search_locate() -> int:
+        result = service.search_by_correlation_id(
+            HOT_CORRELATION_ID, None, args.days_back, locate_first=True
+        )
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+        return result["total_entries"]
+
+    def paginate() -> int:
+        start_time, end_time = search_window(args.days_back)
+        query = build_correlation_query(HOT_CORRELATION_ID, None)
+        count = 0
+        for _ in service.iter_query_range(query, start_time, end_time):
+            count += 1
+            if count >= args.max_paged_entries:
+                break
+        return count
+
+    def format_results() -> int:
+        # Imported lazily: the MCP SDK is only needed for this scenario
+        from mcp.server import Server
+        from server import AuraMCPServer
+
+        server = AuraMCPServer.__new__(AuraMCPServer)
+        server.server = Server("bench")
+        server.grafana_service = service
+        server.results = ResultRegistry()
+        server._session_keys = weakref.WeakKeyDictionary()
+        result = service.search_by_correlation_id(HOT_CORRELATION_ID, None, args.days_back)
+        for _ in range(args.format_iterations):
+            server._format_search_result(result, HOT_CORRELATION_ID, None, args.days_back)
+        return result["total_entries"] * args.format_iterations
+
+    # Generated once, so the scenario times template mining alone
+    synthetic = SyntheticLogs(config_from_args(args))
+    pattern_entries = LogEntries()
+    for index in range(min(args.pattern_lines, synthetic.config.lines)):
+        pattern_entries.append(synthetic.timestamp(index), synthetic.line(index), synthetic.labels(0))
+
+    def patterns() -> int:
+        miner = PatternMiner().add_entries(pattern_entries)
+        return miner.lines
+
+    return {
+        "search": search,
+        "search_sharded": search_sharded,
+        "search_locate": search_locate,
+        "paginate": paginate,
+        "format": format_results,
+        "patterns": patterns,
+    }
+
+
+def print_table(results: List[Dict[str, Any]]):
+    """Print results as an aligned table."""
+    columns = ["scenario", "runs", "entries", "p50_ms", "p95_ms", "max_ms", "entries_per_s", "peak_mb"]
+    widths = {column: max(len(column), *(len(str(row[column])) for row in results)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in results:
+        print("  ".join(str(row[column]).ljust(widths[column]) for column in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Grafana log search paths against a local fake Loki.")
+    add_config_arguments(parser)
+    parser.add_argument("--scenarios", default="search,search_sharded,search_locate,paginate,format,patterns",
+                        help="Comma-separated scenarios to run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per scenario")
+    parser.add_argument("--days-back", type=int, default=1, help="Search window in days")
+    parser.add_argument("--shard-hours", type=int, default=3, help="Shard size for search_sharded")
+    parser.add_argument("--max-paged-entries", type=int, default=20_000, help="Stop paginating after this many entries")
+    parser.add_argument("--format-iterations", type=int, default=100, help="Formatting passes per run")
+    parser.add_argument("--pattern-lines", type=int, default=200_000, help="Lines mined per run by the patterns scenario")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    config = config_from_args(args)
+    server, url = start_fake_loki(config)
+    service = GrafanaService(url, "bench", "bench", cache_ttl_seconds=0)
+    scenarios = build_scenarios(service, args)
+
+    print(f"Fake Loki at {url}: {config.lines} lines, {config.streams} streams, "
+          f"latency {config.latency_ms}ms, error rate {config.error_rate}")
+
+    results = []
+    for name in args.scenarios.split(","):
+        name = name.strip()
+        if name not in scenarios:
+            parser.error(f"unknown scenario: {name}")
+        results.append(measure(name, scenarios[name], args.repeat))
+
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"config": vars(config), "results": results}, file, indent=2)
+
+    service.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,17 +3,491 @@ Grafana service for searching logs via Loki API.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import base64
 import time
 from urllib.parse import urlencode
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Iterator, Callable
 import json
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from search_cache import SearchCache, CachedSearch, delta_start, merge_delta
+from log_store import LogStore
+from metrics import MetricsRegistry
+from resilience import RetryPolicy, CircuitBreaker
+from loki_requests import LokiQueryError, LokiRequests
+from loki_stream import LokiStreamDecoder
+from log_entries import LogEntries
+from singleflight import SingleFlight
+from log_filter import LogFilter, escape_regex, quote_logql
+from log_export import export_entries
+from log_stats import LogStatsCollector
+from shard_planner import DensityTracker, plan_shards, bucket_counts, TARGET_SHARD_LINES, MAX_ADAPTIVE_SHARDS
+
+
+NANOSECONDS_PER_SECOND = 1_000_000_000
+NANOSECONDS_PER_HOUR = 60 * 60 * NANOSECONDS_PER_SECOND
+NANOSECONDS_PER_DAY = 24 * NANOSECONDS_PER_HOUR
+
+# Loki's default max_entries_limit_per_query
+MAX_QUERY_LIMIT = 1000
+
+# Recent full-search latencies kept per strategy for comparison
+LATENCY_SAMPLES = 100
+
+LABELS_ENDPOINT = "/loki/api/v1/labels"
+QUERY_RANGE_ENDPOINT = "/loki/api/v1/query_range"
+
+# Bytes read per chunk when decoding a streamed query_range body
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Batch size from which one trie regex pass beats a substring check per ID
+ID_TRIE_MIN_IDS = 40
+
+
+def build_auth_headers(username: str, password: str) -> Dict[str, str]:
+    """
+    Build the Basic authentication header for Grafana Cloud.
+    
+    Args:
+        username: Username for authentication
+        password: Password/token for authentication
+        
+    Returns:
+        Dictionary of HTTP headers
+    """
+    auth_string = f"{username}:{password}"
+    base64_auth_string = base64.b64encode(auth_string.encode("ascii")).decode("ascii")
+    return {
+        "Authorization": f"Basic {base64_auth_string}"
+    }
+
+
+def build_correlation_query(
+    correlation_id: str,
+    deployment_environment: Optional[str] = None,
+    selector: Optional[str] = None,
+    log_filter: Optional[LogFilter] = None
+) -> str:
+    """
+    Build the LogQL query used to search for a correlation ID.
+    
+    Args:
+        correlation_id: The correlation ID to search for
+        deployment_environment: Optional environment filter
+        selector: Optional stream selector replacing the default one
+        log_filter: Optional structured filters and field projection
+        
+    Returns:
+        LogQL query string
+    """
+    if selector:
+        query = f'{selector} |= "{correlation_id}"'
+    elif deployment_environment:
+        query = f'{{deployment_environment="{deployment_environment}"}} |= "{correlation_id}"'
+    else:
+        query = f'{{job=~".+"}} |= "{correlation_id}"'
+    if log_filter is not None:
+        query += " " + log_filter.pipeline()
+    return query
+
+
+def build_multi_correlation_query(
+    correlation_ids: List[str],
+    deployment_environment: Optional[str] = None
+) -> str:
+    """
+    Build a single LogQL query matching any of several correlation IDs.
+    
+    Args:
+        correlation_ids: The correlation IDs to search for
+        deployment_environment: Optional environment filter
+        
+    Returns:
+        LogQL query string using a regex line filter
+    """
+    pattern = "|".join(escape_regex(correlation_id) for correlation_id in correlation_ids)
+    # A backtick cannot appear in a raw string, so fall back to an escaped one
+    quoted = quote_logql(pattern) if "`" in pattern else f"`{pattern}`"
+    if deployment_environment:
+        return f'{{deployment_environment="{deployment_environment}"}} |~ {quoted}'
+    return f'{{job=~".+"}} |~ {quoted}'
+
+
+def build_label_query(
+    labels: Dict[str, str],
+    correlation_id: Optional[str] = None,
+    log_filter: Optional[LogFilter] = None
+) -> str:
+    """
+    Build a LogQL query selecting streams by exact label values.
+    
+    Args:
+        labels: Label names and the values they must equal
+        correlation_id: Optional correlation ID the lines must contain
+        log_filter: Optional structured filters and field projection
+        
+    Returns:
+        LogQL query string
+        
+    Raises:
+        ValueError: If no labels are given or a label name is invalid
+    """
+    if not labels:
+        raise ValueError("At least one label is required")
+    invalid = [name for name in labels if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", name)]
+    if invalid:
+        raise ValueError(f"Invalid label name(s): {', '.join(invalid)}")
+    
+    selector = "{" + ", ".join(f"{name}={quote_logql(str(value))}" for name, value in labels.items()) + "}"
+    if correlation_id:
+        return build_correlation_query(correlation_id, selector=selector, log_filter=log_filter)
+    if log_filter is not None:
+        return f"{selector} {log_filter.pipeline()}"
+    return selector
+
+
+def trie_pattern(words: List[str]) -> str:
+    """
+    Build a regex alternation of the words, factored into a prefix trie.
+    
+    The regex engine then follows a single branch per character instead of
+    trying every word at every position, and the greedy optional suffixes
+    make it prefer the longest word starting at a position.
+    
+    Args:
+        words: Non-empty literal strings
+        
+    Returns:
+        Regex source matching any of the words
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+    
+    def emit(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+    
+    return emit(trie)
+
+
+def build_id_matcher(correlation_ids: List[str]) -> Callable[[str], List[str]]:
+    """
+    Build a function returning which of the given IDs a line contains.
+    
+    Each ID is matched with the same substring semantics as the single-ID
+    |= filter, so an ID found only inside or overlapping a longer ID of the
+    same batch is still counted. Small batches check each ID with ``in``;
+    from ID_TRIE_MIN_IDS on, one pass of a trie regex finds the longest ID
+    at each match and only the IDs that could hide inside or overlap it are
+    checked again.
+    
+    Args:
+        correlation_ids: The correlation IDs to match
+        
+    Returns:
+        Function mapping a log line to the IDs it contains
+    """
+    ordered = list(dict.fromkeys(correlation_ids))
+    
+    if len(ordered) < ID_TRIE_MIN_IDS or "" in ordered:
+        def matches(message: str) -> List[str]:
+            return [correlation_id for correlation_id in ordered if correlation_id in message]
+        
+        return matches
+    
+    # An ID can start inside a match of another ID when it is contained in it
+    # or a suffix of that ID is one of its prefixes; findall never reports it
+    prefixes: Dict[str, List[str]] = {}
+    for correlation_id in ordered:
+        for length in range(1, len(correlation_id)):
+            prefixes.setdefault(correlation_id[:length], []).append(correlation_id)
+    hidden: Dict[str, List[str]] = {}
+    for correlation_id in ordered:
+        candidates = [other for other in ordered if other != correlation_id and other in correlation_id]
+        for offset in range(1, len(correlation_id)):
+            candidates.extend(prefixes.get(correlation_id[offset:], ()))
+        hidden[correlation_id] = list(dict.fromkeys(candidates))
+    findall = re.compile(trie_pattern(ordered)).findall
+    
+    def matches(message: str) -> List[str]:
+        found = dict.fromkeys(findall(message))
+        for correlation_id in list(found):
+            for other in hidden[correlation_id]:
+                if other not in found and other in message:
+                    found[other] = None
+        return list(found)
+    
+    return matches
+
+
+def search_window(days_back: int) -> Tuple[int, int]:
+    """
+    Calculate the (start, end) nanosecond time range for the last N days.
+    
+    Args:
+        days_back: Number of days to search back
+        
+    Returns:
+        Tuple of (start_time, end_time) in nanoseconds
+    """
+    end_time = int(time.time() * NANOSECONDS_PER_SECOND)
+    start_time = end_time - (days_back * NANOSECONDS_PER_DAY)
+    return start_time, end_time
+
+
+def split_time_range(start_time: int, end_time: int, shard_size: int) -> List[Tuple[int, int]]:
+    """
+    Split a nanosecond time range into consecutive shards, oldest first.
+    
+    Args:
+        start_time: Start of the range in nanoseconds
+        end_time: End of the range in nanoseconds
+        shard_size: Size of each shard in nanoseconds
+        
+    Returns:
+        List of (shard_start, shard_end) tuples covering the range
+    """
+    shards = []
+    shard_start = start_time
+    while shard_start < end_time:
+        shard_end = min(shard_start + shard_size, end_time)
+        shards.append((shard_start, shard_end))
+        shard_start = shard_end
+    return shards
+
+
+def search_key(
+    correlation_id: str,
+    deployment_environment: Optional[str],
+    days_back: int,
+    shard_hours: Optional[int],
+    locate_first: bool,
+    locate_step_minutes: int,
+    log_filter: Optional[LogFilter] = None,
+    adaptive_shards: bool = False
+) -> Tuple[Any, ...]:
+    """
+    Build the key under which identical concurrent searches are coalesced.
+    
+    Args:
+        correlation_id: The correlation ID to search for
+        deployment_environment: Optional environment filter
+        days_back: Number of days to search back
+        shard_hours: Optional shard size in hours
+        locate_first: Whether the locate-then-fetch strategy is used
+        locate_step_minutes: Bucket size of the density probe
+        log_filter: Optional structured filters and field projection
+        adaptive_shards: Whether shards are planned from the observed density
+        
+    Returns:
+        Hashable key; searches with equal keys return the same result
+    """
+    return (
+        correlation_id,
+        deployment_environment or None,
+        days_back,
+        shard_hours or None,
+        bool(locate_first),
+        locate_step_minutes if locate_first else None,
+        log_filter,
+        bool(adaptive_shards)
+    )
+
+
+def parse_log_entries(data: Dict[str, Any]) -> Tuple[LogEntries, int]:
+    """
+    Extract log entries from a successful query_range response body.
+    
+    Args:
+        data: Decoded JSON body returned by Loki
+        
+    Returns:
+        Tuple of (log_entries, total_entries)
+    """
+    result_data = data.get("data", {})
+    results = result_data.get("result", [])
+    
+    log_entries = LogEntries()
+    total_entries = 0
+    
+    for result in results:
+        values = result.get("values", [])
+        labels = result.get("stream", {})
+        total_entries += len(values)
+        
+        for value in values:
+            if len(value) >= 2:
+                log_entries.append(int(value[0]), value[1], labels)
+    
+    return log_entries, total_entries
+
+
+def density_query(logql_query: str, step_seconds: int) -> str:
+    """Build the count_over_time probe counting a log query's matches per step."""
+    return f"sum(count_over_time({logql_query} [{step_seconds}s]))"
+
+
+def locate_ranges(
+    data: Dict[str, Any],
+    start_time: int,
+    end_time: int,
+    step_seconds: int
+) -> Tuple[List[Tuple[int, int]], int, int]:
+    """
+    Turn a density probe response into the time ranges worth fetching.
+    
+    Adjacent matching buckets are merged while their combined count stays
+    within Loki's per-query limit.
+    
+    Args:
+        data: Decoded body of the density_query() request
+        start_time: Start of the window in nanoseconds
+        end_time: End of the window in nanoseconds
+        step_seconds: Bucket size of the density probe in seconds
+        
+    Returns:
+        Tuple of (fetch ranges oldest first, buckets probed, expected matches)
+    """
+    step_ns = step_seconds * NANOSECONDS_PER_SECOND
+    
+    buckets = []
+    for series in data.get("data", {}).get("result", []):
+        for timestamp_s, count in series.get("values", []):
+            count = int(float(count))
+            if count > 0:
+                # Each sample counts the step that ends at its timestamp
+                bucket_end = int(float(timestamp_s) * NANOSECONDS_PER_SECOND) + 1
+                buckets.append((max(bucket_end - step_ns, start_time), min(bucket_end, end_time), count))
+    buckets.sort()
+    
+    ranges = []
+    expected = 0
+    for bucket_start, bucket_end, count in buckets:
+        expected += count
+        if ranges and ranges[-1][1] >= bucket_start and ranges[-1][2] + count <= MAX_QUERY_LIMIT:
+            ranges[-1] = (ranges[-1][0], bucket_end, ranges[-1][2] + count)
+        elif ranges and ranges[-1][1] > bucket_start:
+            # Overlaps the previous range but would overflow it; start after it
+            ranges.append((ranges[-1][1], bucket_end, count))
+        else:
+            ranges.append((bucket_start, bucket_end, count))
+    
+    probed = (end_time - start_time) // step_ns + 1
+    return [(range_start, range_end) for range_start, range_end, _ in ranges], probed, expected
+
+
+def density_counts(data: Dict[str, Any], start_time: int, step_ns: int) -> Dict[int, int]:
+    """
+    Read matches per density bucket from a density probe response.
+    
+    Args:
+        data: Decoded body of the density_query() request
+        start_time: Bucket-aligned start of the probed range in nanoseconds
+        step_ns: Bucket size in nanoseconds
+        
+    Returns:
+        Matches per bucket start
+    """
+    counts: Dict[int, int] = {}
+    for series in data.get("data", {}).get("result", []):
+        for timestamp_s, count in series.get("values", []):
+            # Each sample counts the step that ends at its (bucket-aligned) timestamp
+            bucket = round(float(timestamp_s) * NANOSECONDS_PER_SECOND / step_ns) * step_ns - step_ns
+            if bucket >= start_time:
+                counts[bucket] = counts.get(bucket, 0) + int(float(count))
+    return counts
+
+
+def shard_result(shard: Tuple[int, int], entries: LogEntries, started: float) -> Tuple[LogEntries, Dict[str, Any]]:
+    """Sort one fetched shard newest first and describe it."""
+    entries.sort_newest_first()
+    return entries, {
+        "start": shard[0],
+        "end": shard[1],
+        "entries": len(entries),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
+def merge_shards(shard_results: List[Tuple[LogEntries, Dict[str, Any]]]) -> Tuple[LogEntries, List[Dict[str, Any]]]:
+    """
+    Join the results of disjoint shards, given oldest first, newest first.
+    
+    Args:
+        shard_results: (entries, stats) of each shard from shard_result()
+        
+    Returns:
+        Tuple of (log_entries newest first, per-shard stats newest first)
+    """
+    # Shards are disjoint, so newest-first order is preserved by concatenating
+    # them from the most recent shard backwards.
+    log_entries = LogEntries()
+    shard_stats = []
+    for entries, stats in reversed(shard_results):
+        log_entries.extend(entries)
+        shard_stats.append(stats)
+    return log_entries, shard_stats
+
+
+def locate_stats(
+    step_seconds: int,
+    probed: int,
+    expected: int,
+    probe_ms: float,
+    fetch_ms: float,
+    shard_stats: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Describe a locate-then-fetch search for its result."""
+    return {
+        "step_seconds": step_seconds,
+        "buckets_probed": probed,
+        "ranges_fetched": len(shard_stats),
+        "expected_entries": expected,
+        "probe_ms": round(probe_ms, 1),
+        "fetch_ms": round(fetch_ms, 1),
+        "truncated": any(shard["entries"] >= MAX_QUERY_LIMIT for shard in shard_stats)
+    }
+
+
+def _close_response(future) -> None:
+    """Close the response of a finished request future, if it produced one."""
+    if future.exception() is None:
+        future.result().close()
 
 
 class GrafanaService:
     """Service for interacting with Grafana Loki API."""
     
-    def __init__(self, grafana_url: str, username: str, password: str):
+    def __init__(
+        self,
+        grafana_url: str,
+        username: str,
+        password: str,
+        pool_connections: int = 4,
+        pool_maxsize: int = 10,
+        cache_ttl_seconds: float = 900,
+        cache_max_bytes: int = 64 * 1024 * 1024,
+        store_path: Optional[str] = None,
+        store_max_bytes: int = 512 * 1024 * 1024,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hedge_after_seconds: Optional[float] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        coalesce_requests: bool = True,
+        tenant_id: Optional[str] = None,
+        target_shard_lines: int = TARGET_SHARD_LINES
+    ):
         """
         Initialize the Grafana service.
         
@@ -21,18 +495,118 @@ class GrafanaService:
             grafana_url: The base URL for the Grafana instance
             username: Username for authentication
             password: Password/token for authentication
+            pool_connections: Number of host connection pools to cache
+            pool_maxsize: Maximum number of keep-alive connections per host
+            cache_ttl_seconds: Seconds a cached search stays valid; 0 disables the cache
+            cache_max_bytes: Approximate memory cap for cached search results
+            store_path: Optional SQLite file persisting fetched entries across restarts
+            store_max_bytes: Size above which the oldest stored searches are evicted
+            retry_policy: Backoff policy for throttled or failed requests
+            circuit_breaker: Breaker that fails fast while Loki is degraded
+            hedge_after_seconds: Send a duplicate request if the first has not
+                answered after this many seconds; None disables hedging
+            metrics: Registry receiving Loki I/O metrics; a private one is created if omitted
+            coalesce_requests: Let identical concurrent searches share one upstream search
+            tenant_id: Optional Loki tenant sent as X-Scope-OrgID, for multi-tenant Loki
+            target_shard_lines: Lines each adaptive shard is planned to return
         """
         self.grafana_url = grafana_url
         self.username = username
         self.password = password
+        self.metrics = metrics or MetricsRegistry()
         
         # Create authentication header
-        auth_string = f"{username}:{password}"
-        base64_auth_string = base64.b64encode(auth_string.encode("ascii")).decode("ascii")
-        self.headers = {
-            "Authorization": f"Basic {base64_auth_string}"
+        self.headers = build_auth_headers(username, password)
+        if tenant_id:
+            self.headers["X-Scope-OrgID"] = tenant_id
+        
+        # Long-lived session so repeated queries reuse TCP/TLS connections
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self.session.headers.update(self.headers)
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive"
+        })
+        
+        # Repeat searches only fetch the delta since the previous end time
+        self.cache = None
+        if cache_ttl_seconds > 0:
+            self.cache = SearchCache(max_bytes=cache_max_bytes, ttl_seconds=cache_ttl_seconds)
+        
+        # Historical windows survive restarts in the on-disk store
+        self.store = None
+        if store_path:
+            self.store = LogStore(store_path, max_bytes=store_max_bytes)
+        
+        self._latency: Dict[str, deque] = {}
+        self._latency_lock = threading.Lock()
+        
+        # Resilience: retries with backoff, hedged requests and a circuit breaker,
+        # shared with the async client
+        self.requests = LokiRequests(self.metrics, retry_policy, circuit_breaker, hedge_after_seconds)
+        self._hedge_executor = ThreadPoolExecutor(max_workers=pool_maxsize, thread_name_prefix="loki-hedge")
+        
+        # Identical searches already in flight are joined rather than repeated
+        self.singleflight = SingleFlight() if coalesce_requests else None
+        
+        # Match density per query, learned from searches and probes to plan adaptive shards
+        self.density = DensityTracker()
+        self.target_shard_lines = target_shard_lines
+    
+    def close(self):
+        """Close the pooled HTTP session and the on-disk store."""
+        self._hedge_executor.shutdown(wait=False)
+        self.session.close()
+        if self.store is not None:
+            self.store.close()
+    
+    def connection_stats(self) -> Dict[str, Any]:
+        """
+        Report how often pooled connections have been reused.
+        
+        Returns:
+            Dictionary with request, connection and reuse counts
+        """
+        pools = self._adapter.poolmanager.pools
+        total_requests = 0
+        connections_opened = 0
+        
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            total_requests += pool.num_requests
+            connections_opened += pool.num_connections
+        
+        connections_reused = max(total_requests - connections_opened, 0)
+        
+        return {
+            "requests": total_requests,
+            "connections_opened": connections_opened,
+            "connections_reused": connections_reused,
+            "reuse_ratio": connections_reused / total_requests if total_requests else 0.0
         }
     
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Report search cache hit/miss counters.
+        
+        Returns:
+            Dictionary of cache counters, or {"enabled": False} when disabled
+        """
+        stats = {"enabled": False}
+        if self.cache is not None:
+            stats = {"enabled": True, **self.cache.stats()}
+        if self.store is not None:
+            stats["store"] = self.store.stats()
+        return stats
+    
     def test_connection(self) -> bool:
         """
         Test the connection to Grafana Loki.
@@ -41,10 +615,9 @@ class GrafanaService:
             True if connection successful, False otherwise
         """
         try:
-            endpoint = "/loki/api/v1/labels"
-            request_url = f"{self.grafana_url}{endpoint}"
+            request_url = f"{self.grafana_url}{LABELS_ENDPOINT}"
             
-            response = requests.get(request_url, headers=self.headers, timeout=10)
+            response = self.session.get(request_url, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -55,11 +628,703 @@ class GrafanaService:
         except Exception:
             return False
     
+    def _send(self, url: str, params: Dict[str, Any], timeout: float, stream: bool = False) -> requests.Response:
+        """
+        Send a GET, firing a hedged duplicate if the first is slow to respond.
+        
+        Args:
+            url: Full request URL
+            params: Query string parameters
+            timeout: Request timeout in seconds
+            stream: Leave the body unread so it can be decoded incrementally
+            
+        Returns:
+            Whichever response arrives first
+        """
+        hedge_after = self.requests.hedge_after_seconds
+        if not hedge_after:
+            return self.session.get(url, params=params, timeout=timeout, stream=stream)
+        
+        primary = self._hedge_executor.submit(
+            self.session.get, url, params=params, timeout=timeout, stream=stream
+        )
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+        
+        self.requests.record_hedge()
+        hedge = self._hedge_executor.submit(
+            self.session.get, url, params=params, timeout=timeout, stream=stream
+        )
+        done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        winner = next(iter(done))
+        if winner.exception() is not None:
+            # The first to finish failed; give the other request its chance
+            winner = hedge if winner is primary else primary
+        elif winner is hedge:
+            self.requests.record_hedge(won=True)
+        # Release the losing request's connection back to the pool once it answers
+        loser = hedge if winner is primary else primary
+        loser.add_done_callback(_close_response)
+        return winner.result()
+    
+    def _get_json(self, endpoint: str, params: Dict[str, Any], timeout: float = 30) -> Dict[str, Any]:
+        """
+        Issue a GET against the Loki API and return the decoded body.
+        
+        Args:
+            endpoint: API path, e.g. "/loki/api/v1/labels"
+            params: Query string parameters
+            timeout: Request timeout in seconds
+            
+        Returns:
+            Decoded JSON body of a successful response
+            
+        Raises:
+            LokiQueryError: If Loki returns an HTTP error or a non-success status,
+                or the circuit breaker is open
+        """
+        return self._request(endpoint, params, timeout)
+    
+    def _get_entries(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        timeout: float = 30
+    ) -> Tuple[LogEntries, int]:
+        """
+        Issue a GET for log streams and decode the body as it arrives.
+        
+        Entries are built straight from the response bytes, so neither the raw
+        body nor a decoded JSON tree is ever held in memory as a whole.
+        
+        Args:
+            endpoint: API path, e.g. "/loki/api/v1/query_range"
+            params: Query string parameters
+            timeout: Request timeout in seconds
+            
+        Returns:
+            Tuple of (log_entries, total_entries)
+            
+        Raises:
+            LokiQueryError: If Loki returns an HTTP error or a non-success status,
+                or the circuit breaker is open
+        """
+        decoder = self._request(endpoint, params, timeout, stream_entries=True)
+        return decoder.entries, decoder.total_entries
+    
+    def _request(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        timeout: float = 30,
+        stream_entries: bool = False
+    ) -> Any:
+        """
+        Issue a GET against the Loki API with retries and the circuit breaker.
+        
+        Throttling (429), server errors and connection failures, including a
+        body cut off mid-stream, are retried with jittered exponential backoff,
+        honouring Retry-After. Requests that still fail count towards the
+        circuit breaker, which then rejects calls immediately until Loki has had
+        time to recover.
+        
+        Args:
+            endpoint: API path, e.g. "/loki/api/v1/labels"
+            params: Query string parameters
+            timeout: Request timeout in seconds
+            stream_entries: Decode the body incrementally into log entries
+            
+        Returns:
+            The decoded JSON body, or a finished LokiStreamDecoder when
+            stream_entries is set
+            
+        Raises:
+            LokiQueryError: If Loki returns an HTTP error or a non-success status,
+                or the circuit breaker is open
+        """
+        url = f"{self.grafana_url}{endpoint}"
+        
+        for attempt in self.requests.attempts(endpoint):
+            try:
+                response = self._send(url, params, timeout, stream=stream_entries)
+                if response.status_code == 200:
+                    decode_started = time.perf_counter()
+                    if stream_entries:
+                        body = self._decode_stream(response)
+                        status, response_bytes = body.status, body.bytes_received
+                    else:
+                        body = response.json()
+                        status, response_bytes = body.get("status"), len(response.content)
+                    self.requests.record_decode(endpoint, time.perf_counter() - decode_started)
+                else:
+                    error_text = response.text
+            except (requests.RequestException, ValueError) as e:
+                attempt.failed(e)
+            else:
+                if response.status_code == 200:
+                    attempt.succeeded(status, response_bytes)
+                    return body
+                attempt.rejected(
+                    response.status_code, error_text, len(response.content), response.headers.get("Retry-After")
+                )
+            time.sleep(attempt.delay)
+    
+    def _decode_stream(self, response: requests.Response) -> LokiStreamDecoder:
+        """
+        Decode a streamed query_range body chunk by chunk.
+        
+        Args:
+            response: A successful response whose body has not been read
+            
+        Returns:
+            The finished decoder holding the entries
+            
+        Raises:
+            ValueError: If the body is truncated or malformed
+        """
+        decoder = LokiStreamDecoder()
+        try:
+            for chunk in response.iter_content(STREAM_CHUNK_BYTES):
+                decoder.feed(chunk)
+            decoder.close()
+        finally:
+            response.close()
+        return decoder
+    
+    def resilience_stats(self) -> Dict[str, Any]:
+        """
+        Report retry, hedging and circuit breaker counters.
+        
+        Returns:
+            Dictionary of resilience counters
+        """
+        return self.requests.stats()
+    
+    def coalescing_stats(self) -> Dict[str, Any]:
+        """
+        Report how many searches were collapsed into identical in-flight searches.
+        
+        Returns:
+            Dictionary of coalescing counters, or {"enabled": False} when disabled
+        """
+        if self.singleflight is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.singleflight.stats()}
+    
+    def share_result(self, result: Dict[str, Any], shared: bool) -> Dict[str, Any]:
+        """Return a coalesced search result, marking copies handed to followers."""
+        if not shared:
+            return result
+        self.metrics.inc("search_coalesced_total")
+        return {**result, "coalesced": True}
+    
+    def _query_range(
+        self,
+        logql_query: str,
+        start_time: int,
+        end_time: int,
+        limit: int = MAX_QUERY_LIMIT,
+        direction: str = "backward",
+        step: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a single query_range request against Loki.
+        
+        Args:
+            logql_query: The LogQL query to run
+            start_time: Start of the window in nanoseconds
+            end_time: End of the window in nanoseconds
+            limit: Maximum number of entries to return
+            direction: "backward" (newest first) or "forward"
+            step: Resolution in seconds for metric queries
+            
+        Returns:
+            Decoded JSON body of a successful response
+            
+        Raises:
+            LokiQueryError: If Loki returns an HTTP error or a non-success status
+        """
+        params = {
+            "query": logql_query,
+            "start": start_time,
+            "end": end_time,
+            "limit": limit,
+            "direction": direction
+        }
+        if step:
+            params["step"] = step
+        
+        return self._get_json(QUERY_RANGE_ENDPOINT, params)
+    
+    def _query_entries(
+        self,
+        logql_query: str,
+        start_time: int,
+        end_time: int,
+        limit: int = MAX_QUERY_LIMIT,
+        direction: str = "backward"
+    ) -> Tuple[LogEntries, int]:
+        """
+        Run a log query_range request, decoding entries as the body streams in.
+        
+        Args:
+            logql_query: The LogQL log query to run
+            start_time: Start of the window in nanoseconds
+            end_time: End of the window in nanoseconds
+            limit: Maximum number of entries to return
+            direction: "backward" (newest first) or "forward"
+            
+        Returns:
+            Tuple of (log_entries, total_entries)
+            
+        Raises:
+            LokiQueryError: If Loki returns an HTTP error or a non-success status
+        """
+        params = {
+            "query": logql_query,
+            "start": start_time,
+            "end": end_time,
+            "limit": limit,
+            "direction": direction
+        }
+        
+        return self._get_entries(QUERY_RANGE_ENDPOINT, params)
+    
+    def _fetch_shards(
+        self,
+        logql_query: str,
+        shards: List[Tuple[int, int]],
+        max_workers: int
+    ) -> Tuple[LogEntries, List[Dict[str, Any]]]:
+        """
+        Query disjoint time shards concurrently and merge them newest first.
+        
+        Args:
+            logql_query: The LogQL query to run
+            shards: (start, end) nanosecond ranges, oldest first
+            max_workers: Maximum number of shards queried at once
+            
+        Returns:
+            Tuple of (log_entries newest first, per-shard stats newest first)
+        """
+        def run_shard(shard: Tuple[int, int]) -> Tuple[LogEntries, Dict[str, Any]]:
+            started = time.perf_counter()
+            entries, _ = self._query_entries(logql_query, shard[0], shard[1])
+            return shard_result(shard, entries, started)
+        
+        if not shards:
+            return LogEntries(), []
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(shards)))) as executor:
+            return merge_shards(list(executor.map(run_shard, shards)))
+    
+    def _search_shards(
+        self,
+        logql_query: str,
+        start_time: int,
+        end_time: int,
+        shard_hours: int,
+        max_workers: int
+    ) -> Tuple[LogEntries, int, List[Dict[str, Any]]]:
+        """
+        Split a time window into shards and query them concurrently.
+        
+        Args:
+            logql_query: The LogQL query to run
+            start_time: Start of the window in nanoseconds
+            end_time: End of the window in nanoseconds
+            shard_hours: Size of each shard in hours
+            max_workers: Maximum number of shards queried at once
+            
+        Returns:
+            Tuple of (log_entries newest first, total_entries, per-shard stats)
+        """
+        shards = split_time_range(start_time, end_time, shard_hours * NANOSECONDS_PER_HOUR)
+        log_entries, shard_stats = self._fetch_shards(logql_query, shards, max_workers)
+        return log_entries, len(log_entries), shard_stats
+    
+    def _locate_buckets(
+        self,
+        logql_query: str,
+        start_time: int,
+        end_time: int,
+        step_seconds: int
+    ) -> Tuple[List[Tuple[int, int]], int, int]:
+        """
+        Find the time buckets that contain matches using a count_over_time probe.
+        
+        Args:
+            logql_query: The log query whose matches are being located
+            start_time: Start of the window in nanoseconds
+            end_time: End of the window in nanoseconds
+            step_seconds: Bucket size of the density probe in seconds
+            
+        Returns:
+            Tuple of (fetch ranges oldest first, buckets probed, expected matches)
+        """
+        data = self._query_range(density_query(logql_query, step_seconds), start_time, end_time, step=step_seconds)
+        return locate_ranges(data, start_time, end_time, step_seconds)
+    
+    def _locate_and_fetch(
+        self,
+        logql_query: str,
+        start_time: int,
+        end_time: int,
+        step_seconds: int,
+        max_workers: int
+    ) -> Tuple[LogEntries, Dict[str, Any]]:
+        """
+        Two-phase search: probe match density, then fetch only matching buckets.
+        
+        Args:
+            logql_query: The LogQL query to run
+            start_time: Start of the window in nanoseconds
+            end_time: End of the window in nanoseconds
+            step_seconds: Bucket size of the density probe in seconds
+            max_workers: Maximum number of buckets fetched at once
+            
+        Returns:
+            Tuple of (log_entries newest first, locate statistics)
+        """
+        started = time.perf_counter()
+        ranges, probed, expected = self._locate_buckets(logql_query, start_time, end_time, step_seconds)
+        probe_ms = (time.perf_counter() - started) * 1000
+        
+        log_entries, shard_stats = self._fetch_shards(logql_query, ranges, max_workers)
+        fetch_ms = (time.perf_counter() - started) * 1000 - probe_ms
+        
+        return log_entries, locate_stats(step_seconds, probed, expected, probe_ms, fetch_ms, shard_stats)
+    
+    def _probe_density(self, logql_query: str, start_time: int, end_time: int) -> Dict[int, int]:
+        """
+        Count a query's matches per density bucket with one count_over_time request.
+        
+        Args:
+            logql_query: The log query whose matches are counted
+            start_time: Bucket-aligned start of the range in nanoseconds
+            end_time: Bucket-aligned end of the range in nanoseconds
+            
+        Returns:
+            Matches per bucket start
+        """
+        step_seconds = self.density.bucket_ns // NANOSECONDS_PER_SECOND
+        data = self._query_range(density_query(logql_query, step_seconds), start_time, end_time, step=step_seconds)
+        return density_counts(data, start_time, self.density.bucket_ns)
+    
+    def learn_density(self, logql_query: str, start_time: int, end_time: int, log_entries: LogEntries):
+        """Record the match density of a complete (untruncated) fetch of a window."""
+        self.density.observe(
+            logql_query, start_time, end_time, bucket_counts(log_entries.timestamps, self.density.bucket_ns)
+        )
+    
+    def _adaptive_search(
+        self,
+        logql_query: str,
+        start_time: int,
+        end_time: int,
+        max_workers: int
+    ) -> Tuple[LogEntries, List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Shard a window where the expected matches reach the target line count.
+        
+        Densities already learned for the query are reused; only the buckets not
+        known yet are probed: at least the current one, any that ended within
+        the ingestion grace period, and those learned too long ago.
+        
+        Args:
+            logql_query: The LogQL query to run
+            start_time: Start of the window in nanoseconds
+            end_time: End of the window in nanoseconds
+            max_workers: Maximum number of shards queried at once
+            
+        Returns:
+            Tuple of (log_entries newest first, per-shard stats newest first,
+            the plan and its measured efficiency)
+        """
+        started = time.perf_counter()
+        counts, missing = self.density.known(logql_query, start_time, end_time)
+        known_buckets = len(counts)
+        for range_start, range_end in missing:
+            probed = self._probe_density(logql_query, range_start, range_end)
+            self.density.observe(logql_query, range_start, range_end, probed)
+            counts.update(probed)
+        probe_ms = (time.perf_counter() - started) * 1000
+        
+        plan = plan_shards(counts, start_time, end_time, self.density.bucket_ns, self.target_shard_lines)
+        log_entries, shard_stats = self._fetch_shards(
+            logql_query, [(shard["start"], shard["end"]) for shard in plan], max_workers
+        )
+        fetch_ms = (time.perf_counter() - started) * 1000 - probe_ms
+        
+        return log_entries, shard_stats, self.finish_adaptive_search(
+            logql_query, start_time, end_time, plan, missing, known_buckets,
+            log_entries, shard_stats, probe_ms, fetch_ms
+        )
+    
+    def finish_adaptive_search(
+        self,
+        logql_query: str,
+        start_time: int,
+        end_time: int,
+        plan: List[Dict[str, Any]],
+        probed_ranges: List[Tuple[int, int]],
+        known_buckets: int,
+        log_entries: LogEntries,
+        shard_stats: List[Dict[str, Any]],
+        probe_ms: float,
+        fetch_ms: float
+    ) -> Dict[str, Any]:
+        """
+        Learn from a fetched adaptive plan and describe how well it worked.
+        
+        Args:
+            logql_query: The LogQL query that was run
+            start_time: Start of the window in nanoseconds
+            end_time: End of the window in nanoseconds
+            plan: Shards from plan_shards(), oldest first
+            probed_ranges: Ranges whose density was probed for the plan
+            known_buckets: Buckets whose density was already known
+            log_entries: Entries fetched for the plan, newest first
+            shard_stats: Per-shard stats newest first; each gains its "expected" lines
+            probe_ms: Time spent probing
+            fetch_ms: Time spent fetching the shards
+            
+        Returns:
+            The plan and its measured efficiency
+        """
+        bucket_ns = self.density.bucket_ns
+        for stats, shard in zip(shard_stats, reversed(plan)):
+            stats["expected"] = shard["expected"]
+        
+        truncated = sum(1 for shard in shard_stats if shard["entries"] >= MAX_QUERY_LIMIT)
+        if not truncated:
+            self.learn_density(logql_query, start_time, end_time, log_entries)
+        
+        expected = sum(shard["expected"] for shard in plan)
+        target = max(self.target_shard_lines, -(-expected // MAX_ADAPTIVE_SHARDS))
+        hourly_requests = -(-(end_time - start_time) // NANOSECONDS_PER_HOUR)
+        return {
+            "strategy": "adaptive",
+            "target_lines": target,
+            "bucket_seconds": bucket_ns // NANOSECONDS_PER_SECOND,
+            "buckets_from_history": known_buckets,
+            "buckets_probed": sum((range_end - range_start) // bucket_ns for range_start, range_end in probed_ranges),
+            "shards": len(plan),
+            "requests": len(probed_ranges) + len(plan),
+            "hourly_shard_requests": hourly_requests,
+            "expected_entries": expected,
+            "actual_entries": len(log_entries),
+            "estimate_error": round((len(log_entries) - expected) / expected, 3) if expected else 0.0,
+            "fill_ratio": round(len(log_entries) / (len(plan) * target), 3) if plan else 0.0,
+            "truncated_shards": truncated,
+            "probe_ms": round(probe_ms, 1),
+            "fetch_ms": round(fetch_ms, 1)
+        }
+    
+    def record_latency(self, strategy: str, duration_ms: float, entries: int = 0):
+        """Record the latency and entry count of a full (uncached) search for a strategy."""
+        with self._latency_lock:
+            self._latency.setdefault(strategy, deque(maxlen=LATENCY_SAMPLES)).append(duration_ms)
+        self.metrics.observe("search_duration_seconds", duration_ms / 1000, {"strategy": strategy})
+        self.metrics.inc("search_entries_total", entries, {"strategy": strategy})
+        self.metrics.inc("search_fetch_seconds_total", duration_ms / 1000, {"strategy": strategy})
+    
+    def entries_per_second(self) -> Dict[str, float]:
+        """
+        Report fetch throughput per search strategy.
+        
+        Returns:
+            Dictionary of strategy name to entries fetched per second of fetch time
+        """
+        throughput = {}
+        for strategy in list(self._latency):
+            seconds = self.metrics.counter_value("search_fetch_seconds_total", {"strategy": strategy})
+            entries = self.metrics.counter_value("search_entries_total", {"strategy": strategy})
+            if seconds:
+                throughput[strategy] = round(entries / seconds, 1)
+        return throughput
+    
+    def strategy_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Compare recent full-search latencies per strategy.
+        
+        Returns:
+            Dictionary of strategy name to sample count, mean and median latency
+        """
+        with self._latency_lock:
+            samples = {strategy: sorted(values) for strategy, values in self._latency.items()}
+        return {
+            strategy: {
+                "searches": len(values),
+                "avg_ms": round(sum(values) / len(values), 1),
+                "p50_ms": round(values[len(values) // 2], 1)
+            }
+            for strategy, values in samples.items() if values
+        }
+    
+    def iter_query_range(
+        self,
+        logql_query: str,
+        start_time: int,
+        end_time: int,
+        page_size: int = MAX_QUERY_LIMIT
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every entry in a time window, newest first, one page at a time.
+        
+        Each page moves the ``end`` cursor back to the oldest timestamp received
+        so far. Entries sharing that boundary timestamp are returned again by the
+        next page and are de-duplicated, so only one page is held in memory.
+        
+        Args:
+            logql_query: The LogQL query to run
+            start_time: Start of the window in nanoseconds
+            end_time: End of the window in nanoseconds
+            page_size: Number of entries requested per page
+            
+        Yields:
+            Log entry views, indexable like dictionaries
+            
+        Raises:
+            LokiQueryError: If any page request fails
+        """
+        cursor = end_time
+        boundary_timestamp = None
+        boundary_seen = set()
+        
+        while cursor > start_time:
+            page, page_total = self._query_entries(logql_query, start_time, cursor, limit=page_size)
+            page.sort_newest_first()
+            
+            new_entries = 0
+            for entry in page:
+                key = (entry["timestamp"], entry["message"])
+                if entry["timestamp"] == boundary_timestamp and key in boundary_seen:
+                    continue
+                if entry["timestamp"] != boundary_timestamp:
+                    boundary_timestamp = entry["timestamp"]
+                    boundary_seen = set()
+                boundary_seen.add(key)
+                new_entries += 1
+                yield entry
+            
+            if page_total < page_size:
+                break
+            
+            oldest = page[-1]["timestamp"]
+            if new_entries == 0:
+                # A full page of entries sharing one timestamp; step past it
+                # rather than requesting the same page forever.
+                cursor = oldest
+            else:
+                # Loki's end bound is exclusive, so keep the boundary timestamp
+                # in range to pick up any entries the page limit cut off.
+                cursor = oldest + 1
+    
+    def lookup_cache(self, result: Dict[str, Any], start_time: int) -> Optional[CachedSearch]:
+        """
+        Find a previous search covering the window, in memory first and then on disk.
+        
+        Args:
+            result: The search result being built; the cache source is recorded on it
+            start_time: Start of the requested window in nanoseconds
+            
+        Returns:
+            The cached search, or None
+        """
+        if self.cache is not None:
+            cached = self.cache.lookup(result["query"], result["environment"], start_time)
+            if cached is not None:
+                result["cache"] = "memory"
+                return cached
+        
+        # The disk store keeps whole raw lines, so filtered searches bypass it
+        if self.store is not None and not result.get("filters"):
+            cached = self.store.lookup(
+                result["query"], result["correlation_id"], result["environment"], start_time
+            )
+            if cached is not None:
+                result["cache"] = "disk"
+                return cached
+        
+        return None
+    
+    def merge_cached(
+        self,
+        result: Dict[str, Any],
+        cached: CachedSearch,
+        delta_entries: LogEntries,
+        delta_total: int,
+        start_time: int,
+        end_time: int
+    ) -> Optional[LogEntries]:
+        """
+        Merge the entries of a delta query into a cached search.
+        
+        Args:
+            result: The search result being built
+            cached: The cached search returned by lookup_cache()
+            delta_entries: Entries logged in the delta window
+            delta_total: Number of entries Loki returned for the delta window
+            start_time: Start of the requested window in nanoseconds
+            end_time: End of the requested window in nanoseconds
+            
+        Returns:
+            Merged entries newest first, or None if the delta was truncated and
+            a full fetch is required
+        """
+        if delta_total >= MAX_QUERY_LIMIT:
+            result.pop("cache", None)
+            return None
+        
+        merged = merge_delta(cached, delta_entries)
+        if self.cache is not None:
+            self.cache.store(
+                result["query"], result["environment"], cached.start_time, end_time,
+                merged, cached.truncated
+            )
+        if self.store is not None and not cached.truncated and not result.get("filters"):
+            self.store.write(
+                result["query"], result["correlation_id"], result["environment"],
+                delta_start(cached, start_time), end_time, delta_entries
+            )
+        
+        result["truncated"] = cached.truncated
+        return merged.since(start_time)
+    
+    def store_cache(
+        self,
+        result: Dict[str, Any],
+        start_time: int,
+        end_time: int,
+        log_entries: LogEntries
+    ):
+        """Store a freshly fetched search in memory and, if complete, on disk."""
+        truncated = result.get("truncated", False)
+        if self.cache is not None:
+            self.cache.store(
+                result["query"], result["environment"], start_time, end_time,
+                log_entries, truncated
+            )
+            result["cache"] = "miss"
+        if self.store is not None and not truncated and not result.get("filters"):
+            self.store.write(
+                result["query"], result["correlation_id"], result["environment"],
+                start_time, end_time, log_entries
+            )
+    
     def search_by_correlation_id(
         self, 
         correlation_id: str, 
         deployment_environment: Optional[str] = None,
-        days_back: int = 7
+        days_back: int = 7,
+        shard_hours: Optional[int] = None,
+        max_workers: int = 4,
+        locate_first: bool = False,
+        locate_step_minutes: int = 60,
+        log_filter: Optional[LogFilter] = None,
+        adaptive_shards: bool = False
     ) -> Dict[str, Any]:
         """
         Search for logs containing the given correlation ID.
@@ -68,91 +1333,393 @@ class GrafanaService:
             correlation_id: The correlation ID to search for
             deployment_environment: Optional environment filter (e.g., "test", "production")
             days_back: Number of days to search back (default: 7)
+            shard_hours: Optional shard size in hours; when set the window is split
+                into shards that are queried concurrently
+            max_workers: Maximum number of shards queried at once (default: 4)
+            locate_first: Probe match density with count_over_time first and fetch
+                only the buckets that contain matches; best for rare IDs
+            locate_step_minutes: Bucket size of the density probe (default: 60)
+            log_filter: Optional structured filters and field projection applied
+                by Loki, so only matching lines and requested fields are returned
+            adaptive_shards: Split the window where the matches learned from earlier
+                searches or probed with count_over_time reach target_shard_lines,
+                reporting the plan and its efficiency as "shard_plan"
             
         Returns:
-            Dictionary containing search results and metadata
+            Dictionary containing search results and metadata; a result shared
+            with an identical search that was already in flight is marked
+            "coalesced"
+        """
+        def search() -> Dict[str, Any]:
+            return self._search_by_correlation_id(
+                correlation_id, deployment_environment, days_back,
+                shard_hours, max_workers, locate_first, locate_step_minutes, log_filter,
+                adaptive_shards
+            )
+        
+        if self.singleflight is None:
+            return search()
+        
+        key = search_key(
+            correlation_id, deployment_environment, days_back,
+            shard_hours, locate_first, locate_step_minutes, log_filter, adaptive_shards
+        )
+        result, shared = self.singleflight.run(key, search)
+        return self.share_result(result, shared)
+    
+    def _fetch(
+        self,
+        logql_query: str,
+        start_time: int,
+        end_time: int,
+        shard_hours: Optional[int],
+        max_workers: int,
+        locate_first: bool,
+        locate_step_minutes: int,
+        adaptive_shards: bool
+    ) -> Tuple[str, LogEntries, Dict[str, Any]]:
         """
+        Fetch a whole window with the requested strategy.
+        
+        Returns:
+            Tuple of (strategy, log_entries newest first, result fields
+            describing the fetch, always including "truncated")
+        """
+        if locate_first:
+            log_entries, stats = self._locate_and_fetch(
+                logql_query, start_time, end_time, locate_step_minutes * 60, max_workers
+            )
+            return "locate", log_entries, {"locate": stats, "truncated": stats["truncated"]}
+        if adaptive_shards:
+            log_entries, shard_stats, shard_plan = self._adaptive_search(
+                logql_query, start_time, end_time, max_workers
+            )
+            return "adaptive", log_entries, {
+                "shards": shard_stats,
+                "shard_plan": shard_plan,
+                "truncated": shard_plan["truncated_shards"] > 0
+            }
+        if shard_hours:
+            log_entries, _, shard_stats = self._search_shards(
+                logql_query, start_time, end_time, shard_hours, max_workers
+            )
+            return "sharded", log_entries, {
+                "shards": shard_stats,
+                "truncated": any(shard["entries"] >= MAX_QUERY_LIMIT for shard in shard_stats)
+            }
+        log_entries, total_entries = self._query_entries(logql_query, start_time, end_time)
+        log_entries.sort_newest_first()
+        return "single", log_entries, {"truncated": total_entries >= MAX_QUERY_LIMIT}
+    
+    def record_fetch(
+        self,
+        result: Dict[str, Any],
+        strategy: str,
+        details: Dict[str, Any],
+        log_entries: LogEntries,
+        start_time: int,
+        end_time: int,
+        duration_ms: float
+    ):
+        """
+        Record a full (uncached) fetch in the result, caches and latency stats.
+        
+        May write to the on-disk store, so async callers run it in a worker thread.
+        
+        Args:
+            result: The search result being built
+            strategy: Strategy that fetched the window
+            details: Result fields describing the fetch, including "truncated"
+            log_entries: The fetched entries, newest first
+            start_time: Start of the window in nanoseconds
+            end_time: End of the window in nanoseconds
+            duration_ms: Time the fetch took
+        """
+        result.update(details)
+        self.record_latency(strategy, duration_ms, len(log_entries))
+        result["strategy"] = strategy
+        self.store_cache(result, start_time, end_time, log_entries)
+        # Adaptive searches learn from their own shards
+        if strategy != "adaptive" and not result["truncated"]:
+            self.learn_density(result["query"], start_time, end_time, log_entries)
+    
+    def _search_by_correlation_id(
+        self,
+        correlation_id: str,
+        deployment_environment: Optional[str],
+        days_back: int,
+        shard_hours: Optional[int],
+        max_workers: int,
+        locate_first: bool,
+        locate_step_minutes: int,
+        log_filter: Optional[LogFilter],
+        adaptive_shards: bool = False
+    ) -> Dict[str, Any]:
+        """Run one search for search_by_correlation_id(); see it for the arguments."""
         try:
-            # Build the LogQL query
-            if deployment_environment:
-                logql_query = f'{{deployment_environment="{deployment_environment}"}} |= "{correlation_id}"'
-            else:
-                logql_query = f'{{job=~".+"}} |= "{correlation_id}"'
-            
             # Time range: last N days
-            end_time = int(time.time() * 1_000_000_000)  # nanoseconds
-            start_time = end_time - (days_back * 24 * 60 * 60 * 1_000_000_000)
+            start_time, end_time = search_window(days_back)
             
-            # Construct the query URL
-            query_endpoint = "/loki/api/v1/query_range"
-            query_url = f"{self.grafana_url}{query_endpoint}"
+            # Build the LogQL query
+            logql_query = build_correlation_query(correlation_id, deployment_environment, log_filter=log_filter)
             
-            params = {
+            result = {
+                "success": True,
+                "correlation_id": correlation_id,
+                "environment": deployment_environment,
                 "query": logql_query,
-                "start": start_time,
-                "end": end_time,
-                "limit": 1000,
-                "direction": "backward"
+                "search_period_days": days_back
             }
+            if log_filter is not None:
+                result["filters"] = log_filter.describe()
             
-            response = requests.get(query_url, headers=self.headers, params=params, timeout=30)
+            log_entries = None
+            cached = self.lookup_cache(result, start_time)
             
-            if response.status_code == 200:
-                data = response.json()
+            if cached is not None:
+                # Only fetch what was logged since the previous search
+                delta_entries, delta_total = self._query_entries(
+                    logql_query, delta_start(cached, start_time), end_time
+                )
+                log_entries = self.merge_cached(
+                    result, cached, delta_entries, delta_total, start_time, end_time
+                )
+            
+            if log_entries is None:
+                started = time.perf_counter()
+                strategy, log_entries, details = self._fetch(
+                    logql_query, start_time, end_time, shard_hours, max_workers,
+                    locate_first, locate_step_minutes, adaptive_shards
+                )
+                self.record_fetch(
+                    result, strategy, details, log_entries, start_time, end_time,
+                    (time.perf_counter() - started) * 1000
+                )
+            
+            result["total_entries"] = len(log_entries)
+            result["entries"] = log_entries
+            return result
                 
-                if data.get("status") == "success":
-                    # Process the results
-                    result_data = data.get("data", {})
-                    result_type = result_data.get("resultType", "")
-                    results = result_data.get("result", [])
-                    
-                    # Extract log entries
-                    log_entries = []
-                    total_entries = 0
-                    
-                    for result in results:
-                        values = result.get("values", [])
-                        total_entries += len(values)
-                        
-                        for value in values:
-                            if len(value) >= 2:
-                                timestamp_ns = int(value[0])
-                                log_line = value[1]
-                                
-                                log_entries.append({
-                                    "timestamp": timestamp_ns,
-                                    "timestamp_readable": time.strftime(
-                                        "%Y-%m-%d %H:%M:%S UTC", 
-                                        time.gmtime(timestamp_ns / 1_000_000_000)
-                                    ),
-                                    "message": log_line
-                                })
-                    
-                    return {
-                        "success": True,
-                        "correlation_id": correlation_id,
-                        "environment": deployment_environment,
-                        "query": logql_query,
-                        "total_entries": total_entries,
-                        "entries": log_entries,
-                        "search_period_days": days_back
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": f"Grafana API returned status: {data.get('status')}",
-                        "correlation_id": correlation_id
-                    }
+        except LokiQueryError as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "correlation_id": correlation_id
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception occurred: {str(e)}",
+                "correlation_id": correlation_id
+            }
+    
+    def search_by_correlation_ids(
+        self,
+        correlation_ids: List[str],
+        deployment_environment: Optional[str] = None,
+        days_back: int = 7,
+        batch_size: int = 20,
+        max_workers: int = 4,
+        max_entries_per_id: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        Search for several correlation IDs with one combined query per batch.
+        
+        Each batch of IDs is sent as a single regex line-filter query, paged to
+        completion, and the returned lines are split back out per ID.
+        
+        Args:
+            correlation_ids: The correlation IDs to search for
+            deployment_environment: Optional environment filter (e.g., "test", "production")
+            days_back: Number of days to search back (default: 7)
+            batch_size: Maximum number of IDs combined into one query (default: 20)
+            max_workers: Maximum number of batches queried at once (default: 4)
+            max_entries_per_id: Maximum entries kept per ID (default: 1000)
+            
+        Returns:
+            Dictionary containing per-ID counts and entries
+        """
+        correlation_ids = list(dict.fromkeys(correlation_ids))
+        
+        try:
+            start_time, end_time = search_window(days_back)
+            batches = [
+                correlation_ids[i:i + batch_size]
+                for i in range(0, len(correlation_ids), batch_size)
+            ]
+            queries = [
+                build_multi_correlation_query(batch, deployment_environment)
+                for batch in batches
+            ]
+            
+            per_id = {
+                correlation_id: {"total_entries": 0, "entries": LogEntries()}
+                for correlation_id in correlation_ids
+            }
+            
+            def run_batch(batch_index: int) -> int:
+                matcher = build_id_matcher(batches[batch_index])
+                lines = 0
+                for entry in self.iter_query_range(queries[batch_index], start_time, end_time):
+                    lines += 1
+                    for matched_id in matcher(entry["message"]):
+                        bucket = per_id[matched_id]
+                        bucket["total_entries"] += 1
+                        if len(bucket["entries"]) < max_entries_per_id:
+                            bucket["entries"].append(entry["timestamp"], entry["message"], entry["labels"])
+                return lines
+            
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as executor:
+                lines_scanned = sum(executor.map(run_batch, range(len(batches))))
+            
+            return {
+                "success": True,
+                "environment": deployment_environment,
+                "queries": queries,
+                "search_period_days": days_back,
+                "lines_scanned": lines_scanned,
+                "results": per_id
+            }
+            
+        except LokiQueryError as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "correlation_ids": correlation_ids
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception occurred: {str(e)}",
+                "correlation_ids": correlation_ids
+            }
+    
+    def export_by_correlation_id(
+        self,
+        correlation_id: str,
+        path: str,
+        deployment_environment: Optional[str] = None,
+        days_back: int = 7,
+        compression: str = "auto",
+        log_filter: Optional[LogFilter] = None
+    ) -> Dict[str, Any]:
+        """
+        Export every log line for a correlation ID to a compressed NDJSON file.
+        
+        Pages are fetched and written one at a time, so memory use does not grow
+        with the number of lines exported and Loki's per-query limit does not apply.
+        
+        Args:
+            correlation_id: The correlation ID to export
+            path: Output file path
+            deployment_environment: Optional environment filter (e.g., "test", "production")
+            days_back: Number of days to export (default: 7)
+            compression: "zstd", "gzip", "none" or "auto" (default: auto)
+            log_filter: Optional structured filters and field projection
+            
+        Returns:
+            Dictionary with the file path, line count, bytes written and throughput
+        """
+        try:
+            start_time, end_time = search_window(days_back)
+            logql_query = build_correlation_query(correlation_id, deployment_environment, log_filter=log_filter)
+            
+            stats = export_entries(
+                self.iter_query_range(logql_query, start_time, end_time),
+                path,
+                compression
+            )
+            return {
+                "success": True,
+                "correlation_id": correlation_id,
+                "environment": deployment_environment,
+                "query": logql_query,
+                "search_period_days": days_back,
+                **stats
+            }
+            
+        except LokiQueryError as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "correlation_id": correlation_id
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception occurred: {str(e)}",
+                "correlation_id": correlation_id
+            }
+    
+    def summarize_logs(
+        self,
+        correlation_id: Optional[str] = None,
+        labels: Optional[Dict[str, str]] = None,
+        deployment_environment: Optional[str] = None,
+        days_back: int = 7,
+        log_filter: Optional[LogFilter] = None,
+        bucket_seconds: Optional[int] = None,
+        top_k: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Summarize every log line for a correlation ID or label set in one streaming pass.
+        
+        Pages are counted as they arrive and then discarded, so neither memory
+        nor the result grows with the number of lines; Loki's per-query limit
+        does not apply.
+        
+        Args:
+            correlation_id: Optional correlation ID the lines must contain
+            labels: Optional stream labels the lines must carry (e.g., {"service_name": "orders"})
+            deployment_environment: Optional environment filter (e.g., "test", "production")
+            days_back: Number of days to summarize (default: 7)
+            log_filter: Optional structured filters
+            bucket_seconds: Width of the rate buckets; chosen from the window by default
+            top_k: Number of top services, levels and errors returned
+            
+        Returns:
+            Dictionary with the line and error counts, top services, levels and
+            error messages, and per-bucket rates (see LogStatsCollector.summary)
+        """
+        try:
+            if not correlation_id and not labels:
+                raise ValueError("A correlation ID or at least one label is required")
+            
+            start_time, end_time = search_window(days_back)
+            if labels:
+                labels = dict(labels)
+                if deployment_environment:
+                    labels.setdefault("deployment_environment", deployment_environment)
+                logql_query = build_label_query(labels, correlation_id, log_filter)
             else:
-                return {
-                    "success": False,
-                    "error": f"HTTP {response.status_code}: {response.text}",
-                    "correlation_id": correlation_id
-                }
-                
+                logql_query = build_correlation_query(correlation_id, deployment_environment, log_filter=log_filter)
+            
+            started = time.perf_counter()
+            collector = LogStatsCollector(start_time, end_time, bucket_seconds, top_k)
+            collector.add_entries(self.iter_query_range(logql_query, start_time, end_time))
+            duration = time.perf_counter() - started
+            
+            return {
+                "success": True,
+                "correlation_id": correlation_id,
+                "labels": labels,
+                "environment": deployment_environment,
+                "query": logql_query,
+                "search_period_days": days_back,
+                "duration_ms": round(duration * 1000, 1),
+                "lines_per_second": round(collector.lines / duration) if duration > 0 else 0,
+                **collector.summary()
+            }
+            
+        except LokiQueryError as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "correlation_id": correlation_id
+            }
         except Exception as e:
             return {
                 "success": False,
                 "error": f"Exception occurred: {str(e)}",
                 "correlation_id": correlation_id
-            } 
\ No newline at end of file
+            }
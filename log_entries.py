@@ -0,0 +1,216 @@
+"""
+Compact columnar container for log entries.
+
+Entries are stored as parallel arrays: int64 nanosecond timestamps, message
+strings and indexes into a table of interned stream labels. Readable
+timestamps are only formatted when an entry is actually rendered.
+"""
+
+import time
+from array import array
+from typing import Optional, Dict, Any, List, Tuple, Iterator, Iterable, Union
+
+
+NANOSECONDS_PER_SECOND = 1_000_000_000
+
+
+def format_timestamp(timestamp_ns: int) -> str:
+    """Format a nanosecond timestamp as a readable UTC string."""
+    return time.strftime(
+        "%Y-%m-%d %H:%M:%S UTC",
+        time.gmtime(timestamp_ns / NANOSECONDS_PER_SECOND)
+    )
+
+
+class LogEntry:
+    """Read-only view of one entry, indexable like the entry dictionaries it replaces."""
+
+    __slots__ = ("_entries", "_index")
+
+    def __init__(self, entries: "LogEntries", index: int):
+        self._entries = entries
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        entries = self._entries
+        if key == "timestamp":
+            return entries.timestamps[self._index]
+        if key == "message":
+            return entries.messages[self._index]
+        if key == "labels":
+            return entries.streams[entries.stream_ids[self._index]]
+        if key == "timestamp_readable":
+            return format_timestamp(entries.timestamps[self._index])
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a field, or default if the entry has no such field."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialize the entry as a plain dictionary."""
+        return {
+            "timestamp": self["timestamp"],
+            "timestamp_readable": self["timestamp_readable"],
+            "message": self["message"],
+            "labels": self["labels"]
+        }
+
+
+class LogEntries:
+    """Columnar sequence of log entries with interned stream labels."""
+
+    def __init__(self):
+        """Initialize an empty container."""
+        self.timestamps = array("q")
+        self.messages: List[str] = []
+        self.stream_ids = array("I")
+        self.streams: List[Dict[str, str]] = []
+        self._stream_index: Dict[Tuple[Tuple[str, str], ...], int] = {}
+        self._last_labels: Optional[Dict[str, str]] = None
+        self._last_stream = 0
+
+    def _intern(self, labels: Dict[str, str]) -> int:
+        """Return the index of a stream's labels, adding them on first sight."""
+        # Entries arrive grouped by stream, so the same dict is usually seen repeatedly
+        if labels is self._last_labels:
+            return self._last_stream
+        key = tuple(sorted(labels.items()))
+        stream_id = self._stream_index.get(key)
+        if stream_id is None:
+            stream_id = len(self.streams)
+            self.streams.append(labels)
+            self._stream_index[key] = stream_id
+        self._last_labels = labels
+        self._last_stream = stream_id
+        return stream_id
+
+    def append(self, timestamp_ns: int, message: str, labels: Dict[str, str]):
+        """
+        Add an entry.
+
+        Args:
+            timestamp_ns: Entry timestamp in nanoseconds
+            message: The raw log line
+            labels: Labels of the stream the entry belongs to
+        """
+        self.timestamps.append(timestamp_ns)
+        self.messages.append(message)
+        self.stream_ids.append(self._intern(labels))
+
+    def extend(self, other: "LogEntries"):
+        """Append every entry of another container."""
+        remap = [self._intern(labels) for labels in other.streams]
+        self.timestamps.extend(other.timestamps)
+        self.messages.extend(other.messages)
+        self.stream_ids.extend(remap[stream_id] for stream_id in other.stream_ids)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __iter__(self) -> Iterator[LogEntry]:
+        for index in range(len(self.timestamps)):
+            yield LogEntry(self, index)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[LogEntry, "LogEntries"]:
+        if isinstance(index, slice):
+            return self.take(range(len(self.timestamps))[index])
+        if index < 0:
+            index += len(self.timestamps)
+        if not 0 <= index < len(self.timestamps):
+            raise IndexError("log entry index out of range")
+        return LogEntry(self, index)
+
+    def copy(self) -> "LogEntries":
+        """Return a copy whose columns can change without affecting this container."""
+        copied = LogEntries()
+        copied.timestamps = array("q", self.timestamps)
+        copied.messages = list(self.messages)
+        copied.stream_ids = array("I", self.stream_ids)
+        copied.streams = list(self.streams)
+        copied._stream_index = dict(self._stream_index)
+        return copied
+
+    def take(self, indexes: Iterable[int]) -> "LogEntries":
+        """
+        Build a new container from selected entries.
+
+        Args:
+            indexes: Positions of the entries to keep, in the order to keep them
+
+        Returns:
+            New container sharing this one's label dictionaries
+        """
+        selected = LogEntries()
+        selected.streams = list(self.streams)
+        selected._stream_index = dict(self._stream_index)
+        for index in indexes:
+            selected.timestamps.append(self.timestamps[index])
+            selected.messages.append(self.messages[index])
+            selected.stream_ids.append(self.stream_ids[index])
+        return selected
+
+    def sort_newest_first(self):
+        """Sort entries by timestamp, newest first, keeping ties in their current order."""
+        timestamps = self.timestamps
+        order = sorted(range(len(timestamps)), key=timestamps.__getitem__, reverse=True)
+        self.timestamps = array("q", (timestamps[index] for index in order))
+        self.messages = [self.messages[index] for index in order]
+        self.stream_ids = array("I", (self.stream_ids[index] for index in order))
+
+    def since(self, start_time: int) -> "LogEntries":
+        """
+        Return the entries at or after start_time from a newest-first container.
+
+        Args:
+            start_time: Oldest timestamp to keep, in nanoseconds
+
+        Returns:
+            This container if nothing is older, otherwise a trimmed copy
+        """
+        timestamps = self.timestamps
+        low, high = 0, len(timestamps)
+        while low < high:
+            middle = (low + high) // 2
+            if timestamps[middle] >= start_time:
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(timestamps):
+            return self
+        return self.take(range(low))
+
+    def merge(self, older: "LogEntries") -> "LogEntries":
+        """
+        Merge two newest-first containers into one, newest first.
+
+        On equal timestamps entries from this container come first.
+
+        Args:
+            older: The other newest-first container
+
+        Returns:
+            New merged container
+        """
+        merged = LogEntries()
+        merged.streams = list(self.streams)
+        merged._stream_index = dict(self._stream_index)
+        remap = [merged._intern(labels) for labels in older.streams]
+
+        left, right = self.timestamps, older.timestamps
+        i = j = 0
+        while i < len(left) or j < len(right):
+            if j == len(right) or (i < len(left) and left[i] >= right[j]):
+                merged.timestamps.append(left[i])
+                merged.messages.append(self.messages[i])
+                merged.stream_ids.append(self.stream_ids[i])
+                i += 1
+            else:
+                merged.timestamps.append(right[j])
+                merged.messages.append(older.messages[j])
+                merged.stream_ids.append(remap[older.stream_ids[j]])
+                j += 1
+        return merged
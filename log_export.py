@@ -0,0 +1,182 @@
+"""
+Streaming export of log entries to compressed NDJSON files.
+"""
+
+import gzip
+import json
+import os
+import time
+import uuid
+from typing import Optional, Dict, Any, Iterable, IO
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESSIONS = ("auto", "zstd", "gzip", "none")
+
+FILE_SUFFIXES = {"zstd": ".ndjson.zst", "gzip": ".ndjson.gz", "none": ".ndjson"}
+
+# Uncompressed bytes buffered before each write to the compressor
+WRITE_CHUNK_BYTES = 256 * 1024
+
+
+def resolve_compression(compression: str = "auto", path: Optional[str] = None) -> str:
+    """
+    Choose the compression for an export.
+
+    Args:
+        compression: "zstd", "gzip", "none" or "auto"; auto follows the path's
+            extension, otherwise prefers zstd when the zstandard package is installed
+        path: Optional output path
+
+    Returns:
+        The compression to use
+
+    Raises:
+        ValueError: If the compression is unknown or zstd is not installed
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}'; expected one of {', '.join(COMPRESSIONS)}")
+    if compression == "auto":
+        if path and path.endswith(".gz"):
+            return "gzip"
+        if path and path.endswith(".zst"):
+            compression = "zstd"
+        elif path and path.endswith((".ndjson", ".jsonl")):
+            return "none"
+        else:
+            return "zstd" if zstandard is not None else "gzip"
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstd compression needs the zstandard package (pip install zstandard)")
+    return compression
+
+
+def default_export_path(directory: str, name: str, compression: str) -> str:
+    """Build a timestamped file path for an export of name."""
+    safe_name = "".join(char if char.isalnum() or char in "-_." else "_" for char in name)
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+    return os.path.join(directory, f"{safe_name}-{stamp}{FILE_SUFFIXES[compression]}")
+
+
+def export_file_path(directory: str, path: str) -> str:
+    """
+    Resolve a client-supplied file name inside the export directory.
+
+    Args:
+        directory: The export directory
+        path: File name or relative path below the directory
+
+    Returns:
+        The path inside the directory
+
+    Raises:
+        ValueError: If the path is absolute, starts with ~, has a ".." segment
+            or resolves (e.g. through a symlink) outside the directory
+    """
+    segments = path.replace("\\", "/").split("/")
+    if os.path.isabs(path) or os.path.splitdrive(path)[0] or path.startswith("~") or ".." in segments:
+        raise ValueError(f"Export path must be relative to the export directory without '..': {path}")
+    full_path = os.path.join(directory, path)
+    root = os.path.realpath(directory)
+    if os.path.commonpath([root, os.path.realpath(full_path)]) != root:
+        raise ValueError(f"Export path leaves the export directory: {path}")
+    return full_path
+
+
+def open_compressed(path: str, compression: str) -> IO[bytes]:
+    """Open a binary file that compresses what is written to it."""
+    if compression == "gzip":
+        # Level 6 is several times faster than the default 9 for a few percent more bytes
+        return gzip.open(path, "wb", compresslevel=6)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, "wb"), closefd=True)
+    return open(path, "wb")
+
+
+def export_entries(
+    entries: Iterable[Any],
+    path: str,
+    compression: str = "auto",
+    extra: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Write entries to a compressed NDJSON file as they are produced.
+
+    Each line is a JSON object with "timestamp" (ns), "labels" and "message".
+    Only one write chunk is buffered, so memory stays constant however many
+    entries the iterable yields. The file is written under a temporary name
+    in the same directory and renamed over path once complete, so a failed
+    export never leaves a partial file or replaces an earlier one.
+
+    Args:
+        entries: Iterable of entries indexable by "timestamp", "labels" and "message",
+            such as GrafanaService.iter_query_range()
+        path: Output file path; parent directories are created
+        compression: See resolve_compression()
+        extra: Optional fields added to every line, e.g. the correlation ID
+
+    Returns:
+        Dictionary with the path, compression, line count, uncompressed and
+        written bytes, duration and lines per second
+
+    Raises:
+        ValueError: If the compression is not available
+        LokiQueryError: If the source iterable fails; path is left untouched
+    """
+    compression = resolve_compression(compression, path)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    prefix = "{" + "".join(f"{json.dumps(key)}:{json.dumps(value)}," for key, value in (extra or {}).items())
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    last_labels = None
+    labels_json = ""
+
+    started = time.perf_counter()
+    lines = 0
+    raw_bytes = 0
+    chunk = []
+    chunk_bytes = 0
+    temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    output = open_compressed(temp_path, compression)
+    try:
+        for entry in entries:
+            labels = entry["labels"]
+            # Entries of one stream share a labels dict; serialize it once per run
+            if labels is not last_labels:
+                last_labels = labels
+                labels_json = encode(labels)
+            line = (
+                f'{prefix}"timestamp":{entry["timestamp"]},"labels":{labels_json},'
+                f'"message":{encode(entry["message"])}}}\n'
+            ).encode("utf-8")
+            chunk.append(line)
+            chunk_bytes += len(line)
+            lines += 1
+            if chunk_bytes >= WRITE_CHUNK_BYTES:
+                output.write(b"".join(chunk))
+                raw_bytes += chunk_bytes
+                chunk, chunk_bytes = [], 0
+        output.write(b"".join(chunk))
+        raw_bytes += chunk_bytes
+        output.close()
+        os.replace(temp_path, path)
+    except BaseException:
+        output.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    duration = time.perf_counter() - started
+    return {
+        "path": path,
+        "compression": compression,
+        "lines": lines,
+        "bytes_uncompressed": raw_bytes,
+        "bytes_written": os.path.getsize(path),
+        "duration_ms": round(duration * 1000, 1),
+        "lines_per_second": round(lines / duration) if duration > 0 else 0
+    }
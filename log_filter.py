@@ -0,0 +1,125 @@
+"""
+Structured filters and field projection for JSON log lines, rendered as LogQL
+pipeline stages so Loki filters and projects before sending anything back.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Tuple
+
+
+# JSON keys our services use for the log level and the emitting service
+LEVEL_FIELD = "level"
+SERVICE_FIELD = "service"
+
+
+def escape_regex(value: str) -> str:
+    """Escape RE2 metacharacters so a value matches literally in a LogQL regex."""
+    return re.sub(r"([\\.+*?()|\[\]{}^$])", r"\\\1", value)
+
+
+def field_label(field: str) -> str:
+    """Turn a JSON field path such as "http.status" into a valid label name."""
+    label = re.sub(r"[^A-Za-z0-9_]", "_", field)
+    return label if not label[:1].isdigit() else f"_{label}"
+
+
+def quote_logql(value: str) -> str:
+    """Quote a value as a LogQL double-quoted string."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+@dataclass(frozen=True)
+class LogFilter:
+    """Filters applied to parsed JSON lines, and the fields to return."""
+    level: Optional[str] = None
+    service: Optional[str] = None
+    message_regex: Optional[str] = None
+    fields: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_arguments(
+        cls,
+        level: Optional[str] = None,
+        service: Optional[str] = None,
+        message_regex: Optional[str] = None,
+        fields: Optional[Any] = None
+    ) -> Optional["LogFilter"]:
+        """
+        Build a filter from tool arguments.
+
+        Args:
+            level: Keep lines whose level field matches, case-insensitively
+            service: Keep lines whose service field equals this value
+            message_regex: Keep lines matching this RE2 regular expression
+            fields: JSON fields to return instead of the whole line, as a list
+                or a comma-separated string
+
+        Returns:
+            The filter, or None if no argument was given
+        """
+        if isinstance(fields, str):
+            fields = fields.split(",")
+        log_filter = cls(
+            level=level or None,
+            service=service or None,
+            message_regex=message_regex or None,
+            fields=tuple(dict.fromkeys(field.strip() for field in (fields or ()) if field.strip()))
+        )
+        return log_filter if log_filter.is_active() else None
+
+    def is_active(self) -> bool:
+        """Return True if the filter changes the query at all."""
+        return bool(self.level or self.service or self.message_regex or self.fields)
+
+    def pipeline(self) -> str:
+        """
+        Render the filter as LogQL pipeline stages.
+
+        The regex runs as a line filter before JSON parsing, so it is cheap;
+        only the fields that are filtered on or projected are extracted.
+
+        Returns:
+            Pipeline stages to append after the correlation ID line filter
+        """
+        stages = []
+        if self.message_regex:
+            stages.append(f"|~ {quote_logql(self.message_regex)}")
+
+        extract = {}
+        if self.level:
+            extract[field_label(LEVEL_FIELD)] = LEVEL_FIELD
+        if self.service:
+            extract[field_label(SERVICE_FIELD)] = SERVICE_FIELD
+        for field in self.fields:
+            extract[field_label(field)] = field
+        if extract:
+            stages.append("| json " + ", ".join(
+                f"{label}={quote_logql(path)}" for label, path in extract.items()
+            ))
+
+        if self.level:
+            stages.append(f"| {field_label(LEVEL_FIELD)}=~{quote_logql('(?i)' + escape_regex(self.level))}")
+        if self.service:
+            stages.append(f"| {field_label(SERVICE_FIELD)}={quote_logql(self.service)}")
+        if self.fields:
+            # printf %q keeps each value quoted, so the projection stays logfmt-parseable
+            template = " ".join(
+                f'{field_label(field)}={{{{printf "%q" .{field_label(field)}}}}}' for field in self.fields
+            )
+            stages.append(f"| line_format `{template}`")
+
+        return " ".join(stages)
+
+    def describe(self) -> Dict[str, Any]:
+        """Return the active filter arguments for display."""
+        described: Dict[str, Any] = {}
+        if self.level:
+            described["level"] = self.level
+        if self.service:
+            described["service"] = self.service
+        if self.message_regex:
+            described["message_regex"] = self.message_regex
+        if self.fields:
+            described["fields"] = list(self.fields)
+        return described
@@ -0,0 +1,280 @@
+"""
+Streaming log template mining (Drain-style) to summarize large result sets.
+
+Lines are grouped into templates such as ``Handled request in <*>ms`` with a
+count, first/last timestamps and a few example parameters, so one compact
+summary covers thousands of lines.
+
+Every digit is first mapped to 0 with str.translate, which is several times
+faster than a regex pass; lines with the same shape (equal apart from their
+digits) are assigned with a single dictionary lookup. Only a new shape is
+tokenized: digit-bearing parts of tokens become wildcards and the line goes
+through a Drain parse tree, where templates are bucketed by token count and
+leading tokens and a line joins the most similar template in its bucket,
+turning the positions that differ into wildcards. The number of templates,
+the templates compared per bucket and the shape cache are all bounded.
+"""
+
+import re
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+from log_entries import LogEntries, format_timestamp
+
+
+WILDCARD = "<*>"
+
+_DIGITS_TO_ZERO = str.maketrans("123456789", "000000000")
+
+# The part of a shape token holding digits, excluding quotes and separators
+_VARIABLE = re.compile(r'[^"\'=,:;()\[\]{}<>]*0[^"\'=,:;()\[\]{}<>]*')
+
+
+def mask_tokens(shape: str) -> List[str]:
+    """Split a digits-to-zero line into tokens, replacing numeric parts with <*>."""
+    tokens = shape.split()
+    for index, token in enumerate(tokens):
+        if "0" in token:
+            tokens[index] = _VARIABLE.sub(WILDCARD, token)
+    return tokens
+
+
+def _parameter(template_token: str, token: str) -> str:
+    """Strip the literal text around a single wildcard, e.g. "<*>", -> the value."""
+    prefix, wildcard, suffix = template_token.partition(WILDCARD)
+    if (wildcard and WILDCARD not in suffix and token.startswith(prefix)
+            and token.endswith(suffix) and len(token) >= len(prefix) + len(suffix)):
+        return token[len(prefix):len(token) - len(suffix)]
+    return token
+
+
+class LogPattern:
+    """A template and the statistics of the lines assigned to it."""
+
+    __slots__ = ("pattern_id", "tokens", "bucket", "count", "first_seen", "last_seen", "examples")
+
+    def __init__(self, pattern_id: int, tokens: List[str], bucket: Tuple[Any, ...], timestamp_ns: int):
+        self.pattern_id = pattern_id
+        self.tokens = tokens
+        self.bucket = bucket
+        self.count = 0
+        self.first_seen = timestamp_ns
+        self.last_seen = timestamp_ns
+        self.examples: List[Tuple[str, ...]] = []
+
+    @property
+    def template(self) -> str:
+        """The template with variable positions shown as <*>."""
+        return " ".join(self.tokens)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Describe the pattern for display."""
+        return {
+            "template": self.template,
+            "count": self.count,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "first_seen_readable": format_timestamp(self.first_seen),
+            "last_seen_readable": format_timestamp(self.last_seen),
+            "examples": [list(example) for example in self.examples]
+        }
+
+
+class PatternMiner:
+    """Incrementally clusters log lines into templates with bounded memory."""
+
+    def __init__(
+        self,
+        similarity: float = 0.6,
+        depth: int = 2,
+        max_patterns: int = 1000,
+        max_bucket_size: int = 100,
+        max_examples: int = 3,
+        cache_size: int = 100_000
+    ):
+        """
+        Initialize the miner.
+
+        Args:
+            similarity: Fraction of tokens a line must share with a template to join it
+            depth: Number of leading tokens used to bucket templates
+            max_patterns: Maximum templates kept; the least recently matched is evicted
+            max_bucket_size: Maximum templates kept per bucket; the oldest is evicted
+            max_examples: Distinct example parameter sets kept per template
+            cache_size: Maximum line shapes remembered for the fast path
+        """
+        self.similarity = similarity
+        self.depth = depth
+        self.max_patterns = max_patterns
+        self.max_bucket_size = max_bucket_size
+        self.max_examples = max_examples
+        self.cache_size = cache_size
+
+        self._patterns: "OrderedDict[int, LogPattern]" = OrderedDict()
+        self._buckets: Dict[Tuple[Any, ...], List[LogPattern]] = {}
+        # Line shape (digits mapped to 0) -> template, the fast path
+        self._cache: Dict[str, LogPattern] = {}
+        self._next_id = 0
+        self.lines = 0
+        self.evicted_lines = 0
+
+    def _bucket_key(self, tokens: List[str]) -> Tuple[Any, ...]:
+        """Bucket by token count and the leading tokens, wildcarding variable ones."""
+        leading = tuple(
+            WILDCARD if WILDCARD in token else token for token in tokens[:self.depth]
+        )
+        return (len(tokens),) + leading
+
+    def _match(self, tokens: List[str], timestamp_ns: int) -> LogPattern:
+        """Find or create the template for a masked line not seen before."""
+        key = self._bucket_key(tokens)
+        bucket = self._buckets.setdefault(key, [])
+
+        # JSON keys match in every line of a service and would swamp the score
+        positions = [index for index, token in enumerate(tokens) if not token.endswith('":')]
+        if not positions:
+            positions = list(range(len(tokens)))
+
+        best = None
+        best_score = -1.0
+        for pattern in bucket:
+            # As in Drain, positions already generalized to <*> do not count as similar
+            template = pattern.tokens
+            same = 0
+            for index in positions:
+                if template[index] == tokens[index]:
+                    same += 1
+            score = same / len(positions) if positions else 1.0
+            if score > best_score:
+                best, best_score = pattern, score
+
+        if best is not None and best_score >= self.similarity:
+            best.tokens = [
+                template_token if template_token == token else WILDCARD
+                for template_token, token in zip(best.tokens, tokens)
+            ]
+            return best
+
+        pattern = LogPattern(self._next_id, list(tokens), key, timestamp_ns)
+        self._next_id += 1
+        self._patterns[pattern.pattern_id] = pattern
+        bucket.append(pattern)
+        if len(bucket) > self.max_bucket_size:
+            # Compare new lines against the most recent templates only; one
+            # that can no longer be matched is dropped rather than kept stale
+            self._drop(bucket.pop(0))
+        if len(self._patterns) > self.max_patterns:
+            self._drop(next(iter(self._patterns.values())))
+        return pattern
+
+    def _drop(self, pattern: LogPattern):
+        """Forget a template, counting its lines as evicted."""
+        del self._patterns[pattern.pattern_id]
+        self.evicted_lines += pattern.count
+        bucket = self._buckets.get(pattern.bucket)
+        if bucket is not None and pattern in bucket:
+            bucket.remove(pattern)
+            if not bucket:
+                del self._buckets[pattern.bucket]
+
+    def add(self, message: str, timestamp_ns: int = 0) -> LogPattern:
+        """
+        Assign one line to a template.
+
+        Args:
+            message: The raw log line
+            timestamp_ns: Timestamp of the line in nanoseconds
+
+        Returns:
+            The template the line was assigned to
+        """
+        shape = message.translate(_DIGITS_TO_ZERO)
+        pattern = self._cache.get(shape)
+        # Shapes may still point at a template evicted since they were cached
+        if pattern is None or pattern.pattern_id not in self._patterns:
+            pattern = self._match(mask_tokens(shape), timestamp_ns)
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[shape] = pattern
+        else:
+            self._patterns.move_to_end(pattern.pattern_id)
+
+        self.lines += 1
+        pattern.count += 1
+        if timestamp_ns < pattern.first_seen:
+            pattern.first_seen = timestamp_ns
+        if timestamp_ns > pattern.last_seen:
+            pattern.last_seen = timestamp_ns
+        if len(pattern.examples) < self.max_examples:
+            self._add_example(pattern, message)
+        return pattern
+
+    def _add_example(self, pattern: LogPattern, message: str):
+        """Record the values a line has at the template's variable positions."""
+        tokens = message.split()
+        if len(tokens) != len(pattern.tokens):
+            return
+        example = tuple(
+            _parameter(template_token, token) for template_token, token in zip(pattern.tokens, tokens)
+            if WILDCARD in template_token and template_token != token
+        )
+        if example and example not in pattern.examples:
+            pattern.examples.append(example)
+
+    def add_entries(self, entries: LogEntries) -> "PatternMiner":
+        """
+        Assign every entry of a result set to a template.
+
+        Args:
+            entries: Entries to mine
+
+        Returns:
+            This miner, for chaining
+        """
+        add = self.add
+        for timestamp_ns, message in zip(entries.timestamps, entries.messages):
+            add(message, timestamp_ns)
+        return self
+
+    def patterns(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return the templates, most frequent first.
+
+        Args:
+            limit: Optional maximum number of templates returned
+
+        Returns:
+            List of template descriptions
+        """
+        ordered = sorted(self._patterns.values(), key=lambda pattern: pattern.count, reverse=True)
+        return [pattern.to_dict() for pattern in ordered[:limit]]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report the miner's size.
+
+        Returns:
+            Dictionary of line, template and eviction counts
+        """
+        return {
+            "lines": self.lines,
+            "patterns": len(self._patterns),
+            "evicted_lines": self.evicted_lines,
+            "cached_lines": len(self._cache)
+        }
+
+
+def summarize_patterns(entries: LogEntries, limit: int = 20, **options: Any) -> Dict[str, Any]:
+    """
+    Mine a result set and summarize its most frequent templates.
+
+    Args:
+        entries: Entries to mine
+        limit: Maximum number of templates returned
+        **options: Passed to PatternMiner
+
+    Returns:
+        Dictionary with the top "patterns" and the miner "stats"
+    """
+    miner = PatternMiner(**options).add_entries(entries)
+    return {"patterns": miner.patterns(limit), "stats": miner.stats()}
@@ -0,0 +1,325 @@
+"""
+Streaming statistics over log entries: heavy hitters, per-service and
+per-level counts, and time-bucketed rates.
+
+Entries are consumed one at a time (e.g. from GrafanaService.iter_query_range),
+so a million-line window is summarized without holding its lines. Frequent
+error messages are tracked with the Space-Saving algorithm, whose counts are
+tightened with a count-min sketch; both use memory fixed at construction.
+"""
+
+import heapq
+import re
+from array import array
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+
+from log_entries import format_timestamp
+from log_filter import LEVEL_FIELD, SERVICE_FIELD
+from timeline import service_of
+
+
+# Levels counted as errors
+ERROR_LEVELS = frozenset(("error", "err", "fatal", "critical", "crit", "panic", "alert", "emerg"))
+
+# Stream labels that carry the level when the line itself does not
+LEVEL_LABELS = ("level", "detected_level", "severity")
+
+# Candidate bucket widths in seconds; the smallest giving at most
+# TARGET_BUCKETS buckets over the window is used by default
+BUCKET_SECONDS = (60, 300, 900, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 24 * 3600)
+TARGET_BUCKETS = 48
+MAX_BUCKETS = 1000
+
+# Length of the error message kept as a heavy-hitter key
+ERROR_KEY_CHARS = 200
+
+_LEVEL_VALUE = re.compile(r'"' + LEVEL_FIELD + r'"\s*:\s*"([^"]{1,20})"')
+_SERVICE_VALUE = re.compile(r'"' + SERVICE_FIELD + r'"\s*:\s*"([^"]{1,100})"')
+_MESSAGE_VALUE = re.compile(r'"(?:msg|message|error)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+# Identifiers and numbers that make otherwise identical errors distinct
+_VARIABLE = re.compile(
+    r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|0x[0-9a-fA-F]+|\d+"
+)
+
+
+def error_key(message: str) -> str:
+    """Reduce an error line to its message with numbers and IDs replaced by <*>."""
+    match = _MESSAGE_VALUE.search(message)
+    text = match.group(1) if match else message
+    return _VARIABLE.sub("<*>", text)[:ERROR_KEY_CHARS]
+
+
+def choose_bucket_seconds(window_seconds: float) -> int:
+    """Pick the bucket width for a window of the given length."""
+    for seconds in BUCKET_SECONDS:
+        if window_seconds / seconds <= TARGET_BUCKETS:
+            return seconds
+    return BUCKET_SECONDS[-1]
+
+
+class CountMinSketch:
+    """Approximate counts of arbitrarily many keys in fixed memory; never underestimates."""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        """
+        Initialize the sketch.
+
+        Args:
+            width: Counters per row; the overestimate is at most about 2 * total / width
+            depth: Number of rows; more rows make a large overestimate less likely
+        """
+        self.width = width
+        self.depth = depth
+        self.rows = [array("q", bytes(8 * width)) for _ in range(depth)]
+        self.total = 0
+
+    def _indexes(self, key: str) -> List[int]:
+        """Column of the key in each row, by double hashing."""
+        hashed = hash(key)
+        step = ((hashed >> 32) | 1) & 0xFFFFFFFF
+        return [(hashed + row * step) % self.width for row in range(self.depth)]
+
+    def add(self, key: str, count: int = 1):
+        """Count a key count times."""
+        self.total += count
+        for row, index in zip(self.rows, self._indexes(key)):
+            row[index] += count
+
+    def estimate(self, key: str) -> int:
+        """Upper bound on the number of times a key was counted."""
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+
+class SpaceSaving:
+    """Top-k heavy hitters of a stream with a fixed number of counters."""
+
+    def __init__(self, capacity: int = 100):
+        """
+        Initialize the counters.
+
+        Args:
+            capacity: Keys tracked; any key seen more than total / capacity times
+                is guaranteed to be among them
+        """
+        self.capacity = capacity
+        # key -> [count, overestimate]
+        self.counters: Dict[str, List[int]] = {}
+        # (count, key) entries; stale ones are refreshed lazily when popped
+        self._heap: List[Tuple[int, str]] = []
+        self.total = 0
+
+    def add(self, key: str, count: int = 1):
+        """Count a key count times."""
+        self.total += count
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += count
+            return
+        if len(self.counters) < self.capacity:
+            self.counters[key] = [count, 0]
+            heapq.heappush(self._heap, (count, key))
+            return
+
+        # Replace the key with the smallest count; it becomes this key's error bound
+        while True:
+            smallest, evicted = heapq.heappop(self._heap)
+            current = self.counters[evicted][0]
+            if current == smallest:
+                break
+            heapq.heappush(self._heap, (current, evicted))
+        del self.counters[evicted]
+        self.counters[key] = [smallest + count, smallest]
+        heapq.heappush(self._heap, (smallest + count, key))
+
+    def top(self, limit: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """
+        Return the most frequent keys.
+
+        Args:
+            limit: Optional maximum number of keys returned
+
+        Returns:
+            (key, count, overestimate) tuples, most frequent first; the true
+            count lies between count - overestimate and count
+        """
+        ordered = sorted(self.counters.items(), key=lambda item: item[1][0], reverse=True)
+        return [(key, count, error) for key, (count, error) in ordered[:limit]]
+
+
+class LogStatsCollector:
+    """Accumulates summary statistics over log entries in one streaming pass."""
+
+    def __init__(
+        self,
+        start_time: int,
+        end_time: int,
+        bucket_seconds: Optional[int] = None,
+        top_k: int = 10,
+        capacity: int = 200
+    ):
+        """
+        Initialize the collector.
+
+        Args:
+            start_time: Start of the window in nanoseconds
+            end_time: End of the window in nanoseconds
+            bucket_seconds: Width of the rate buckets; chosen from the window by default
+            top_k: Number of heavy hitters reported per statistic
+            capacity: Space-Saving counters kept per statistic
+        """
+        window_seconds = max((end_time - start_time) / 1_000_000_000, 1)
+        if not bucket_seconds:
+            bucket_seconds = choose_bucket_seconds(window_seconds)
+        # Keep the bucket table bounded whatever width was asked for
+        bucket_seconds = max(bucket_seconds, int(window_seconds // MAX_BUCKETS) + 1)
+
+        self.start_time = start_time
+        self.end_time = end_time
+        self.bucket_seconds = bucket_seconds
+        self.bucket_ns = bucket_seconds * 1_000_000_000
+        self.top_k = top_k
+
+        self.services = SpaceSaving(capacity)
+        self.levels = SpaceSaving(capacity)
+        self.errors = SpaceSaving(capacity)
+        self.error_sketch = CountMinSketch()
+        self.error_examples: Dict[str, str] = {}
+        # bucket start // bucket width -> [entries, errors]
+        self.buckets: Dict[int, List[int]] = {}
+        self.lines = 0
+        self.error_lines = 0
+        self.first_seen: Optional[int] = None
+        self.last_seen: Optional[int] = None
+
+        self._last_labels: Optional[Dict[str, str]] = None
+        self._stream: Tuple[Optional[str], Optional[str]] = (None, None)
+
+    def _stream_fields(self, labels: Dict[str, str]) -> Tuple[Optional[str], Optional[str]]:
+        """Service and level named by a stream's labels, if any."""
+        # Entries of one stream share a labels dict, so look it up once per run
+        if labels is not self._last_labels:
+            self._last_labels = labels
+            service = service_of(labels)
+            level = next((labels[name] for name in LEVEL_LABELS if labels.get(name)), None)
+            self._stream = (
+                service if service != "unknown" else None,
+                level.lower() if level else None
+            )
+        return self._stream
+
+    def add(self, timestamp_ns: int, message: str, labels: Dict[str, str]):
+        """
+        Count one entry.
+
+        Args:
+            timestamp_ns: Timestamp of the entry in nanoseconds
+            message: The log line
+            labels: Stream labels of the entry
+        """
+        service, level = self._stream_fields(labels)
+        if level is None:
+            match = _LEVEL_VALUE.search(message)
+            level = match.group(1).lower() if match else "unknown"
+        if service is None:
+            match = _SERVICE_VALUE.search(message)
+            service = match.group(1) if match else "unknown"
+
+        self.lines += 1
+        self.services.add(service)
+        self.levels.add(level)
+
+        is_error = level in ERROR_LEVELS
+        if is_error:
+            self.error_lines += 1
+            key = error_key(message)
+            self.errors.add(key)
+            self.error_sketch.add(key)
+            if key not in self.error_examples:
+                if len(self.error_examples) >= 2 * self.errors.capacity:
+                    # Forget examples of messages Space-Saving has since evicted
+                    self.error_examples = {
+                        tracked: example for tracked, example in self.error_examples.items()
+                        if tracked in self.errors.counters
+                    }
+                self.error_examples[key] = message[:ERROR_KEY_CHARS * 2]
+
+        # Buckets are aligned to multiples of their width since the epoch
+        index = timestamp_ns // self.bucket_ns
+        bucket = self.buckets.get(index)
+        if bucket is None:
+            bucket = self.buckets[index] = [0, 0]
+        bucket[0] += 1
+        bucket[1] += is_error
+
+        if self.first_seen is None or timestamp_ns < self.first_seen:
+            self.first_seen = timestamp_ns
+        if self.last_seen is None or timestamp_ns > self.last_seen:
+            self.last_seen = timestamp_ns
+
+    def add_entries(self, entries: Iterable[Any]) -> "LogStatsCollector":
+        """
+        Count every entry of an iterable.
+
+        Args:
+            entries: Entries indexable by "timestamp", "message" and "labels",
+                such as GrafanaService.iter_query_range()
+
+        Returns:
+            This collector, for chaining
+        """
+        add = self.add
+        for entry in entries:
+            add(entry["timestamp"], entry["message"], entry["labels"])
+        return self
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Report the statistics collected so far.
+
+        Returns:
+            Dictionary with line and error counts, the top "services", "levels"
+            and "top_errors" (each count with its possible overestimate), and
+            per-bucket "rates" for the buckets that saw entries
+        """
+        def counts(tracker: SpaceSaving, name: str) -> List[Dict[str, Any]]:
+            return [
+                {name: key, "count": count, "overestimate": error}
+                for key, count, error in tracker.top(self.top_k)
+            ]
+
+        top_errors = []
+        for key, count, error in self.errors.top(self.top_k):
+            # The sketch bound is often tighter than Space-Saving's for evicted-and-returned keys
+            upper = min(count, self.error_sketch.estimate(key))
+            top_errors.append({
+                "message": key,
+                "count": upper,
+                "overestimate": upper - max(count - error, 0),
+                "example": self.error_examples.get(key)
+            })
+
+        rates = []
+        for index in sorted(self.buckets):
+            entries, errors = self.buckets[index]
+            start = index * self.bucket_ns
+            rates.append({
+                "start": start,
+                "start_readable": format_timestamp(start),
+                "entries": entries,
+                "errors": errors,
+                "per_minute": round(entries * 60 / self.bucket_seconds, 2),
+                "error_rate": round(errors / entries, 4)
+            })
+
+        return {
+            "lines": self.lines,
+            "error_lines": self.error_lines,
+            "error_rate": round(self.error_lines / self.lines, 4) if self.lines else 0.0,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "bucket_seconds": self.bucket_seconds,
+            "services": counts(self.services, "service"),
+            "levels": counts(self.levels, "level"),
+            "top_errors": top_errors,
+            "rates": rates
+        }
@@ -0,0 +1,241 @@
+"""
+Persistent on-disk store of fetched log entries, indexed by correlation ID.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional, Dict, Any, Tuple
+
+from log_entries import LogEntries
+from search_cache import CachedSearch, estimate_size
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    correlation_id TEXT NOT NULL,
+    environment TEXT,
+    timestamp INTEGER NOT NULL,
+    line_hash INTEGER NOT NULL,
+    labels TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS coverage (
+    query TEXT PRIMARY KEY,
+    correlation_id TEXT NOT NULL,
+    environment TEXT,
+    start_time INTEGER NOT NULL,
+    end_time INTEGER NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_entries_unique
+    ON entries (correlation_id, timestamp, line_hash);
+CREATE INDEX IF NOT EXISTS idx_entries_environment
+    ON entries (correlation_id, environment, timestamp);
+CREATE INDEX IF NOT EXISTS idx_entries_labels
+    ON entries (labels);
+"""
+
+
+class LogStore:
+    """SQLite store of fetched entries plus the query windows they cover."""
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Open (or create) the store.
+
+        Args:
+            path: Path of the SQLite database file
+            max_bytes: Size above which the least recently fetched searches are evicted
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA + INDEXES)
+        self.evictions = 0
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def lookup(
+        self,
+        logql_query: str,
+        correlation_id: str,
+        environment: Optional[str],
+        start_time: int
+    ) -> Optional[CachedSearch]:
+        """
+        Load stored entries for a query whose recorded coverage includes start_time.
+
+        Args:
+            logql_query: The LogQL query
+            correlation_id: The correlation ID searched for
+            environment: The deployment environment filter
+            start_time: Start of the requested window in nanoseconds
+
+        Returns:
+            A CachedSearch covering [stored start, stored end), or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT start_time, end_time FROM coverage WHERE query = ?",
+                (logql_query,)
+            ).fetchone()
+            # Coverage that ended before the window would need a query longer than the window
+            if row is None or row[0] > start_time or row[1] < start_time:
+                return None
+            stored_start, stored_end = row
+
+            sql = (
+                "SELECT timestamp, labels, message FROM entries "
+                "WHERE correlation_id = ? AND timestamp >= ? AND timestamp < ?"
+            )
+            params: Tuple[Any, ...] = (correlation_id, start_time, stored_end)
+            if environment:
+                sql += " AND environment = ?"
+                params += (environment,)
+            sql += " ORDER BY timestamp DESC"
+            rows = self._conn.execute(sql, params).fetchall()
+
+        labels_cache: Dict[str, Dict[str, str]] = {}
+        entries = LogEntries()
+        for timestamp_ns, labels, message in rows:
+            if labels not in labels_cache:
+                labels_cache[labels] = json.loads(labels)
+            entries.append(timestamp_ns, message, labels_cache[labels])
+
+        return CachedSearch(
+            start_time=start_time,
+            end_time=stored_end,
+            entries=entries,
+            truncated=False,
+            size_bytes=estimate_size(entries),
+            stored_at=time.monotonic()
+        )
+
+    def write(
+        self,
+        logql_query: str,
+        correlation_id: str,
+        environment: Optional[str],
+        start_time: int,
+        end_time: int,
+        entries: LogEntries
+    ):
+        """
+        Persist fetched entries and record the window they completely cover.
+
+        Args:
+            logql_query: The LogQL query
+            correlation_id: The correlation ID searched for
+            environment: The deployment environment filter
+            start_time: Start of the covered window in nanoseconds
+            end_time: End of the covered window in nanoseconds
+            entries: Every entry in the window
+        """
+        # Labels are serialized once per stream rather than once per entry
+        streams = [
+            (labels.get("deployment_environment"), json.dumps(labels, sort_keys=True))
+            for labels in entries.streams
+        ]
+        rows = []
+        for timestamp_ns, message, stream_id in zip(entries.timestamps, entries.messages, entries.stream_ids):
+            stream_environment, labels = streams[stream_id]
+            rows.append((
+                correlation_id,
+                stream_environment,
+                timestamp_ns,
+                zlib.crc32(message.encode("utf-8")),
+                labels,
+                message
+            ))
+
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO entries "
+                    "(correlation_id, environment, timestamp, line_hash, labels, message) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                existing = self._conn.execute(
+                    "SELECT start_time, end_time FROM coverage WHERE query = ?",
+                    (logql_query,)
+                ).fetchone()
+                if existing is not None and existing[0] <= end_time and existing[1] >= start_time:
+                    # Overlapping windows extend the existing coverage
+                    start_time = min(start_time, existing[0])
+                    end_time = max(end_time, existing[1])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO coverage "
+                    "(query, correlation_id, environment, start_time, end_time, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (logql_query, correlation_id, environment, start_time, end_time, time.time())
+                )
+            self._evict()
+
+    def size_bytes(self) -> int:
+        """Return the number of bytes in use by the database, excluding free pages."""
+        with self._lock:
+            return self._used_bytes()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return store counters.
+
+        Returns:
+            Dictionary of entry, search and size counts
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            searches = self._conn.execute("SELECT COUNT(*) FROM coverage").fetchone()[0]
+            return {
+                "path": self.path,
+                "entries": entries,
+                "searches": searches,
+                "bytes": self._used_bytes(),
+                "evictions": self.evictions
+            }
+
+    def _used_bytes(self) -> int:
+        """Bytes used by live pages; caller must hold the lock."""
+        page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        return (page_count - freelist_count) * page_size
+
+    def _evict(self):
+        """Drop the least recently fetched searches until under max_bytes; caller must hold the lock."""
+        while self._used_bytes() > self.max_bytes:
+            oldest = self._conn.execute(
+                "SELECT query, correlation_id FROM coverage ORDER BY fetched_at LIMIT 1"
+            ).fetchone()
+            if oldest is None:
+                break
+            query, correlation_id = oldest
+            with self._conn:
+                self._conn.execute("DELETE FROM coverage WHERE query = ?", (query,))
+                remaining = self._conn.execute(
+                    "SELECT COUNT(*) FROM coverage WHERE correlation_id = ?",
+                    (correlation_id,)
+                ).fetchone()[0]
+                if remaining == 0:
+                    self._conn.execute(
+                        "DELETE FROM entries WHERE correlation_id = ?", (correlation_id,)
+                    )
+            self.evictions += 1
@@ -0,0 +1,232 @@
+"""
+Live tail of new log lines, following a LogQL query by incremental polling.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+
+from log_entries import LogEntries
+
+
+# Re-read this far behind the newest line seen so lines ingested late are not missed
+TAIL_OVERLAP_NS = 5 * 1_000_000_000
+
+TailLine = Tuple[int, str, Dict[str, str]]
+QueryRange = Callable[..., Awaitable[Tuple[LogEntries, int]]]
+
+
+class TailBuffer:
+    """Bounded ring buffer of tailed lines; the oldest are dropped when it is full."""
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Initialize the buffer.
+
+        Args:
+            capacity: Maximum number of undrained lines kept
+        """
+        self._lines: deque = deque(maxlen=capacity)
+        self.received = 0
+        self.dropped = 0
+
+    def push(self, timestamp_ns: int, message: str, labels: Dict[str, str]):
+        """Add a line, evicting the oldest undrained line if the buffer is full."""
+        if len(self._lines) == self._lines.maxlen:
+            self.dropped += 1
+        self._lines.append((timestamp_ns, message, labels))
+        self.received += 1
+
+    def drain(self, max_lines: Optional[int] = None) -> List[TailLine]:
+        """
+        Remove and return the oldest buffered lines.
+
+        Args:
+            max_lines: Maximum number of lines to return; None drains everything
+
+        Returns:
+            List of (timestamp_ns, message, labels), oldest first
+        """
+        count = len(self._lines) if max_lines is None else min(max_lines, len(self._lines))
+        return [self._lines.popleft() for _ in range(count)]
+
+    def latest(self) -> Optional[TailLine]:
+        """Return the newest buffered line without removing it."""
+        return self._lines[-1] if self._lines else None
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+
+class LogTail:
+    """Follows new lines for a LogQL query by polling forward from the newest line seen."""
+
+    def __init__(
+        self,
+        query_range: QueryRange,
+        logql_query: str,
+        start_time: int,
+        buffer_size: int = 1000,
+        page_size: int = 1000,
+        overlap_ns: int = TAIL_OVERLAP_NS
+    ):
+        """
+        Initialize the tail.
+
+        Args:
+            query_range: Async callable (query, start, end, limit=, direction=)
+                returning (LogEntries, total_entries)
+            logql_query: The LogQL query to follow
+            start_time: Nanosecond timestamp to start following from
+            buffer_size: Capacity of the ring buffer of undrained lines
+            page_size: Entries requested per poll; full pages are followed up immediately
+            overlap_ns: How far behind the newest line each poll re-reads
+        """
+        self.tail_id = uuid.uuid4().hex[:12]
+        self.query_range = query_range
+        self.logql_query = logql_query
+        self.start_time = start_time
+        self.cursor = start_time
+        self.page_size = page_size
+        self.overlap_ns = overlap_ns
+        self.buffer = TailBuffer(buffer_size)
+        self.polls = 0
+        self.last_used = time.monotonic()
+        self._recent: Dict[Tuple[int, str], None] = {}
+        self._lock = asyncio.Lock()
+
+    async def poll(self) -> int:
+        """
+        Fetch the lines logged since the previous poll into the buffer.
+
+        Returns:
+            Number of new lines buffered
+
+        Raises:
+            LokiQueryError: If a Loki request fails
+        """
+        async with self._lock:
+            self.last_used = time.monotonic()
+            end_time = time.time_ns()
+            start = max(self.cursor - self.overlap_ns, self.start_time)
+            new_lines = 0
+
+            while start < end_time:
+                entries, total = await self.query_range(
+                    self.logql_query, start, end_time, limit=self.page_size, direction="forward"
+                )
+                self.polls += 1
+                entries.sort_newest_first()
+                for index in range(len(entries) - 1, -1, -1):
+                    timestamp_ns = entries.timestamps[index]
+                    key = (timestamp_ns, entries.messages[index])
+                    if key in self._recent:
+                        continue
+                    self._recent[key] = None
+                    self.buffer.push(timestamp_ns, entries.messages[index], entries.streams[entries.stream_ids[index]])
+                    self.cursor = max(self.cursor, timestamp_ns)
+                    new_lines += 1
+
+                if total < self.page_size:
+                    break
+                # A full page means more lines are waiting; continue after the newest one
+                newest = entries.timestamps[0]
+                start = newest if newest > start else newest + 1
+
+            # Only lines inside the overlap window can be returned again
+            horizon = self.cursor - self.overlap_ns
+            self._recent = {key: None for key in self._recent if key[0] >= horizon}
+            return new_lines
+
+    async def follow(
+        self,
+        duration_seconds: float,
+        poll_interval_seconds: float,
+        on_lines: Optional[Callable[[int], Awaitable[None]]] = None
+    ) -> int:
+        """
+        Poll repeatedly for a while, reporting each batch of new lines.
+
+        Args:
+            duration_seconds: How long to keep following
+            poll_interval_seconds: Pause between polls
+            on_lines: Optional coroutine called with the count of each new batch
+
+        Returns:
+            Total number of new lines buffered while following
+        """
+        deadline = time.monotonic() + duration_seconds
+        total = 0
+        while True:
+            new_lines = await self.poll()
+            total += new_lines
+            if new_lines and on_lines is not None:
+                await on_lines(new_lines)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return total
+            await asyncio.sleep(min(poll_interval_seconds, remaining))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the tail's progress.
+
+        Returns:
+            Dictionary of poll, line and buffer counters
+        """
+        return {
+            "tail_id": self.tail_id,
+            "polls": self.polls,
+            "received": self.buffer.received,
+            "buffered": len(self.buffer),
+            "dropped": self.buffer.dropped,
+            "cursor": self.cursor
+        }
+
+
+class TailRegistry:
+    """Bounded set of live tails that clients resume by ID."""
+
+    def __init__(self, max_tails: int = 32, idle_seconds: float = 600):
+        """
+        Initialize the registry.
+
+        Args:
+            max_tails: Maximum number of tails kept; the least recently used is dropped
+            idle_seconds: Tails not polled or drained for this long expire
+        """
+        self.max_tails = max_tails
+        self.idle_seconds = idle_seconds
+        self._tails: "OrderedDict[str, LogTail]" = OrderedDict()
+
+    def add(self, tail: LogTail) -> LogTail:
+        """Register a new tail, evicting expired and least recently used tails."""
+        self._expire()
+        self._tails[tail.tail_id] = tail
+        while len(self._tails) > self.max_tails:
+            self._tails.popitem(last=False)
+        return tail
+
+    def get(self, tail_id: str) -> Optional[LogTail]:
+        """Return a live tail by ID, or None if it is unknown or expired."""
+        self._expire()
+        tail = self._tails.get(tail_id)
+        if tail is not None:
+            self._tails.move_to_end(tail_id)
+            tail.last_used = time.monotonic()
+        return tail
+
+    def remove(self, tail_id: str) -> Optional[LogTail]:
+        """Stop tracking a tail and return it."""
+        return self._tails.pop(tail_id, None)
+
+    def _expire(self):
+        """Drop tails that have been idle too long."""
+        now = time.monotonic()
+        for tail_id in [key for key, tail in self._tails.items() if now - tail.last_used > self.idle_seconds]:
+            del self._tails[tail_id]
+
+    def __len__(self) -> int:
+        return len(self._tails)
@@ -0,0 +1,177 @@
+"""
+Retry, circuit breaker and request metrics shared by the sync and async Loki clients.
+
+Each client sends requests its own way, but both walk LokiRequests.attempts()
+and report how every attempt ended, so they follow one retry policy, trip one
+circuit breaker and feed the same counters.
+"""
+
+import threading
+import time
+from typing import Optional, Dict, Any, Iterator
+
+from metrics import MetricsRegistry
+from resilience import RetryPolicy, CircuitBreaker, CircuitOpenError, parse_retry_after
+
+
+class LokiQueryError(Exception):
+    """Raised when Loki returns an HTTP error or a non-success status."""
+
+
+class RequestAttempt:
+    """One try of a Loki request; the client reports its outcome here."""
+
+    def __init__(self, requests: "LokiRequests", endpoint: str, number: int):
+        self.requests = requests
+        self.endpoint = endpoint
+        self.number = number
+        self.started = time.perf_counter()
+        self.error: Optional[LokiQueryError] = None
+        # Seconds to wait before the next attempt; 0 after the last one
+        self.delay = 0.0
+
+    def succeeded(self, status: Optional[str], response_bytes: int):
+        """
+        Record a 200 response.
+
+        Args:
+            status: The "status" field of the decoded body
+            response_bytes: Size of the response body
+
+        Raises:
+            LokiQueryError: If Loki reported a non-success status
+        """
+        self.requests.record(self.endpoint, 200, time.perf_counter() - self.started, response_bytes)
+        self.requests.circuit_breaker.record_success()
+        if status != "success":
+            raise LokiQueryError(f"Grafana API returned status: {status}")
+
+    def failed(self, error: Exception):
+        """Record a connection failure or an unreadable body; it is retried."""
+        self.requests.record(self.endpoint, "error", time.perf_counter() - self.started)
+        self.error = LokiQueryError(f"Request failed: {str(error)}")
+        self._schedule_retry(None)
+
+    def rejected(self, status_code: int, text: str, response_bytes: int, retry_after: Optional[str] = None):
+        """
+        Record an HTTP error response.
+
+        Args:
+            status_code: HTTP status of the response
+            text: Response body, used in the error message
+            response_bytes: Size of the response body
+            retry_after: Value of the Retry-After header, if any
+
+        Raises:
+            LokiQueryError: If the status is not worth retrying
+        """
+        self.requests.record(self.endpoint, status_code, time.perf_counter() - self.started, response_bytes)
+        self.error = LokiQueryError(f"HTTP {status_code}: {text}")
+        if not self.requests.retry_policy.should_retry(status_code):
+            # Client errors mean the query is wrong, not that Loki is unhealthy
+            self.requests.circuit_breaker.record_success()
+            raise self.error
+        self._schedule_retry(parse_retry_after(retry_after))
+
+    def _schedule_retry(self, retry_after: Optional[float]):
+        """Set the backoff before the next attempt, if there is one."""
+        if self.number + 1 < self.requests.retry_policy.max_attempts:
+            self.delay = self.requests.retry_policy.delay(self.number, retry_after)
+            with self.requests.lock:
+                self.requests.retries += 1
+
+
+class LokiRequests:
+    """Retry policy, circuit breaker, hedging settings and counters of one Loki backend."""
+
+    def __init__(
+        self,
+        metrics: MetricsRegistry,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hedge_after_seconds: Optional[float] = None
+    ):
+        """
+        Initialize the shared request state.
+
+        Args:
+            metrics: Registry receiving request count, latency and size metrics
+            retry_policy: Backoff policy for throttled or failed requests
+            circuit_breaker: Breaker that fails fast while Loki is degraded
+            hedge_after_seconds: Send a duplicate request if the first has not
+                answered after this many seconds; None disables hedging
+        """
+        self.metrics = metrics
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.hedge_after_seconds = hedge_after_seconds
+        self.lock = threading.Lock()
+        self.retries = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def attempts(self, endpoint: str) -> Iterator[RequestAttempt]:
+        """
+        Yield the attempts of one request until the caller returns or raises.
+
+        The client sends the request for each attempt, reports the outcome on
+        it and then waits attempt.delay seconds before asking for the next.
+
+        Args:
+            endpoint: API path, e.g. "/loki/api/v1/query_range"
+
+        Yields:
+            One RequestAttempt per try
+
+        Raises:
+            LokiQueryError: If the circuit breaker is open, or with the last
+                error once every attempt has failed
+        """
+        try:
+            self.circuit_breaker.before_call()
+        except CircuitOpenError as e:
+            raise LokiQueryError(str(e))
+
+        attempt = None
+        for number in range(self.retry_policy.max_attempts):
+            attempt = RequestAttempt(self, endpoint, number)
+            yield attempt
+
+        self.circuit_breaker.record_failure()
+        raise attempt.error
+
+    def record(self, endpoint: str, status: Any, duration_seconds: float, response_bytes: int = 0):
+        """Record count, latency and size metrics for one Loki HTTP request."""
+        labels = {"endpoint": endpoint}
+        self.metrics.inc("loki_requests_total", labels={"endpoint": endpoint, "status": status})
+        self.metrics.observe("loki_request_duration_seconds", duration_seconds, labels)
+        if response_bytes:
+            self.metrics.inc("loki_response_bytes_total", response_bytes, labels)
+
+    def record_decode(self, endpoint: str, duration_seconds: float):
+        """Record the time spent decoding a response body."""
+        self.metrics.observe("loki_json_decode_seconds", duration_seconds, {"endpoint": endpoint})
+
+    def record_hedge(self, won: bool = False):
+        """Count a hedged duplicate sent, or one that answered first."""
+        with self.lock:
+            if won:
+                self.hedges_won += 1
+            else:
+                self.hedges_sent += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report retry, hedging and circuit breaker counters.
+
+        Returns:
+            Dictionary of resilience counters
+        """
+        with self.lock:
+            counters = {
+                "retries": self.retries,
+                "hedges_sent": self.hedges_sent,
+                "hedges_won": self.hedges_won
+            }
+        counters["circuit_breaker"] = self.circuit_breaker.stats()
+        return counters
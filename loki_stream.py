@@ -0,0 +1,194 @@
+"""
+Incremental decoder for Loki query_range stream responses.
+
+Feeding the raw body chunk by chunk turns ``data.result[].values[]`` straight
+into a columnar LogEntries container without holding the whole body or a full
+JSON tree in memory.
+"""
+
+import codecs
+import json
+from typing import Optional, Dict, List
+
+from log_entries import LogEntries
+
+
+_WHITESPACE = " \t\n\r"
+
+# Object keys whose values the decoder descends into or keeps, by parent context
+_CHILD_CONTEXTS = {
+    ("root", "status"): "status",
+    ("root", "data"): "data",
+    ("data", "resultType"): "resultType",
+    ("data", "result"): "result",
+    ("item", "stream"): "stream",
+    ("item", "values"): "values",
+}
+
+class LokiStreamDecoder:
+    """Push-based decoder for a Loki streams response body."""
+
+    def __init__(self):
+        """Initialize the decoder."""
+        self.status: Optional[str] = None
+        self.result_type: Optional[str] = None
+        self.entries = LogEntries()
+        self.total_entries = 0
+        self.bytes_received = 0
+
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        # Each frame is [kind, context, state]
+        self._stack: List[List[str]] = [["value", "root", ""]]
+        self._item_values: List[List[str]] = []
+        self._item_labels: Optional[Dict[str, str]] = None
+
+    def feed(self, chunk: bytes):
+        """Decode as much of the body as the bytes received so far allow."""
+        self.bytes_received += len(chunk)
+        self._buffer = self._buffer[self._pos:] + self._text.decode(chunk)
+        self._pos = 0
+        self._advance(final=False)
+
+    def close(self):
+        """
+        Finish decoding.
+
+        Raises:
+            ValueError: If the body was truncated or malformed
+        """
+        self._buffer = self._buffer[self._pos:] + self._text.decode(b"", final=True)
+        self._pos = 0
+        self._advance(final=True)
+        if self._stack:
+            raise ValueError("Truncated Loki response body")
+
+    def _skip_whitespace(self) -> Optional[str]:
+        """Advance past whitespace and return the next character, if any."""
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return buffer[pos] if pos < len(buffer) else None
+
+    def _decode_value(self, final: bool):
+        """Decode one complete JSON value at the cursor, or return _INCOMPLETE."""
+        try:
+            value, end = self._json.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise ValueError(f"Malformed Loki response near offset {self.bytes_received}")
+            return _INCOMPLETE
+        if end == len(self._buffer) and not final and isinstance(value, (int, float)):
+            # A number at the end of the buffer may continue in the next chunk
+            return _INCOMPLETE
+        self._pos = end
+        return value
+
+    def _advance(self, final: bool):
+        """Run the state machine until it needs more input."""
+        while self._stack:
+            frame = self._stack[-1]
+            kind, context, state = frame
+            char = self._skip_whitespace()
+            if char is None:
+                return
+
+            if kind == "value":
+                if char == "{" and context in ("root", "data", "item"):
+                    self._pos += 1
+                    self._stack[-1] = ["object", context, "key"]
+                    if context == "item":
+                        self._item_values = []
+                        self._item_labels = None
+                elif char == "[" and context in ("result", "values"):
+                    self._pos += 1
+                    self._stack[-1] = ["array", context, "item"]
+                else:
+                    value = self._decode_value(final)
+                    if value is _INCOMPLETE:
+                        return
+                    if context == "status":
+                        self.status = value
+                    elif context == "resultType":
+                        self.result_type = value
+                    elif context == "stream" and isinstance(value, dict):
+                        self._item_labels = value
+                    self._stack.pop()
+
+            elif kind == "object":
+                if state == "key":
+                    if char == "}":
+                        self._pos += 1
+                        self._close_object(context)
+                        continue
+                    start = self._pos
+                    key = self._decode_value(final)
+                    if key is _INCOMPLETE:
+                        return
+                    if self._skip_whitespace() is None:
+                        self._pos = start
+                        return
+                    if self._buffer[self._pos] != ":":
+                        raise ValueError(f"Expected ':' after key {key!r} in Loki response")
+                    self._pos += 1
+                    frame[2] = "after"
+                    self._stack.append(["value", _CHILD_CONTEXTS.get((context, key), "skip"), ""])
+                else:
+                    self._pos += 1
+                    if char == ",":
+                        frame[2] = "key"
+                    elif char == "}":
+                        self._close_object(context)
+                    else:
+                        raise ValueError(f"Unexpected {char!r} in Loki response object")
+
+            else:
+                if state == "item":
+                    if char == "]":
+                        self._pos += 1
+                        self._stack.pop()
+                    elif context == "values":
+                        pair = self._decode_value(final)
+                        if pair is _INCOMPLETE:
+                            return
+                        self.total_entries += 1
+                        if self._item_labels is None:
+                            # Values arrived before the stream labels; hold them until the object closes
+                            self._item_values.append(pair)
+                        elif len(pair) >= 2:
+                            self.entries.append(int(pair[0]), pair[1], self._item_labels)
+                        frame[2] = "after"
+                    else:
+                        frame[2] = "after"
+                        self._stack.append(["value", "item", ""])
+                else:
+                    self._pos += 1
+                    if char == ",":
+                        frame[2] = "item"
+                    elif char == "]":
+                        self._stack.pop()
+                    else:
+                        raise ValueError(f"Unexpected {char!r} in Loki response array")
+
+            if self._pos > 65536:
+                # Drop consumed text so the buffer stays around one chunk in size
+                self._buffer = self._buffer[self._pos:]
+                self._pos = 0
+
+    def _close_object(self, context: str):
+        """Pop a finished object frame, emitting entries for a finished stream."""
+        self._stack.pop()
+        if context != "item":
+            return
+        labels = self._item_labels or {}
+        for value in self._item_values:
+            if len(value) >= 2:
+                self.entries.append(int(value[0]), value[1], labels)
+        self._item_values = []
+
+
+_INCOMPLETE = object()
@@ -0,0 +1,176 @@
+"""
+Concurrent search across several Loki backends and deployment environments.
+
+Each (backend, environment) pair is searched as its own source. Results are
+merged newest first with the source recorded as a stream label, and a slow
+or failing source is reported rather than holding up the others.
+"""
+
+import asyncio
+import heapq
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+from async_grafana_service import AsyncGrafanaService
+from log_entries import LogEntries
+from log_filter import LogFilter
+
+
+# Stream label added to every merged entry naming the source it came from
+SOURCE_LABEL = "source"
+
+
+def source_name(backend: str, environment: Optional[str]) -> str:
+    """Name a source as "backend" or "backend/environment"."""
+    return f"{backend}/{environment}" if environment else backend
+
+
+def merge_sources(parts: List[Tuple[str, LogEntries]]) -> LogEntries:
+    """
+    Merge newest-first results from several sources into one newest-first sequence.
+
+    Args:
+        parts: (source name, entries) pairs, each sorted newest first
+
+    Returns:
+        New container whose stream labels also carry the source name
+    """
+    merged = LogEntries()
+    tagged = [
+        [{**labels, SOURCE_LABEL: name} for labels in entries.streams]
+        for name, entries in parts
+    ]
+
+    def keyed(part: int, entries: LogEntries):
+        for index, timestamp_ns in enumerate(entries.timestamps):
+            yield -timestamp_ns, part, index
+
+    for _, part, index in heapq.merge(*(keyed(part, entries) for part, (_, entries) in enumerate(parts))):
+        entries = parts[part][1]
+        merged.append(
+            entries.timestamps[index],
+            entries.messages[index],
+            tagged[part][entries.stream_ids[index]]
+        )
+    return merged
+
+
+class MultiBackendSearch:
+    """Searches a correlation ID on several Loki backends and environments at once."""
+
+    def __init__(self, backends: Dict[str, AsyncGrafanaService], timeout_seconds: float = 60):
+        """
+        Initialize the multi-backend search.
+
+        Args:
+            backends: Async services by backend name
+            timeout_seconds: Default time after which unfinished sources are
+                reported as timed out
+        """
+        self.backends = backends
+        self.timeout_seconds = timeout_seconds
+
+    async def _search_source(
+        self,
+        backend: str,
+        environment: Optional[str],
+        correlation_id: str,
+        days_back: int,
+        log_filter: Optional[LogFilter]
+    ) -> Tuple[Dict[str, Any], float]:
+        """Search one source, returning its result and duration in ms."""
+        started = time.perf_counter()
+        result = await self.backends[backend].search_by_correlation_id(
+            correlation_id, environment, days_back, log_filter=log_filter
+        )
+        return result, round((time.perf_counter() - started) * 1000, 1)
+
+    async def search(
+        self,
+        correlation_id: str,
+        environments: Optional[List[Optional[str]]] = None,
+        backends: Optional[List[str]] = None,
+        days_back: int = 7,
+        log_filter: Optional[LogFilter] = None,
+        timeout_seconds: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Search every requested backend and environment concurrently.
+
+        Args:
+            correlation_id: The correlation ID to search for
+            environments: Deployment environments to search; None or empty searches
+                each backend without an environment filter
+            backends: Backend names to search; None or empty searches all of them
+            days_back: Number of days to search back (default: 7)
+            log_filter: Optional structured filters and field projection
+            timeout_seconds: Override of the default per-call timeout
+
+        Returns:
+            Dictionary with the merged "entries", "total_entries" and a "sources"
+            list giving each source's outcome, entry count and duration
+        """
+        backends = list(dict.fromkeys(backends or self.backends))
+        unknown = [name for name in backends if name not in self.backends]
+        if unknown:
+            return {
+                "success": False,
+                "error": f"Unknown backend(s): {', '.join(unknown)}; configured: {', '.join(self.backends)}",
+                "correlation_id": correlation_id
+            }
+        environments = list(dict.fromkeys(environments or [None]))
+        timeout = self.timeout_seconds if timeout_seconds is None else timeout_seconds
+
+        started = time.perf_counter()
+        tasks = {
+            asyncio.ensure_future(
+                self._search_source(backend, environment, correlation_id, days_back, log_filter)
+            ): (backend, environment)
+            for backend in backends
+            for environment in environments
+        }
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+
+        sources = []
+        parts = []
+        for task, (backend, environment) in tasks.items():
+            source = {
+                "source": source_name(backend, environment),
+                "backend": backend,
+                "environment": environment
+            }
+            if task in pending:
+                source.update(success=False, error=f"Timed out after {timeout:g}s", duration_ms=round(timeout * 1000, 1))
+            elif task.exception() is not None:
+                source.update(success=False, error=str(task.exception()), duration_ms=None)
+            else:
+                result, duration_ms = task.result()
+                source.update(success=result["success"], duration_ms=duration_ms)
+                if result["success"]:
+                    source["total_entries"] = result["total_entries"]
+                    source["query"] = result["query"]
+                    source["cache"] = result.get("cache")
+                    source["truncated"] = result.get("truncated", False)
+                    parts.append((source["source"], result["entries"]))
+                else:
+                    source["error"] = result["error"]
+            sources.append(source)
+
+        merged = merge_sources(parts)
+        result = {
+            "success": bool(parts),
+            "correlation_id": correlation_id,
+            "search_period_days": days_back,
+            "sources": sources,
+            "failed": sum(1 for source in sources if not source["success"]),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "total_entries": len(merged),
+            "entries": merged
+        }
+        if not parts:
+            result["error"] = "All sources failed: " + "; ".join(
+                f"{source['source']}: {source['error']}" for source in sources
+            )
+        return result
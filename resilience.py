@@ -0,0 +1,166 @@
+"""
+Retry, backoff and circuit breaker helpers for Loki API calls.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Tuple
+
+
+class RetryPolicy:
+    """Jittered exponential backoff that honours Retry-After."""
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 10.0,
+        retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            max_attempts: Total attempts per request, including the first
+            base_delay: Delay in seconds before the first retry
+            max_delay: Upper bound on any single delay in seconds
+            retry_statuses: HTTP statuses that are worth retrying
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+
+    def should_retry(self, status_code: int) -> bool:
+        """Return True if a response with this status should be retried."""
+        return status_code in self.retry_statuses
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Calculate how long to wait before the next attempt.
+
+        Args:
+            attempt: Zero-based index of the attempt that just failed
+            retry_after: Seconds requested by the server, if any
+
+        Returns:
+            Delay in seconds
+        """
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        # Full jitter keeps concurrent callers from retrying in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given either as seconds or as an HTTP date.
+
+    Args:
+        value: The raw header value
+
+    Returns:
+        Seconds to wait, or None if absent or unparseable
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is rejecting calls."""
+
+
+class CircuitBreaker:
+    """Fails fast after repeated failures, then lets a trial call through."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started = 0.0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Check whether a call may proceed.
+
+        While half-open only a single trial call is let through; the rest are
+        rejected until it succeeds or fails. A trial that never reports back
+        (e.g. a cancelled call) is replaced after reset_timeout.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a trial
+                call in progress
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                remaining = self.reset_timeout - (now - self.opened_at)
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(
+                        f"Grafana Loki is unavailable after {self.failures} consecutive failures; "
+                        f"retrying in {remaining:.0f}s"
+                    )
+                self.state = self.HALF_OPEN
+                self.trial_started = now
+            elif self.state == self.HALF_OPEN:
+                if now - self.trial_started < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpenError(
+                        f"Grafana Loki is unavailable after {self.failures} consecutive failures; "
+                        "a trial request is in progress"
+                    )
+                self.trial_started = now
+
+    def record_success(self):
+        """Close the circuit after a successful call."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """Count a failed call, opening the circuit at the threshold."""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the breaker state.
+
+        Returns:
+            Dictionary of state, consecutive failures and rejected calls
+        """
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "rejected": self.rejected
+            }
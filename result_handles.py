@@ -0,0 +1,209 @@
+"""
+Server-side search results that clients page through with a cursor.
+
+The first call of a search stores its result under a handle and returns the
+first page; later calls pass the cursor and are served from the stored
+entries without querying Loki again. Results expire when unused for a while
+and the least recently used are dropped once the registry is full.
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+from log_entries import LogEntries
+from search_cache import estimate_size
+
+
+# Rough size of a model token, used to turn a token budget into bytes
+BYTES_PER_TOKEN = 4
+
+# Text appended to an entry cut short to fit a page
+TRUNCATION_MARK = "… (truncated)"
+
+
+def budget_bytes(page_bytes: Optional[int] = None, page_tokens: Optional[int] = None, default: int = 16384) -> int:
+    """Resolve a page budget given in bytes or tokens; tokens win if both are set."""
+    if page_tokens:
+        return page_tokens * BYTES_PER_TOKEN
+    return page_bytes or default
+
+
+def make_cursor(handle_id: str, offset: int) -> str:
+    """Encode the position of the next page of a stored result."""
+    return f"{handle_id}:{offset}"
+
+
+def parse_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Decode a cursor from make_cursor().
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    handle_id, _, offset = cursor.strip().rpartition(":")
+    if not handle_id or not offset.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return handle_id, int(offset)
+
+
+def fill_page(
+    entries: LogEntries,
+    offset: int,
+    budget: int,
+    format_entry: Callable[[int, Dict[str, Any]], str]
+) -> Tuple[List[str], int]:
+    """
+    Format entries from offset until the byte budget is spent.
+
+    At least one entry is always returned, cut short if it alone exceeds
+    the budget, so every page makes progress.
+
+    Args:
+        entries: Entries being paged through
+        offset: Index of the first entry of the page
+        budget: Maximum UTF-8 bytes of formatted text
+        format_entry: Formats (index, entry) as display text
+
+    Returns:
+        The formatted entries and the offset of the next page
+    """
+    chunks: List[str] = []
+    used = 0
+    index = offset
+    while index < len(entries):
+        text = format_entry(index, entries[index])
+        size = len(text.encode("utf-8")) + 1
+        if used + size > budget:
+            if chunks:
+                break
+            keep = max(budget - len(TRUNCATION_MARK.encode("utf-8")) - 1, 0)
+            text = text.encode("utf-8")[:keep].decode("utf-8", "ignore") + TRUNCATION_MARK
+            size = len(text.encode("utf-8")) + 1
+        chunks.append(text)
+        used += size
+        index += 1
+    return chunks, index
+
+
+class StoredResult:
+    """A search result kept for paging, with what is needed to describe it."""
+
+    def __init__(self, result: Dict[str, Any], correlation_id: str, owner: Optional[str] = None):
+        self.handle_id = uuid.uuid4().hex[:12]
+        # Own copy, so later searches merging into the cached entries cannot change pages
+        self.result = dict(result, entries=result["entries"].copy())
+        self.correlation_id = correlation_id
+        self.owner = owner
+        self.size_bytes = estimate_size(result["entries"])
+        self.stored_at = time.monotonic()
+        self.last_used = self.stored_at
+
+    @property
+    def entries(self) -> LogEntries:
+        return self.result["entries"]
+
+
+class ResultRegistry:
+    """Bounded set of stored results with LRU and idle-time expiry."""
+
+    def __init__(self, max_results: int = 32, max_bytes: int = 128 * 1024 * 1024, ttl_seconds: float = 900):
+        """
+        Initialize the registry.
+
+        Args:
+            max_results: Maximum number of stored results
+            max_bytes: Approximate memory cap across all stored entries
+            ttl_seconds: Results not read for this long expire
+        """
+        self.max_results = max_results
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._results: "OrderedDict[str, StoredResult]" = OrderedDict()
+        self.total_bytes = 0
+        self.pages_served = 0
+        self.evictions = 0
+
+    def add(
+        self,
+        result: Dict[str, Any],
+        correlation_id: str,
+        owner: Optional[str] = None
+    ) -> Optional[StoredResult]:
+        """
+        Store a copy of a result, evicting expired and least recently used results.
+
+        Args:
+            result: A successful search result with "entries"
+            correlation_id: The correlation ID searched
+            owner: Optional key of the client session allowed to read the result
+
+        Returns:
+            The stored result, or None if it alone exceeds the memory cap
+        """
+        self._expire()
+        stored = StoredResult(result, correlation_id, owner)
+        if stored.size_bytes > self.max_bytes:
+            return None
+        self._results[stored.handle_id] = stored
+        self.total_bytes += stored.size_bytes
+        while len(self._results) > self.max_results or self.total_bytes > self.max_bytes:
+            self._remove(next(iter(self._results)))
+            self.evictions += 1
+        return stored
+
+    def get(self, handle_id: str, owner: Optional[str] = None) -> Optional[StoredResult]:
+        """
+        Return a stored result by handle.
+
+        Args:
+            handle_id: Handle from the result's cursor
+            owner: Key of the calling client session
+
+        Returns:
+            The stored result, or None if it is unknown, expired or stored for another session
+        """
+        self._expire()
+        stored = self._results.get(handle_id)
+        if stored is not None and stored.owner != owner:
+            return None
+        if stored is not None:
+            self._results.move_to_end(handle_id)
+            stored.last_used = time.monotonic()
+            self.pages_served += 1
+        return stored
+
+    def remove(self, handle_id: str) -> Optional[StoredResult]:
+        """Stop storing a result and return it."""
+        return self._remove(handle_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return registry counters.
+
+        Returns:
+            Dictionary of stored results, bytes, pages served and evictions
+        """
+        self._expire()
+        return {
+            "results": len(self._results),
+            "bytes": self.total_bytes,
+            "pages_served": self.pages_served,
+            "evictions": self.evictions
+        }
+
+    def _remove(self, handle_id: str) -> Optional[StoredResult]:
+        stored = self._results.pop(handle_id, None)
+        if stored is not None:
+            self.total_bytes -= stored.size_bytes
+        return stored
+
+    def _expire(self):
+        """Drop results that have not been read for too long."""
+        now = time.monotonic()
+        for handle_id in [key for key, stored in self._results.items() if now - stored.last_used > self.ttl_seconds]:
+            self._remove(handle_id)
+
+    def __len__(self) -> int:
+        return len(self._results)
@@ -1,16 +1,20 @@
 #!/usr/bin/env python3
 """
 Simple script to run the Aura MCP server.
+
+Usage:
+    python run_server.py                                  # stdio, one client
+    python run_server.py --transport http --port 8765     # shared daemon
 """
 
 import sys
 import os
 
-# Add the src directory to the Python path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+# The server modules live next to this script
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from aura_mcp.server import main
+from server import main
 import asyncio
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,182 @@
+"""
+In-process cache of correlation-ID search results with TTL and LRU eviction.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Tuple
+
+from log_entries import LogEntries
+
+
+# Rough per-entry overhead of the string object and column slots on top of the message text
+ENTRY_OVERHEAD_BYTES = 80
+
+# Re-read this much before the previous end time so late-ingested lines are picked up
+DELTA_OVERLAP_NS = 60 * 1_000_000_000
+
+
+@dataclass
+class CachedSearch:
+    """A cached search result covering [start_time, end_time)."""
+    start_time: int
+    end_time: int
+    entries: LogEntries
+    truncated: bool
+    size_bytes: int
+    stored_at: float
+
+
+def estimate_size(entries: LogEntries) -> int:
+    """Estimate the memory held by a container of log entries."""
+    return sum(map(len, entries.messages)) + ENTRY_OVERHEAD_BYTES * len(entries)
+
+
+def delta_start(cached: CachedSearch, start_time: int) -> int:
+    """Start of the query that brings a cached search up to date, never before start_time."""
+    return max(cached.end_time - DELTA_OVERLAP_NS, start_time)
+
+
+def merge_delta(cached: CachedSearch, delta_entries: LogEntries) -> LogEntries:
+    """
+    Merge entries fetched since a cached search's end time into its entries.
+
+    Args:
+        cached: The cached search
+        delta_entries: Entries fetched from DELTA_OVERLAP_NS before the cached end time
+
+    Returns:
+        Merged entries covering [cached start, now), newest first
+    """
+    overlap = cached.entries.since(cached.end_time - DELTA_OVERLAP_NS)
+    overlap_seen = set(zip(overlap.timestamps, overlap.messages))
+    fresh = delta_entries.take(
+        index for index, key in enumerate(zip(delta_entries.timestamps, delta_entries.messages))
+        if key not in overlap_seen
+    )
+    fresh.sort_newest_first()
+
+    return fresh.merge(cached.entries)
+
+
+class SearchCache:
+    """Bounded LRU cache of search results keyed on (LogQL query, environment)."""
+
+    def __init__(
+        self,
+        max_searches: int = 64,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 900
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_searches: Maximum number of cached searches
+            max_bytes: Approximate memory cap across all cached entries
+            ttl_seconds: Seconds a cached search stays valid
+        """
+        self.max_searches = max_searches
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._searches: "OrderedDict[Tuple[str, Optional[str]], CachedSearch]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(
+        self,
+        logql_query: str,
+        environment: Optional[str],
+        start_time: int
+    ) -> Optional[CachedSearch]:
+        """
+        Find a cached search that covers the requested window start.
+
+        Args:
+            logql_query: The LogQL query
+            environment: The deployment environment filter
+            start_time: Start of the requested window in nanoseconds
+
+        Returns:
+            The cached search, or None on a miss
+        """
+        key = (logql_query, environment)
+        with self._lock:
+            cached = self._searches.get(key)
+            if cached is not None and time.monotonic() - cached.stored_at > self.ttl_seconds:
+                self._remove(key)
+                cached = None
+            # Coverage that ended before the window would need a query longer than the window
+            if cached is None or cached.start_time > start_time or cached.end_time < start_time:
+                self.misses += 1
+                return None
+            self._searches.move_to_end(key)
+            self.hits += 1
+            return cached
+
+    def store(
+        self,
+        logql_query: str,
+        environment: Optional[str],
+        start_time: int,
+        end_time: int,
+        entries: LogEntries,
+        truncated: bool = False
+    ):
+        """
+        Store a search result, evicting least recently used searches as needed.
+
+        Args:
+            logql_query: The LogQL query
+            environment: The deployment environment filter
+            start_time: Start of the fetched window in nanoseconds
+            end_time: End of the fetched window in nanoseconds
+            entries: Fetched entries, newest first
+            truncated: Whether the fetch hit Loki's per-query limit
+        """
+        key = (logql_query, environment)
+        size_bytes = estimate_size(entries)
+        with self._lock:
+            self._remove(key)
+            if size_bytes > self.max_bytes:
+                return
+            self._searches[key] = CachedSearch(
+                start_time=start_time,
+                end_time=end_time,
+                entries=entries,
+                truncated=truncated,
+                size_bytes=size_bytes,
+                stored_at=time.monotonic()
+            )
+            self.total_bytes += size_bytes
+            while len(self._searches) > self.max_searches or self.total_bytes > self.max_bytes:
+                oldest_key = next(iter(self._searches))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return cache counters.
+
+        Returns:
+            Dictionary of hits, misses, evictions and current size
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "searches": len(self._searches),
+                "bytes": self.total_bytes
+            }
+
+    def _remove(self, key: Tuple[str, Optional[str]]):
+        """Remove a cached search; caller must hold the lock."""
+        cached = self._searches.pop(key, None)
+        if cached is not None:
+            self.total_bytes -= cached.size_bytes
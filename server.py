@@ -2,9 +2,16 @@
 Main MCP server for Aura services.
 """
 
+import argparse
 import asyncio
+import hmac
+import ipaddress
 import json
 import os
+import sys
+import time
+import uuid
+import weakref
 from typing import Any, Sequence
 
 from mcp.server.models import InitializationOptions
@@ -18,7 +25,51 @@ from mcp.types import (
 )
 import mcp.types as types
 
-from grafana_service import GrafanaService
+from grafana_service import GrafanaService, build_correlation_query, NANOSECONDS_PER_SECOND
+from async_grafana_service import AsyncGrafanaService
+from resilience import RetryPolicy
+from metrics import MetricsRegistry
+from log_tail import LogTail, TailRegistry
+from log_entries import format_timestamp
+from log_filter import LogFilter
+from timeline import build_timeline
+from log_export import resolve_compression, default_export_path, export_file_path
+from multi_search import MultiBackendSearch
+from log_patterns import summarize_patterns
+from shard_planner import TARGET_SHARD_LINES
+from result_handles import ResultRegistry, budget_bytes, make_cursor, parse_cursor, fill_page
+
+
+METRICS_JSON_URI = "metrics://aura-mcp-server/metrics"
+METRICS_PROMETHEUS_URI = "metrics://aura-mcp-server/metrics.prom"
+
+# Tools handled by dispatch_tool; any other name is recorded as "unknown" so
+# clients cannot create arbitrary metric series
+TOOL_NAMES = frozenset({
+    "test_grafana_connection",
+    "search_grafana_logs",
+    "search_grafana_logs_batch",
+    "search_grafana_logs_multi",
+    "tail_grafana_logs",
+    "export_grafana_logs",
+    "summarize_grafana_logs"
+})
+
+# Name of the backend configured by GRAFANA_URL in multi-backend searches
+DEFAULT_BACKEND = "default"
+
+# Timeline entries shown in a response; the hop summary covers all of them
+TIMELINE_DISPLAY_ENTRIES = 50
+
+# Results larger than this are summarized as templates ahead of the first page
+SEARCH_DISPLAY_ENTRIES = 10
+PATTERN_DISPLAY_LIMIT = 15
+PATTERN_TEMPLATE_CHARS = 300
+
+# Default size of each page of search results returned to the client
+DEFAULT_PAGE_BYTES = 16 * 1024
+# Bytes of a page kept free for the cursor line
+PAGE_FOOTER_BYTES = 256
 
 
 class AuraMCPServer:
@@ -26,10 +77,21 @@ class AuraMCPServer:
     
     def __init__(self):
         """Initialize the Aura MCP server."""
+        started = time.perf_counter()
         self.server = Server("aura-mcp-server")
         self.grafana_service = None
+        self.async_grafana_service = None
+        self.metrics = MetricsRegistry()
+        self.tails = TailRegistry()
+        # Tool calls one client session may run at once; other calls queue
+        self.session_concurrency = int(os.getenv("MCP_SESSION_CONCURRENCY", "4"))
+        self._session_slots: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        # Random key per client session; stored results are only paged by the session that made them
+        self._session_keys: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+        self._describe_metrics()
         self._setup_handlers()
         self._load_config()
+        self.startup = {"init_ms": round((time.perf_counter() - started) * 1000, 1)}
     
     def _load_config(self):
         """Load configuration from environment variables."""
@@ -37,14 +99,154 @@ class AuraMCPServer:
         grafana_url = os.getenv("GRAFANA_URL", "https://logs-prod-008.grafana.net")
         grafana_username = os.getenv("GRAFANA_USERNAME", "444103")
         grafana_password = os.getenv("GRAFANA_PASSWORD")
+        store_path = os.getenv(
+            "GRAFANA_LOG_STORE",
+            os.path.join(os.path.expanduser("~"), ".aura-mcp", "logs.db")
+        )
         
         # Initialize Grafana service
-        self.grafana_service = GrafanaService(
+        self.grafana_service = self._create_grafana_service(
+            grafana_url, grafana_username, grafana_password,
+            os.getenv("GRAFANA_TENANT"), store_path
+        )
+        self.async_grafana_service = AsyncGrafanaService(
+            self.grafana_service,
+            max_connections=int(os.getenv("GRAFANA_MAX_CONNECTIONS", "20"))
+        )
+        
+        # Additional Loki instances or tenants searched by search_grafana_logs_multi
+        self.backends = {DEFAULT_BACKEND: self.async_grafana_service}
+        for name in filter(None, (name.strip() for name in os.getenv("GRAFANA_BACKENDS", "").split(","))):
+            prefix = f"GRAFANA_{name.upper().replace('-', '_')}_"
+            backend_store = None
+            if store_path:
+                root, extension = os.path.splitext(store_path)
+                backend_store = f"{root}-{name}{extension}"
+            service = self._create_grafana_service(
+                os.getenv(prefix + "URL", grafana_url),
+                os.getenv(prefix + "USERNAME", grafana_username),
+                os.getenv(prefix + "PASSWORD", grafana_password),
+                os.getenv(prefix + "TENANT"),
+                backend_store
+            )
+            self.backends[name] = AsyncGrafanaService(
+                service,
+                max_connections=int(os.getenv("GRAFANA_MAX_CONNECTIONS", "20"))
+            )
+        self.multi_search = MultiBackendSearch(
+            self.backends,
+            timeout_seconds=float(os.getenv("GRAFANA_BACKEND_TIMEOUT", "60"))
+        )
+        
+        # Export files, and search results kept for cursor paging
+        self.export_dir = os.path.expanduser(os.getenv(
+            "GRAFANA_EXPORT_DIR",
+            os.path.join(os.path.expanduser("~"), ".aura-mcp", "exports")
+        ))
+        self.page_bytes = int(os.getenv("GRAFANA_PAGE_BYTES", str(DEFAULT_PAGE_BYTES)))
+        self.adaptive_shards = os.getenv("GRAFANA_ADAPTIVE_SHARDS", "false").lower() == "true"
+        self.results = ResultRegistry(
+            max_results=int(os.getenv("GRAFANA_RESULT_HANDLES", "32")),
+            ttl_seconds=float(os.getenv("GRAFANA_RESULT_TTL", "900"))
+        )
+    
+    def _create_grafana_service(
+        self,
+        grafana_url: str,
+        username: str,
+        password: str,
+        tenant_id: str = None,
+        store_path: str = None
+    ) -> GrafanaService:
+        """Create a Grafana service using the shared tuning settings."""
+        return GrafanaService(
             grafana_url=grafana_url,
-            username=grafana_username,
-            password=grafana_password
+            username=username,
+            password=password,
+            pool_maxsize=int(os.getenv("GRAFANA_POOL_SIZE", "10")),
+            cache_ttl_seconds=float(os.getenv("GRAFANA_CACHE_TTL", "900")),
+            cache_max_bytes=int(os.getenv("GRAFANA_CACHE_MAX_MB", "64")) * 1024 * 1024,
+            store_path=store_path,
+            store_max_bytes=int(os.getenv("GRAFANA_LOG_STORE_MAX_MB", "512")) * 1024 * 1024,
+            retry_policy=RetryPolicy(max_attempts=int(os.getenv("GRAFANA_MAX_ATTEMPTS", "4"))),
+            hedge_after_seconds=float(os.getenv("GRAFANA_HEDGE_AFTER", "0")) or None,
+            metrics=self.metrics,
+            tenant_id=tenant_id,
+            target_shard_lines=int(os.getenv("GRAFANA_SHARD_TARGET_LINES", str(TARGET_SHARD_LINES)))
         )
     
+    def _describe_metrics(self):
+        """Attach help text to the metrics exposed by the server."""
+        self.metrics.describe("tool_latency_seconds", "MCP tool call latency")
+        self.metrics.describe("tool_calls_total", "MCP tool calls by outcome")
+        self.metrics.describe("loki_requests_total", "Loki HTTP requests by endpoint and status")
+        self.metrics.describe("loki_request_duration_seconds", "Loki HTTP request latency")
+        self.metrics.describe("loki_response_bytes_total", "Bytes received from Loki")
+        self.metrics.describe("loki_json_decode_seconds", "Time spent decoding Loki JSON responses")
+        self.metrics.describe("search_duration_seconds", "Uncached search latency by strategy")
+        self.metrics.describe("search_entries_total", "Log entries fetched by uncached searches")
+        self.metrics.describe("search_fetch_seconds_total", "Time spent fetching uncached searches")
+        self.metrics.describe("search_coalesced_total", "Searches that joined an identical in-flight search")
+        self.metrics.describe("session_queued_calls_total", "Tool calls that waited for their session's concurrency limit")
+    
+    def _metrics_report(self) -> dict:
+        """Build the JSON metrics report served as an MCP resource."""
+        return {
+            **self.metrics.snapshot(),
+            "entries_per_second": self.grafana_service.entries_per_second(),
+            "strategies": self.grafana_service.strategy_stats(),
+            "connections": self.grafana_service.connection_stats(),
+            "cache": self.grafana_service.cache_stats(),
+            "resilience": self.grafana_service.resilience_stats(),
+            "coalescing": self.grafana_service.coalescing_stats(),
+            "results": self.results.stats(),
+            "density": self.grafana_service.density.stats(),
+            "backends": self._backend_stats(),
+            "startup": self.startup
+        }
+    
+    def _backend_stats(self) -> dict:
+        """Connection, cache and resilience stats of every configured backend."""
+        return {
+            name: {
+                "connections": backend.service.connection_stats(),
+                "cache": backend.service.cache_stats(),
+                "resilience": backend.service.resilience_stats()
+            }
+            for name, backend in self.backends.items()
+        }
+    
+    def start_metrics_exporter(self, port: int):
+        """
+        Serve Prometheus text metrics over HTTP from a background thread.
+        
+        Args:
+            port: Local port to listen on
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        import threading
+        
+        metrics = self.metrics
+        
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                # stdout/stderr belong to the MCP stdio transport
+                pass
+        
+        httpd = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+        threading.Thread(target=httpd.serve_forever, name="metrics-exporter", daemon=True).start()
+    
     def _setup_handlers(self):
         """Setup MCP protocol handlers."""
         
@@ -69,7 +271,92 @@ class AuraMCPServer:
                         "properties": {
                             "correlation_id": {
                                 "type": "string",
-                                "description": "The correlation ID to search for in the logs"
+                                "description": "The correlation ID to search for in the logs; required unless a cursor is given"
+                            },
+                            "deployment_environment": {
+                                "type": "string",
+                                "description": "Optional deployment environment filter (e.g., 'test', 'production')",
+                                "enum": ["test", "production"]
+                            },
+                            "days_back": {
+                                "type": "integer",
+                                "description": "Number of days to search back (default: 7)",
+                                "minimum": 1,
+                                "maximum": 30,
+                                "default": 7
+                            },
+                            "shard_hours": {
+                                "type": "integer",
+                                "description": "Optional shard size in hours. Splits the search window into shards that are queried in parallel, which is faster for long windows",
+                                "minimum": 1,
+                                "maximum": 168
+                            },
+                            "locate_first": {
+                                "type": "boolean",
+                                "description": "Probe match density with a cheap count_over_time query first and fetch only the time buckets that contain matches. Fastest for rare correlation IDs over long windows",
+                                "default": False
+                            },
+                            "adaptive_shards": {
+                                "type": "boolean",
+                                "description": "Choose shard boundaries from the match density learned from earlier searches (probing only unknown hours) so each request returns about the same number of lines: one request for quiet windows, fine shards for busy hours. The plan and its efficiency are reported",
+                                "default": False
+                            },
+                            "level": {
+                                "type": "string",
+                                "description": "Optional log level filter applied by Loki to JSON lines, case-insensitive (e.g., 'error', 'warn')"
+                            },
+                            "service": {
+                                "type": "string",
+                                "description": "Optional filter on the 'service' field of JSON lines"
+                            },
+                            "message_regex": {
+                                "type": "string",
+                                "description": "Optional RE2 regular expression the log line must match"
+                            },
+                            "fields": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Optional JSON fields to return instead of whole lines (e.g., ['level', 'message', 'http.status']); nested fields use dots"
+                            },
+                            "timeline": {
+                                "type": "boolean",
+                                "description": "Return entries in chronological order across all services, tagged with their service, with the latency of each hop between services",
+                                "default": False
+                            },
+                            "patterns": {
+                                "type": "boolean",
+                                "description": "Summarize large results as log templates with counts, first/last times and example values (default: true)",
+                                "default": True
+                            },
+                            "cursor": {
+                                "type": "string",
+                                "description": "Cursor returned by a previous call; returns the next page of that stored result without querying Loki again"
+                            },
+                            "page_bytes": {
+                                "type": "integer",
+                                "description": "Maximum size of the response text in bytes (default: 16384)",
+                                "minimum": 1024
+                            },
+                            "page_tokens": {
+                                "type": "integer",
+                                "description": "Maximum size of the response text in tokens (about 4 bytes each); overrides page_bytes",
+                                "minimum": 256
+                            }
+                        },
+                        "required": []
+                    }
+                ),
+                Tool(
+                    name="search_grafana_logs_batch",
+                    description="Search Grafana logs for many correlation IDs at once using combined queries, returning per-ID counts and entries",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "correlation_ids": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "The correlation IDs to search for in the logs",
+                                "minItems": 1
                             },
                             "deployment_environment": {
                                 "type": "string",
@@ -84,33 +371,381 @@ class AuraMCPServer:
                                 "default": 7
                             }
                         },
+                        "required": ["correlation_ids"]
+                    }
+                ),
+                Tool(
+                    name="search_grafana_logs_multi",
+                    description="Search a correlation ID in several deployment environments and Loki backends at once, merging the results by timestamp with each entry tagged by its source",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "correlation_id": {
+                                "type": "string",
+                                "description": "The correlation ID to search for in the logs"
+                            },
+                            "deployment_environments": {
+                                "type": "array",
+                                "items": {"type": "string", "enum": ["test", "production"]},
+                                "description": "Deployment environments to search (default: all, unfiltered)"
+                            },
+                            "backends": {
+                                "type": "array",
+                                "items": {"type": "string", "enum": list(self.backends)},
+                                "description": "Loki backends to search (default: all configured)"
+                            },
+                            "days_back": {
+                                "type": "integer",
+                                "description": "Number of days to search back (default: 7)",
+                                "minimum": 1,
+                                "maximum": 30,
+                                "default": 7
+                            },
+                            "timeout_seconds": {
+                                "type": "number",
+                                "description": "Sources that have not answered after this long are reported as timed out instead of delaying the others",
+                                "minimum": 1,
+                                "maximum": 300
+                            }
+                        },
                         "required": ["correlation_id"]
                     }
+                ),
+                Tool(
+                    name="tail_grafana_logs",
+                    description="Follow new log lines for a correlation ID as they are logged. Lines are pushed as progress notifications while following and buffered between calls; call again with the returned tail_id to drain lines logged since",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "correlation_id": {
+                                "type": "string",
+                                "description": "The correlation ID to follow (required when starting a new tail)"
+                            },
+                            "deployment_environment": {
+                                "type": "string",
+                                "description": "Optional deployment environment filter (e.g., 'test', 'production')",
+                                "enum": ["test", "production"]
+                            },
+                            "tail_id": {
+                                "type": "string",
+                                "description": "ID of an existing tail to resume and drain"
+                            },
+                            "follow_seconds": {
+                                "type": "integer",
+                                "description": "How long to keep following before returning (default: 30)",
+                                "minimum": 0,
+                                "maximum": 300,
+                                "default": 30
+                            },
+                            "poll_interval_seconds": {
+                                "type": "number",
+                                "description": "Pause between polls of Loki (default: 2)",
+                                "minimum": 0.5,
+                                "maximum": 60,
+                                "default": 2
+                            },
+                            "since_seconds": {
+                                "type": "integer",
+                                "description": "When starting a new tail, also include lines logged this many seconds ago (default: 60)",
+                                "minimum": 0,
+                                "maximum": 3600,
+                                "default": 60
+                            },
+                            "max_lines": {
+                                "type": "integer",
+                                "description": "Maximum lines returned by this call; the rest stay buffered (default: 100)",
+                                "minimum": 1,
+                                "maximum": 1000,
+                                "default": 100
+                            },
+                            "stop": {
+                                "type": "boolean",
+                                "description": "Drain the tail once more and stop it",
+                                "default": False
+                            }
+                        },
+                        "required": []
+                    }
+                ),
+                Tool(
+                    name="export_grafana_logs",
+                    description="Export every log line for a correlation ID to a compressed NDJSON file on the server for offline analysis. Returns only the file path and export statistics",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "correlation_id": {
+                                "type": "string",
+                                "description": "The correlation ID to export"
+                            },
+                            "deployment_environment": {
+                                "type": "string",
+                                "description": "Optional deployment environment filter (e.g., 'test', 'production')",
+                                "enum": ["test", "production"]
+                            },
+                            "days_back": {
+                                "type": "integer",
+                                "description": "Number of days to export (default: 7)",
+                                "minimum": 1,
+                                "maximum": 30,
+                                "default": 7
+                            },
+                            "path": {
+                                "type": "string",
+                                "description": "Optional output file name relative to the export directory (absolute paths and '..' are rejected); defaults to a timestamped file"
+                            },
+                            "compression": {
+                                "type": "string",
+                                "description": "File compression; auto uses zstd when the zstandard package is installed, otherwise gzip (default: auto)",
+                                "enum": ["auto", "zstd", "gzip", "none"],
+                                "default": "auto"
+                            },
+                            "level": {
+                                "type": "string",
+                                "description": "Optional log level filter applied by Loki to JSON lines, case-insensitive"
+                            },
+                            "service": {
+                                "type": "string",
+                                "description": "Optional filter on the 'service' field of JSON lines"
+                            },
+                            "message_regex": {
+                                "type": "string",
+                                "description": "Optional RE2 regular expression the log line must match"
+                            }
+                        },
+                        "required": ["correlation_id"]
+                    }
+                ),
+                Tool(
+                    name="summarize_grafana_logs",
+                    description="Summarize every log line for a correlation ID or label set without returning the lines: top error messages, counts per service and level, and entry/error rates over time, computed in one streaming pass",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "correlation_id": {
+                                "type": "string",
+                                "description": "Optional correlation ID the lines must contain; required unless labels are given"
+                            },
+                            "labels": {
+                                "type": "object",
+                                "additionalProperties": {"type": "string"},
+                                "description": "Optional stream labels the lines must carry (e.g., {'service_name': 'orders'}); required unless a correlation ID is given"
+                            },
+                            "deployment_environment": {
+                                "type": "string",
+                                "description": "Optional deployment environment filter (e.g., 'test', 'production')",
+                                "enum": ["test", "production"]
+                            },
+                            "days_back": {
+                                "type": "integer",
+                                "description": "Number of days to summarize (default: 7)",
+                                "minimum": 1,
+                                "maximum": 30,
+                                "default": 7
+                            },
+                            "bucket_seconds": {
+                                "type": "integer",
+                                "description": "Optional width of the rate buckets in seconds; chosen from the window by default",
+                                "minimum": 60
+                            },
+                            "top_k": {
+                                "type": "integer",
+                                "description": "Number of top services, levels and error messages returned (default: 10)",
+                                "minimum": 1,
+                                "maximum": 50,
+                                "default": 10
+                            },
+                            "level": {
+                                "type": "string",
+                                "description": "Optional log level filter applied by Loki to JSON lines, case-insensitive"
+                            },
+                            "service": {
+                                "type": "string",
+                                "description": "Optional filter on the 'service' field of JSON lines"
+                            },
+                            "message_regex": {
+                                "type": "string",
+                                "description": "Optional RE2 regular expression the log line must match"
+                            }
+                        }
+                    }
                 )
             ]
         
         @self.server.call_tool()
         async def handle_call_tool(name: str, arguments: dict) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-            """Handle tool calls."""
+            """Handle tool calls, recording per-tool latency."""
+            started = time.perf_counter()
+            tool = name if name in TOOL_NAMES else "unknown"
+            outcome = "error"
+            try:
+                async with self._session_slot():
+                    response = await dispatch_tool(name, arguments or {})
+                outcome = "ok"
+                return response
+            finally:
+                self.metrics.observe("tool_latency_seconds", time.perf_counter() - started, {"tool": tool})
+                self.metrics.inc("tool_calls_total", labels={"tool": tool, "outcome": outcome})
+        
+        @self.server.list_resources()
+        async def handle_list_resources() -> list[Resource]:
+            """List available resources."""
+            return [
+                Resource(
+                    uri=METRICS_JSON_URI,
+                    name="Server metrics",
+                    description="Per-tool latency percentiles, Loki I/O counters, cache and resilience stats",
+                    mimeType="application/json"
+                ),
+                Resource(
+                    uri=METRICS_PROMETHEUS_URI,
+                    name="Server metrics (Prometheus)",
+                    description="The same metrics in Prometheus text exposition format",
+                    mimeType="text/plain"
+                )
+            ]
+        
+        @self.server.read_resource()
+        async def handle_read_resource(uri) -> str:
+            """Read a resource."""
+            if str(uri) == METRICS_JSON_URI:
+                return json.dumps(self._metrics_report(), indent=2)
+            if str(uri) == METRICS_PROMETHEUS_URI:
+                return self.metrics.render_prometheus()
+            raise ValueError(f"Unknown resource: {uri}")
+        
+        async def dispatch_tool(name: str, arguments: dict) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+            """Route a tool call to its handler."""
             
             if name == "test_grafana_connection":
                 return await self._handle_test_connection()
             
             elif name == "search_grafana_logs":
                 correlation_id = arguments.get("correlation_id")
+                page_budget = budget_bytes(
+                    arguments.get("page_bytes"), arguments.get("page_tokens"), self.page_bytes
+                )
+                if arguments.get("cursor"):
+                    return self._handle_search_page(arguments["cursor"], page_budget)
                 if not correlation_id:
                     return [TextContent(
                         type="text",
-                        text="Error: correlation_id is required"
+                        text="Error: correlation_id or cursor is required"
                     )]
                 
                 deployment_environment = arguments.get("deployment_environment")
                 days_back = arguments.get("days_back", 7)
+                shard_hours = arguments.get("shard_hours")
+                locate_first = arguments.get("locate_first", False)
+                log_filter = LogFilter.from_arguments(
+                    level=arguments.get("level"),
+                    service=arguments.get("service"),
+                    message_regex=arguments.get("message_regex"),
+                    fields=arguments.get("fields")
+                )
                 
                 return await self._handle_search_logs(
                     correlation_id=correlation_id,
                     deployment_environment=deployment_environment,
-                    days_back=days_back
+                    days_back=days_back,
+                    shard_hours=shard_hours,
+                    locate_first=locate_first,
+                    adaptive_shards=arguments.get("adaptive_shards", self.adaptive_shards),
+                    log_filter=log_filter,
+                    timeline=arguments.get("timeline", False),
+                    patterns=arguments.get("patterns", True),
+                    page_bytes=page_budget
+                )
+            
+            elif name == "search_grafana_logs_batch":
+                correlation_ids = arguments.get("correlation_ids")
+                if not correlation_ids:
+                    return [TextContent(
+                        type="text",
+                        text="Error: correlation_ids is required"
+                    )]
+                
+                return await self._handle_search_logs_batch(
+                    correlation_ids=correlation_ids,
+                    deployment_environment=arguments.get("deployment_environment"),
+                    days_back=arguments.get("days_back", 7)
+                )
+            
+            elif name == "search_grafana_logs_multi":
+                correlation_id = arguments.get("correlation_id")
+                if not correlation_id:
+                    return [TextContent(
+                        type="text",
+                        text="Error: correlation_id is required"
+                    )]
+                
+                return await self._handle_search_logs_multi(
+                    correlation_id=correlation_id,
+                    deployment_environments=arguments.get("deployment_environments"),
+                    backends=arguments.get("backends"),
+                    days_back=arguments.get("days_back", 7),
+                    timeout_seconds=arguments.get("timeout_seconds")
+                )
+            
+            elif name == "tail_grafana_logs":
+                if not arguments.get("correlation_id") and not arguments.get("tail_id"):
+                    return [TextContent(
+                        type="text",
+                        text="Error: correlation_id or tail_id is required"
+                    )]
+                
+                return await self._handle_tail_logs(
+                    correlation_id=arguments.get("correlation_id"),
+                    deployment_environment=arguments.get("deployment_environment"),
+                    tail_id=arguments.get("tail_id"),
+                    follow_seconds=arguments.get("follow_seconds", 30),
+                    poll_interval_seconds=arguments.get("poll_interval_seconds", 2),
+                    since_seconds=arguments.get("since_seconds", 60),
+                    max_lines=arguments.get("max_lines", 100),
+                    stop=arguments.get("stop", False)
+                )
+            
+            elif name == "export_grafana_logs":
+                correlation_id = arguments.get("correlation_id")
+                if not correlation_id:
+                    return [TextContent(
+                        type="text",
+                        text="Error: correlation_id is required"
+                    )]
+                
+                return await self._handle_export_logs(
+                    correlation_id=correlation_id,
+                    deployment_environment=arguments.get("deployment_environment"),
+                    days_back=arguments.get("days_back", 7),
+                    path=arguments.get("path"),
+                    compression=arguments.get("compression", "auto"),
+                    log_filter=LogFilter.from_arguments(
+                        level=arguments.get("level"),
+                        service=arguments.get("service"),
+                        message_regex=arguments.get("message_regex")
+                    )
+                )
+            
+            elif name == "summarize_grafana_logs":
+                correlation_id = arguments.get("correlation_id")
+                labels = arguments.get("labels")
+                if not correlation_id and not labels:
+                    return [TextContent(
+                        type="text",
+                        text="Error: correlation_id or labels is required"
+                    )]
+                
+                return await self._handle_summarize_logs(
+                    correlation_id=correlation_id,
+                    labels=labels,
+                    deployment_environment=arguments.get("deployment_environment"),
+                    days_back=arguments.get("days_back", 7),
+                    bucket_seconds=arguments.get("bucket_seconds"),
+                    top_k=arguments.get("top_k", 10),
+                    log_filter=LogFilter.from_arguments(
+                        level=arguments.get("level"),
+                        service=arguments.get("service"),
+                        message_regex=arguments.get("message_regex")
+                    )
                 )
             
             else:
@@ -122,13 +757,17 @@ class AuraMCPServer:
     async def _handle_test_connection(self) -> list[TextContent]:
         """Handle Grafana connection test."""
         try:
-            is_connected = self.grafana_service.test_connection()
+            is_connected = await self.async_grafana_service.test_connection()
             
             if is_connected:
                 message = "✅ Successfully connected to Grafana Loki API"
             else:
                 message = "❌ Failed to connect to Grafana Loki API"
             
+            breaker = self.grafana_service.requests.circuit_breaker.stats()
+            if breaker["state"] != "closed":
+                message += f"\n⚠️ Circuit breaker is {breaker['state']} after {breaker['consecutive_failures']} consecutive failures"
+            
             return [TextContent(
                 type="text",
                 text=message
@@ -140,47 +779,238 @@ class AuraMCPServer:
                 text=f"❌ Error testing connection: {str(e)}"
             )]
     
+    def _format_search_result(
+        self,
+        result: dict,
+        correlation_id: str,
+        deployment_environment: str = None,
+        days_back: int = 7,
+        patterns: bool = True,
+        page_bytes: int = DEFAULT_PAGE_BYTES
+    ) -> str:
+        """Format a successful search result as its first page, storing the rest for a cursor."""
+        total_entries = result["total_entries"]
+        entries = result["entries"]
+        
+        if total_entries == 0:
+            message = f"🔍 No log entries found for correlation ID: {correlation_id}"
+            if deployment_environment:
+                message += f" in environment: {deployment_environment}"
+            return message + f" (searched last {days_back} days)"
+        
+        # Collected as a list and joined once; large results made += quadratic
+        lines = [f"🔍 Found {total_entries} log entries for correlation ID: {correlation_id}"]
+        if deployment_environment:
+            lines.append(f"Environment: {deployment_environment}")
+        lines.append(f"Search period: Last {days_back} days")
+        lines.append(f"Query used: {result['query']}")
+        if "filters" in result:
+            lines.append("Filters: " + "; ".join(
+                f"{name}={','.join(value) if isinstance(value, list) else value}"
+                for name, value in result["filters"].items()
+            ))
+        if result.get("cache") in ("memory", "disk"):
+            lines.append(f"Cache: {result['cache']} hit (only new entries fetched from Loki)")
+        if result.get("coalesced"):
+            lines.append("Shared: joined an identical search that was already in progress")
+        if "shards" in result and result["shards"]:
+            slowest = max(shard["duration_ms"] for shard in result["shards"])
+            lines.append(f"Shards: {len(result['shards'])} (slowest {slowest} ms)")
+        if "shard_plan" in result:
+            plan = result["shard_plan"]
+            lines.append(
+                f"Shard plan: {plan['shards']} adaptive shards targeting {plan['target_lines']} lines each "
+                f"({plan['buckets_from_history']} hours from history, {plan['buckets_probed']} probed); "
+                f"{plan['requests']} requests vs {plan['hourly_shard_requests']} hourly shards"
+            )
+            lines.append(
+                f"Plan efficiency: {plan['actual_entries']} entries vs {plan['expected_entries']} expected, "
+                f"fill {plan['fill_ratio']:.0%}, {plan['truncated_shards']} shards truncated "
+                f"(probe {plan['probe_ms']} ms, fetch {plan['fetch_ms']} ms)"
+            )
+        if "locate" in result:
+            locate = result["locate"]
+            lines.append(
+                f"Locate: {locate['ranges_fetched']}/{locate['buckets_probed']} buckets fetched "
+                f"(probe {locate['probe_ms']} ms, fetch {locate['fetch_ms']} ms)"
+            )
+            comparison = self.grafana_service.strategy_stats()
+            lines.append("Average latency by strategy: " + ", ".join(
+                f"{strategy} {stats['avg_ms']} ms (n={stats['searches']})"
+                for strategy, stats in comparison.items()
+            ))
+        lines.append("")
+        
+        if result.get("truncated"):
+            lines.insert(-1, "⚠️ Result reached Loki's per-query limit; older entries may be missing. Narrow the search or use shard_hours.")
+        
+        # Summarize every entry as templates in up to half of the page when only some are shown in full
+        remaining = page_bytes - len("\n".join(lines).encode("utf-8")) - PAGE_FOOTER_BYTES
+        if patterns and total_entries > SEARCH_DISPLAY_ENTRIES:
+            lines.extend(self._format_patterns(entries, remaining // 2))
+        
+        # Fill the rest of the page budget with entries, keeping the remainder server-side
+        header = "\n".join(lines) + "\n"
+        remaining = max(page_bytes - len(header.encode("utf-8")) - PAGE_FOOTER_BYTES, PAGE_FOOTER_BYTES)
+        page, next_offset = fill_page(entries, 0, remaining, self._format_entry)
+        footer = ""
+        if next_offset < total_entries:
+            stored = self.results.add(result, correlation_id, self._session_key())
+            footer = f"... and {total_entries - next_offset} more entries"
+            if stored is not None:
+                footer += f"; call search_grafana_logs with cursor={make_cursor(stored.handle_id, next_offset)} for the next page"
+        
+        return header + "\n".join(page + [footer]) + "\n"
+    
+    def _format_entry(self, index: int, entry) -> str:
+        """Format one search result entry, numbered from 1."""
+        return f"--- Entry {index + 1} ---\nTime: {entry['timestamp_readable']}\nMessage: {entry['message']}\n"
+    
+    def _handle_search_page(self, cursor: str, page_bytes: int) -> list[TextContent]:
+        """Handle fetching the next page of a stored search result."""
+        try:
+            handle_id, offset = parse_cursor(cursor)
+        except ValueError as e:
+            return [TextContent(
+                type="text",
+                text=f"❌ {str(e)}"
+            )]
+        
+        stored = self.results.get(handle_id, self._session_key())
+        if stored is None:
+            return [TextContent(
+                type="text",
+                text=f"❌ Unknown or expired cursor: {cursor}; search again to get a new one"
+            )]
+        
+        total_entries = len(stored.entries)
+        if offset >= total_entries:
+            return [TextContent(
+                type="text",
+                text=f"❌ Cursor is past the end of the {total_entries} stored entries"
+            )]
+        page, next_offset = fill_page(
+            stored.entries, offset, max(page_bytes - PAGE_FOOTER_BYTES * 2, PAGE_FOOTER_BYTES), self._format_entry
+        )
+        lines = [
+            f"📄 Entries {offset + 1}-{next_offset} of {total_entries} for correlation ID: {stored.correlation_id}",
+            f"Query used: {stored.result['query']}",
+            ""
+        ]
+        lines.extend(page)
+        if next_offset < total_entries:
+            lines.append(
+                f"... and {total_entries - next_offset} more entries; call search_grafana_logs with "
+                f"cursor={make_cursor(handle_id, next_offset)} for the next page"
+            )
+        else:
+            lines.append("End of results.")
+        
+        return [TextContent(
+            type="text",
+            text="\n".join(lines)
+        )]
+    
+    def _format_patterns(self, entries, max_bytes: int) -> list[str]:
+        """Format the most frequent log templates of a result set as display lines within max_bytes."""
+        summary = summarize_patterns(entries, limit=PATTERN_DISPLAY_LIMIT)
+        stats = summary["stats"]
+        heading = f"Patterns: {stats['patterns']} templates cover {stats['lines']} entries"
+        body = []
+        used = len(heading) + 20
+        for pattern in summary["patterns"]:
+            template = pattern["template"]
+            if len(template) > PATTERN_TEMPLATE_CHARS:
+                template = template[:PATTERN_TEMPLATE_CHARS] + "…"
+            block = [
+                f"  {pattern['count']}x [{pattern['first_seen_readable']} → {pattern['last_seen_readable']}] {template}"
+            ]
+            if pattern["examples"]:
+                examples = " | ".join(", ".join(example) for example in pattern["examples"])
+                block.append(f"      e.g. {examples[:PATTERN_TEMPLATE_CHARS]}")
+            size = sum(len(line.encode("utf-8")) + 1 for line in block)
+            if used + size > max_bytes:
+                break
+            body.extend(block)
+            used += size
+        if not body:
+            return []
+        return [f"{heading} (top {sum(1 for line in body if not line.startswith('      '))}):"] + body + [""]
+    
+    def _format_timeline(self, result: dict, correlation_id: str) -> str:
+        """Format a successful search result as a cross-service timeline."""
+        timeline = build_timeline(result["entries"])
+        entries = timeline["entries"]
+        services = timeline["services"]
+        
+        message = f"🧭 Timeline of {len(entries)} log entries for correlation ID: {correlation_id}\n"
+        message += f"Query used: {result['query']}\n"
+        message += f"Duration: {timeline['duration_ms']} ms across {len(timeline['spans'])} services\n"
+        if result.get("truncated"):
+            message += "⚠️ Result reached Loki's per-query limit; the earliest entries may be missing.\n"
+        
+        message += "\nServices:\n"
+        for service, span in timeline["spans"].items():
+            message += (
+                f"  {service}: {span['entries']} entries, starts at +{span['start_offset_ms']} ms, "
+                f"spans {span['duration_ms']} ms\n"
+            )
+        
+        if timeline["hops"]:
+            message += f"\nHops ({len(timeline['hops'])}):\n"
+            for pair in timeline["hop_summary"][:20]:
+                message += (
+                    f"  {pair['from_service']} → {pair['to_service']}: {pair['count']}x, "
+                    f"avg {pair['avg_ms']} ms, max {pair['max_ms']} ms\n"
+                )
+        
+        message += "\n"
+        for i, entry in enumerate(entries[:TIMELINE_DISPLAY_ENTRIES], 1):
+            offset_ms = round((entry["timestamp"] - entries.timestamps[0]) / 1_000_000, 3)
+            service = services[entries.stream_ids[i - 1]]
+            message += f"{i}. +{offset_ms} ms [{service}] {entry['message']}\n"
+        if len(entries) > TIMELINE_DISPLAY_ENTRIES:
+            message += f"... and {len(entries) - TIMELINE_DISPLAY_ENTRIES} more entries\n"
+        
+        return message
+    
     async def _handle_search_logs(
         self, 
         correlation_id: str, 
         deployment_environment: str = None,
-        days_back: int = 7
+        days_back: int = 7,
+        shard_hours: int = None,
+        locate_first: bool = False,
+        adaptive_shards: bool = False,
+        log_filter: LogFilter = None,
+        timeline: bool = False,
+        patterns: bool = True,
+        page_bytes: int = DEFAULT_PAGE_BYTES
     ) -> list[TextContent]:
         """Handle Grafana log search."""
         try:
             # Perform the search
-            result = self.grafana_service.search_by_correlation_id(
+            result = await self.async_grafana_service.search_by_correlation_id(
                 correlation_id=correlation_id,
                 deployment_environment=deployment_environment,
-                days_back=days_back
+                days_back=days_back,
+                shard_hours=shard_hours,
+                locate_first=locate_first,
+                log_filter=log_filter,
+                adaptive_shards=adaptive_shards
             )
             
-            if result["success"]:
-                # Format the results
-                total_entries = result["total_entries"]
-                entries = result["entries"]
+            if result["success"] and timeline and result["total_entries"]:
+                message = self._format_timeline(result, correlation_id)
                 
-                if total_entries == 0:
-                    message = f"🔍 No log entries found for correlation ID: {correlation_id}"
-                    if deployment_environment:
-                        message += f" in environment: {deployment_environment}"
-                    message += f" (searched last {days_back} days)"
-                else:
-                    message = f"🔍 Found {total_entries} log entries for correlation ID: {correlation_id}\n"
-                    if deployment_environment:
-                        message += f"Environment: {deployment_environment}\n"
-                    message += f"Search period: Last {days_back} days\n"
-                    message += f"Query used: {result['query']}\n\n"
-                    
-                    # Add log entries (limit to first 10 for readability)
-                    display_entries = entries[:10]
-                    for i, entry in enumerate(display_entries, 1):
-                        message += f"--- Entry {i} ---\n"
-                        message += f"Time: {entry['timestamp_readable']}\n"
-                        message += f"Message: {entry['message']}\n\n"
-                    
-                    if total_entries > 10:
-                        message += f"... and {total_entries - 10} more entries\n"
+                return [TextContent(
+                    type="text",
+                    text=message
+                )]
+            elif result["success"]:
+                message = self._format_search_result(
+                    result, correlation_id, deployment_environment, days_back, patterns, page_bytes
+                )
                 
                 return [TextContent(
                     type="text",
@@ -198,30 +1028,535 @@ class AuraMCPServer:
                 text=f"❌ Error searching logs: {str(e)}"
             )]
     
+    async def _handle_search_logs_batch(
+        self,
+        correlation_ids: list[str],
+        deployment_environment: str = None,
+        days_back: int = 7
+    ) -> list[TextContent]:
+        """Handle a batched Grafana log search for several correlation IDs."""
+        try:
+            result = await self.async_grafana_service.run_sync(
+                self.grafana_service.search_by_correlation_ids,
+                correlation_ids,
+                deployment_environment,
+                days_back
+            )
+            
+            if not result["success"]:
+                return [TextContent(
+                    type="text",
+                    text=f"❌ Batch search failed: {result['error']}"
+                )]
+            
+            per_id = result["results"]
+            found = sum(1 for bucket in per_id.values() if bucket["total_entries"])
+            lines = [
+                f"🔍 Searched {len(per_id)} correlation IDs in {len(result['queries'])} queries "
+                f"({result['lines_scanned']} lines scanned)"
+            ]
+            if deployment_environment:
+                lines.append(f"Environment: {deployment_environment}")
+            lines.append(f"Search period: Last {days_back} days")
+            lines.append(f"IDs with matches: {found}/{len(per_id)}\n")
+            
+            for correlation_id, bucket in per_id.items():
+                lines.append(f"=== {correlation_id}: {bucket['total_entries']} entries ===")
+                for entry in bucket["entries"][:3]:
+                    lines.append(f"[{entry['timestamp_readable']}] {entry['message']}")
+                if bucket["total_entries"] > 3:
+                    lines.append(f"... and {bucket['total_entries'] - 3} more entries")
+                lines.append("")
+            
+            return [TextContent(
+                type="text",
+                text="\n".join(lines)
+            )]
+            
+        except Exception as e:
+            return [TextContent(
+                type="text",
+                text=f"❌ Error searching logs: {str(e)}"
+            )]
+    
+    async def _handle_search_logs_multi(
+        self,
+        correlation_id: str,
+        deployment_environments: list[str] = None,
+        backends: list[str] = None,
+        days_back: int = 7,
+        timeout_seconds: float = None
+    ) -> list[TextContent]:
+        """Handle a concurrent search across environments and backends."""
+        try:
+            result = await self.multi_search.search(
+                correlation_id,
+                environments=deployment_environments,
+                backends=backends,
+                days_back=days_back,
+                timeout_seconds=timeout_seconds
+            )
+            
+            if "sources" not in result:
+                return [TextContent(
+                    type="text",
+                    text=f"❌ Search failed: {result['error']}"
+                )]
+            
+            sources = result["sources"]
+            lines = [
+                f"🔍 Found {result['total_entries']} log entries for correlation ID: {correlation_id} "
+                f"across {len(sources) - result['failed']}/{len(sources)} sources in {result['duration_ms']} ms",
+                f"Search period: Last {days_back} days",
+                ""
+            ]
+            for source in sources:
+                if source["success"]:
+                    line = f"✅ {source['source']}: {source['total_entries']} entries in {source['duration_ms']} ms"
+                    if source.get("cache") in ("memory", "disk"):
+                        line += f" ({source['cache']} cache)"
+                    if source.get("truncated"):
+                        line += " ⚠️ truncated at Loki's per-query limit"
+                else:
+                    line = f"❌ {source['source']}: {source['error']}"
+                lines.append(line)
+            lines.append("")
+            
+            entries = result["entries"]
+            for entry in entries[:10]:
+                lines.append(f"[{entry['timestamp_readable']}] [{entry['labels']['source']}] {entry['message']}")
+            if len(entries) > 10:
+                lines.append(f"... and {len(entries) - 10} more entries")
+            
+            return [TextContent(
+                type="text",
+                text="\n".join(lines)
+            )]
+            
+        except Exception as e:
+            return [TextContent(
+                type="text",
+                text=f"❌ Error searching logs: {str(e)}"
+            )]
+    
+    async def _handle_tail_logs(
+        self,
+        correlation_id: str = None,
+        deployment_environment: str = None,
+        tail_id: str = None,
+        follow_seconds: int = 30,
+        poll_interval_seconds: float = 2,
+        since_seconds: int = 60,
+        max_lines: int = 100,
+        stop: bool = False
+    ) -> list[TextContent]:
+        """Handle following new log lines for a correlation ID."""
+        try:
+            if tail_id:
+                tail = self.tails.get(tail_id)
+                if tail is None:
+                    return [TextContent(
+                        type="text",
+                        text=f"❌ Unknown or expired tail_id: {tail_id}"
+                    )]
+            else:
+                start_time = time.time_ns() - since_seconds * NANOSECONDS_PER_SECOND
+                logql_query = build_correlation_query(correlation_id, deployment_environment)
+                tail = self.tails.add(LogTail(
+                    self.async_grafana_service.query_entries, logql_query, start_time
+                ))
+            
+            # Push each batch of new lines to the client while following
+            progress_token = None
+            try:
+                meta = self.server.request_context.meta
+                progress_token = meta.progressToken if meta else None
+            except LookupError:
+                pass
+            
+            async def notify(new_lines: int):
+                if progress_token is None:
+                    return
+                latest = tail.buffer.latest()
+                message = f"{new_lines} new lines ({len(tail.buffer)} buffered)"
+                if latest is not None:
+                    message += f"; latest [{format_timestamp(latest[0])}] {latest[1][:200]}"
+                await self.server.request_context.session.send_progress_notification(
+                    progress_token, tail.buffer.received, message=message
+                )
+            
+            if not stop and follow_seconds > 0:
+                await tail.follow(follow_seconds, poll_interval_seconds, notify)
+            else:
+                await tail.poll()
+            
+            lines = tail.buffer.drain(max_lines)
+            stats = tail.stats()
+            if stop:
+                self.tails.remove(tail.tail_id)
+            
+            header = [
+                f"📡 Tail {tail.tail_id}: {len(lines)} lines returned, "
+                f"{stats['buffered']} still buffered, {stats['received']} received in total"
+            ]
+            header.append(f"Query: {tail.logql_query}")
+            if stats["dropped"]:
+                header.append(f"⚠️ {stats['dropped']} lines were dropped because the buffer was full; drain more often")
+            if stop:
+                header.append("Tail stopped.")
+            else:
+                header.append(f"Call tail_grafana_logs with tail_id={tail.tail_id} to continue following.")
+            header.append("")
+            
+            body = [f"[{format_timestamp(timestamp_ns)}] {message}" for timestamp_ns, message, _ in lines]
+            return [TextContent(
+                type="text",
+                text="\n".join(header + body)
+            )]
+            
+        except Exception as e:
+            return [TextContent(
+                type="text",
+                text=f"❌ Error tailing logs: {str(e)}"
+            )]
+    
+    async def _handle_export_logs(
+        self,
+        correlation_id: str,
+        deployment_environment: str = None,
+        days_back: int = 7,
+        path: str = None,
+        compression: str = "auto",
+        log_filter: LogFilter = None
+    ) -> list[TextContent]:
+        """Handle a streaming export of a correlation ID's logs to a file."""
+        try:
+            compression = resolve_compression(compression, path)
+            # Clients may only write inside the export directory
+            if path:
+                path = export_file_path(self.export_dir, path)
+            else:
+                path = default_export_path(self.export_dir, correlation_id, compression)
+            
+            result = await self.async_grafana_service.run_sync(
+                self.grafana_service.export_by_correlation_id,
+                correlation_id,
+                path,
+                deployment_environment,
+                days_back,
+                compression,
+                log_filter
+            )
+            
+            if not result["success"]:
+                return [TextContent(
+                    type="text",
+                    text=f"❌ Export failed: {result['error']}"
+                )]
+            
+            ratio = result["bytes_uncompressed"] / result["bytes_written"] if result["bytes_written"] else 0
+            lines = [
+                f"📦 Exported {result['lines']} log lines for correlation ID: {correlation_id}",
+                f"File: {result['path']}",
+                f"Compression: {result['compression']} "
+                f"({result['bytes_written']} bytes written, {result['bytes_uncompressed']} uncompressed, {ratio:.1f}x)",
+                f"Throughput: {result['lines_per_second']} lines/s over {result['duration_ms']} ms",
+                f"Query used: {result['query']}"
+            ]
+            return [TextContent(
+                type="text",
+                text="\n".join(lines)
+            )]
+            
+        except Exception as e:
+            return [TextContent(
+                type="text",
+                text=f"❌ Error exporting logs: {str(e)}"
+            )]
+    
+    async def _handle_summarize_logs(
+        self,
+        correlation_id: str = None,
+        labels: dict = None,
+        deployment_environment: str = None,
+        days_back: int = 7,
+        bucket_seconds: int = None,
+        top_k: int = 10,
+        log_filter: LogFilter = None
+    ) -> list[TextContent]:
+        """Handle a streaming statistical summary of logs."""
+        try:
+            result = await self.async_grafana_service.run_sync(
+                self.grafana_service.summarize_logs,
+                correlation_id,
+                labels,
+                deployment_environment,
+                days_back,
+                log_filter,
+                bucket_seconds,
+                top_k
+            )
+            
+            if not result["success"]:
+                return [TextContent(
+                    type="text",
+                    text=f"❌ Summary failed: {result['error']}"
+                )]
+            
+            subject = f"correlation ID: {correlation_id}" if correlation_id else "labels"
+            if labels:
+                subject += " " + ", ".join(f"{name}={value}" for name, value in result["labels"].items())
+            lines = [
+                f"📊 Summarized {result['lines']} log lines for {subject}",
+                f"Search period: Last {days_back} days",
+                f"Query used: {result['query']}",
+                f"Errors: {result['error_lines']} ({result['error_rate']:.2%})",
+                f"Throughput: {result['lines_per_second']} lines/s over {result['duration_ms']} ms"
+            ]
+            if result["lines"]:
+                lines.append(
+                    f"Seen: {format_timestamp(result['first_seen'])} → {format_timestamp(result['last_seen'])}"
+                )
+            
+            def approximate(item: dict) -> str:
+                return f"{item['count']} (±{item['overestimate']})" if item["overestimate"] else str(item["count"])
+            
+            lines.append("")
+            lines.append("Services: " + ", ".join(
+                f"{item['service']} {approximate(item)}" for item in result["services"]
+            ))
+            lines.append("Levels: " + ", ".join(
+                f"{item['level']} {approximate(item)}" for item in result["levels"]
+            ))
+            
+            if result["top_errors"]:
+                lines.append("")
+                lines.append(f"Top errors ({len(result['top_errors'])}):")
+                for item in result["top_errors"]:
+                    lines.append(f"  {approximate(item)}x {item['message']}")
+            
+            if result["rates"]:
+                lines.append("")
+                lines.append(f"Rates per {result['bucket_seconds']}s bucket:")
+                for bucket in result["rates"]:
+                    lines.append(
+                        f"  {bucket['start_readable']}: {bucket['entries']} entries "
+                        f"({bucket['per_minute']}/min), {bucket['errors']} errors ({bucket['error_rate']:.1%})"
+                    )
+            
+            return [TextContent(
+                type="text",
+                text="\n".join(lines)
+            )]
+            
+        except Exception as e:
+            return [TextContent(
+                type="text",
+                text=f"❌ Error summarizing logs: {str(e)}"
+            )]
+    
+    def _session_slot(self) -> asyncio.Semaphore:
+        """Return the semaphore limiting concurrent tool calls of the calling session."""
+        try:
+            session = self.server.request_context.session
+        except LookupError:
+            session = self
+        slot = self._session_slots.get(session)
+        if slot is None:
+            slot = self._session_slots[session] = asyncio.Semaphore(self.session_concurrency)
+        if slot.locked():
+            self.metrics.inc("session_queued_calls_total")
+        return slot
+    
+    def _session_key(self) -> str:
+        """Return the random key identifying the calling session."""
+        try:
+            session = self.server.request_context.session
+        except LookupError:
+            session = self
+        key = self._session_keys.get(session)
+        if key is None:
+            key = self._session_keys[session] = uuid.uuid4().hex
+        return key
+    
+    async def warm_up(self) -> dict:
+        """
+        Open pooled connections to every backend before the first client arrives.
+        
+        Returns:
+            The startup report: initialization and warm-up times and whether
+            each backend was reachable
+        """
+        started = time.perf_counter()
+        reachable = await asyncio.gather(
+            *(backend.test_connection() for backend in self.backends.values()),
+            return_exceptions=True
+        )
+        self.startup["warmup_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self.startup["backends"] = {
+            name: result is True for name, result in zip(self.backends, reachable)
+        }
+        return self.startup
+    
+    def _initialization_options(self) -> InitializationOptions:
+        """Options announced to clients when a session is initialized."""
+        return InitializationOptions(
+            server_name="aura-mcp-server",
+            server_version="1.0.0",
+            capabilities=self.server.get_capabilities(
+                notification_options=NotificationOptions(),
+                experimental_capabilities={}
+            )
+        )
+    
+    async def _close_backends(self):
+        """Close the connection pools of every backend."""
+        for backend in self.backends.values():
+            await backend.aclose()
+            backend.service.close()
+    
     async def run(self):
         """Run the MCP server."""
         # Import here to avoid issues with event loop
         from mcp.server.stdio import stdio_server
         
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                InitializationOptions(
-                    server_name="aura-mcp-server",
-                    server_version="1.0.0",
-                    capabilities=self.server.get_capabilities(
-                        notification_options=NotificationOptions(),
-                        experimental_capabilities={}
-                    )
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await self.server.run(
+                    read_stream,
+                    write_stream,
+                    self._initialization_options()
                 )
+        finally:
+            await self._close_backends()
+    
+    async def run_http(self, host: str = "127.0.0.1", port: int = 8765, auth_token: str = None):
+        """
+        Run the MCP server as a long-lived daemon over streamable HTTP (with SSE).
+        
+        Every client session is served by this one process, so all of them share
+        the Loki connection pools, search caches, stored results and tails.
+        Tools are served at /mcp and the startup report and live stats at /health.
+        
+        Args:
+            host: Interface to listen on
+            port: Port to listen on
+            auth_token: Bearer token every request must carry; required unless
+                host is a loopback address
+            
+        Raises:
+            ValueError: If host is not a loopback address and no auth_token is set
+        """
+        if not auth_token and not is_loopback(host):
+            raise ValueError(
+                f"Refusing to serve on {host} without authentication; set MCP_AUTH_TOKEN "
+                "or bind to a loopback address such as 127.0.0.1"
             )
+        
+        # Imported here so the stdio transport does not need the HTTP stack
+        import contextlib
+        import uvicorn
+        from starlette.applications import Starlette
+        from starlette.responses import JSONResponse
+        from starlette.routing import Mount, Route
+        from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+        
+        session_manager = StreamableHTTPSessionManager(app=self.server)
+        expected_authorization = f"Bearer {auth_token}".encode("utf-8") if auth_token else None
+        
+        async def handle_mcp(scope, receive, send):
+            await session_manager.handle_request(scope, receive, send)
+        
+        async def handle_health(request):
+            return JSONResponse({
+                "status": "ok",
+                "startup": self.startup,
+                "backends": self._backend_stats(),
+                "results": self.results.stats(),
+                "tails": len(self.tails)
+            })
+        
+        @contextlib.asynccontextmanager
+        async def lifespan(app):
+            async with session_manager.run():
+                report = await self.warm_up()
+                self.startup["ready_ms"] = round(report["init_ms"] + report["warmup_ms"], 1)
+                print(
+                    f"Aura MCP daemon ready at http://{host}:{port}/mcp in {self.startup['ready_ms']} ms "
+                    f"(init {report['init_ms']} ms, warm-up {report['warmup_ms']} ms; backends "
+                    + ", ".join(f"{name} {'up' if up else 'DOWN'}" for name, up in report["backends"].items())
+                    + ")",
+                    file=sys.stderr
+                )
+                try:
+                    yield
+                finally:
+                    await self._close_backends()
+        
+        app = Starlette(
+            routes=[
+                Mount("/mcp", app=handle_mcp),
+                Route("/health", handle_health)
+            ],
+            lifespan=lifespan
+        )
+        
+        async def authenticated_app(scope, receive, send):
+            if expected_authorization is not None and scope["type"] == "http":
+                authorization = dict(scope["headers"]).get(b"authorization", b"")
+                if not hmac.compare_digest(authorization, expected_authorization):
+                    response = JSONResponse(
+                        {"error": "unauthorized"}, status_code=401, headers={"WWW-Authenticate": "Bearer"}
+                    )
+                    await response(scope, receive, send)
+                    return
+            await app(scope, receive, send)
+        
+        config = uvicorn.Config(authenticated_app, host=host, port=port, log_level="warning")
+        await uvicorn.Server(config).serve()
+
+
+def is_loopback(host: str) -> bool:
+    """Whether a listen address only accepts connections from this machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    """Parse the command line; environment variables provide the defaults."""
+    parser = argparse.ArgumentParser(description="Aura MCP server")
+    parser.add_argument(
+        "--transport", choices=["stdio", "http"], default=os.getenv("MCP_TRANSPORT", "stdio"),
+        help="stdio serves one client; http runs a shared daemon for many clients"
+    )
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "127.0.0.1"), help="HTTP interface")
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", "8765")), help="HTTP port")
+    parser.add_argument(
+        "--auth-token", default=os.getenv("MCP_AUTH_TOKEN"),
+        help="Bearer token HTTP clients must send; required for a non-loopback --host "
+             "(prefer MCP_AUTH_TOKEN so it does not show in the process list)"
+    )
+    args = parser.parse_args(argv)
+    if args.transport == "http" and not args.auth_token and not is_loopback(args.host):
+        parser.error(f"--host {args.host} is reachable from other machines; set MCP_AUTH_TOKEN or --auth-token")
+    return args
 
 
-async def main():
+async def main(argv: list[str] = None):
     """Main entry point."""
+    args = parse_args(argv)
     server = AuraMCPServer()
-    await server.run()
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        server.start_metrics_exporter(int(metrics_port))
+    if args.transport == "http":
+        await server.run_http(args.host, args.port, args.auth_token)
+    else:
+        await server.run()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,235 @@
+"""
+Adaptive shard planning from the observed density of a query's matches.
+
+Instead of a fixed time split, the window is cut where the expected number of
+matching lines reaches a target, so a quiet environment is read with a single
+request and a busy hour is split into several. Densities are learned per
+LogQL query (whose selector encodes the environment) as entries per bucket,
+from earlier searches and from cheap count_over_time probes; only buckets not
+already known are probed.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Tuple
+
+
+# Width of a density bucket
+DENSITY_BUCKET_SECONDS = 3600
+
+# Lines each shard is planned to return; half of Loki's per-query limit leaves
+# room for lines to be bunched within a bucket
+TARGET_SHARD_LINES = 500
+
+# Upper bound on the shards of one plan; the target is raised to stay within it
+MAX_ADAPTIVE_SHARDS = 64
+
+# A bucket's count is only trusted once it ended this long before it was
+# observed, so lines Loki ingests late are not mistaken for an empty bucket
+INGESTION_GRACE_SECONDS = 300
+
+# Learned counts are probed again after this long, picking up anything that
+# arrived later still
+DENSITY_TTL_SECONDS = 6 * 3600
+
+
+def bucket_counts(timestamps: Iterable[int], bucket_ns: int) -> Dict[int, int]:
+    """Count timestamps per bucket, keyed by the bucket's epoch-aligned start."""
+    counts: Dict[int, int] = {}
+    for timestamp_ns in timestamps:
+        bucket = timestamp_ns - timestamp_ns % bucket_ns
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+
+def bucket_starts(start_time: int, end_time: int, bucket_ns: int) -> range:
+    """Epoch-aligned starts of the buckets overlapping [start_time, end_time)."""
+    return range(start_time - start_time % bucket_ns, end_time, bucket_ns)
+
+
+def plan_shards(
+    counts: Dict[int, int],
+    start_time: int,
+    end_time: int,
+    bucket_ns: int,
+    target_lines: int = TARGET_SHARD_LINES,
+    max_shards: int = MAX_ADAPTIVE_SHARDS
+) -> List[Dict[str, int]]:
+    """
+    Choose shard boundaries so each shard is expected to return about target_lines.
+
+    Consecutive buckets are merged while their expected total fits the target
+    and a bucket above the target is split evenly into several shards. Buckets
+    expected to be empty are still covered, merged into a neighbouring shard, so
+    lines ingested after they were counted are not missed; the shards always
+    cover the whole window.
+
+    Args:
+        counts: Expected matches per bucket start; missing buckets are empty
+        start_time: Start of the window in nanoseconds
+        end_time: End of the window in nanoseconds
+        bucket_ns: Bucket width in nanoseconds
+        target_lines: Lines each shard should return
+        max_shards: Maximum number of shards
+
+    Returns:
+        Shards oldest first, each with "start", "end" and "expected" lines
+    """
+    buckets = [
+        (max(bucket, start_time), min(bucket + bucket_ns, end_time), counts.get(bucket, 0))
+        for bucket in bucket_starts(start_time, end_time, bucket_ns)
+    ]
+    total = sum(count for _, _, count in buckets)
+    target_lines = max(target_lines, -(-total // max_shards))
+
+    shards: List[Dict[str, int]] = []
+    for bucket_start, bucket_end, count in buckets:
+        last = shards[-1] if shards else None
+        if count > target_lines:
+            # Assume the bucket's lines are spread evenly across it
+            pieces = min(-(-count // target_lines), bucket_end - bucket_start)
+            width = (bucket_end - bucket_start) / pieces
+            first_start = bucket_start
+            if last is not None and last["expected"] == 0:
+                # Leading empty buckets join the first piece
+                first_start = shards.pop()["start"]
+            for piece in range(pieces):
+                shards.append({
+                    "start": first_start if piece == 0 else bucket_start + round(piece * width),
+                    "end": bucket_start + round((piece + 1) * width),
+                    "expected": count // pieces + (1 if piece < count % pieces else 0)
+                })
+            continue
+        if last is not None and last["expected"] + count <= target_lines:
+            last["end"] = bucket_end
+            last["expected"] += count
+        else:
+            shards.append({"start": bucket_start, "end": bucket_end, "expected": count})
+
+    while len(shards) > max_shards:
+        # Evenly split buckets can still exceed the cap; merge the smallest adjacent pair
+        index = min(range(len(shards) - 1), key=lambda i: shards[i]["expected"] + shards[i + 1]["expected"])
+        shards[index:index + 2] = [{
+            "start": shards[index]["start"],
+            "end": shards[index + 1]["end"],
+            "expected": shards[index]["expected"] + shards[index + 1]["expected"]
+        }]
+    return shards
+
+
+class DensityTracker:
+    """Per-query match counts per bucket, learned from searches and probes."""
+
+    def __init__(
+        self,
+        bucket_seconds: int = DENSITY_BUCKET_SECONDS,
+        max_queries: int = 256,
+        grace_seconds: float = INGESTION_GRACE_SECONDS,
+        ttl_seconds: float = DENSITY_TTL_SECONDS
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            bucket_seconds: Width of a density bucket
+            max_queries: Queries remembered; the least recently used are dropped
+            grace_seconds: Time after a bucket ends before its count is kept
+            ttl_seconds: Age after which a kept count is no longer trusted
+        """
+        self.bucket_ns = bucket_seconds * 1_000_000_000
+        self.max_queries = max_queries
+        self.grace_ns = int(grace_seconds * 1_000_000_000)
+        self.ttl_ns = int(ttl_seconds * 1_000_000_000)
+        # query -> {bucket start: (matches, time the count starts from, time observed)};
+        # only buckets that had ended a grace period before they were observed
+        self._densities: "OrderedDict[str, Dict[int, Tuple[int, int, int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, logql_query: str, start_time: int, end_time: int, counts: Dict[int, int]):
+        """
+        Record the complete match counts of a window.
+
+        Buckets of the window with no count are recorded as empty. Later lines
+        may still land in recent buckets, so only buckets that ended at least
+        the grace period ago are kept; the oldest is only counted from
+        start_time on.
+
+        Args:
+            logql_query: The LogQL query the counts are for
+            start_time: Start of the observed window in nanoseconds
+            end_time: End of the observed window in nanoseconds
+            counts: Matches per bucket start, e.g. from bucket_counts()
+        """
+        now = time.time_ns()
+        complete = {
+            bucket: (counts.get(bucket, 0), max(bucket, start_time), now)
+            for bucket in bucket_starts(start_time, end_time, self.bucket_ns)
+            if bucket + self.bucket_ns <= min(end_time, now - self.grace_ns)
+        }
+        if not complete:
+            return
+        with self._lock:
+            known = {
+                bucket: observed for bucket, observed in self._densities.pop(logql_query, {}).items()
+                if now - observed[2] < self.ttl_ns
+            }
+            for bucket, observed in complete.items():
+                # Keep whichever observation covers more of the bucket; the newer on a tie
+                if bucket not in known or observed[1] <= known[bucket][1]:
+                    known[bucket] = observed
+            self._densities[logql_query] = known
+            while len(self._densities) > self.max_queries:
+                self._densities.popitem(last=False)
+
+    def known(
+        self,
+        logql_query: str,
+        start_time: int,
+        end_time: int
+    ) -> Tuple[Dict[int, int], List[Tuple[int, int]]]:
+        """
+        Split a window into buckets with known counts and ranges still to probe.
+
+        Args:
+            logql_query: The LogQL query
+            start_time: Start of the window in nanoseconds
+            end_time: End of the window in nanoseconds
+
+        Returns:
+            Tuple of (known counts per bucket start, unknown (start, end) ranges
+            oldest first, each spanning whole buckets)
+        """
+        with self._lock:
+            densities = self._densities.get(logql_query)
+            if densities is not None:
+                self._densities.move_to_end(logql_query)
+                densities = dict(densities)
+
+        now = time.time_ns()
+        counts: Dict[int, int] = {}
+        missing: List[Tuple[int, int]] = []
+        for bucket in bucket_starts(start_time, end_time, self.bucket_ns):
+            observed = densities.get(bucket) if densities is not None else None
+            # A count from a later start would miss lines of the oldest bucket,
+            # and an old one may miss lines ingested since
+            if observed is not None and observed[1] <= max(bucket, start_time) and now - observed[2] < self.ttl_ns:
+                counts[bucket] = observed[0]
+            elif missing and missing[-1][1] == bucket:
+                missing[-1] = (missing[-1][0], bucket + self.bucket_ns)
+            else:
+                missing.append((bucket, bucket + self.bucket_ns))
+        return counts, missing
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return tracker counters.
+
+        Returns:
+            Dictionary of the queries and buckets remembered
+        """
+        with self._lock:
+            return {
+                "queries": len(self._densities),
+                "buckets": sum(len(densities) for densities in self._densities.values())
+            }
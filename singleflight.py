@@ -0,0 +1,113 @@
+"""
+In-flight de-duplication of identical concurrent calls ("singleflight").
+"""
+
+import asyncio
+import threading
+from typing import Optional, Dict, Any, Tuple, Callable, Awaitable, Hashable
+
+
+class _Call:
+    """A call in flight that followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls sharing a key into one execution."""
+
+    def __init__(self):
+        """Initialize with no calls in flight."""
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, "asyncio.Future"] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.collapsed = 0
+
+    def run(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run func, or wait for an identical call that is already running.
+
+        Args:
+            key: Identifies calls that would produce the same result
+            func: The call to execute if none is in flight
+
+        Returns:
+            Tuple of (result, shared) where shared is True if the result came
+            from another caller's execution
+
+        Raises:
+            Exception: Whatever the shared execution raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+            else:
+                self.collapsed += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def run_async(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Await func, or wait for an identical call already running on this event loop.
+
+        Args:
+            key: Identifies calls that would produce the same result
+            func: Coroutine function to execute if none is in flight
+
+        Returns:
+            Tuple of (result, shared) where shared is True if the result came
+            from another caller's execution
+        """
+        future = self._async_calls.get(key)
+        if future is not None:
+            with self._lock:
+                self.collapsed += 1
+            # Shielded so one follower being cancelled does not cancel the shared call
+            return await asyncio.shield(future), True
+
+        future = asyncio.ensure_future(func())
+        self._async_calls[key] = future
+        with self._lock:
+            self.executed += 1
+        try:
+            return await asyncio.shield(future), False
+        finally:
+            if self._async_calls.get(key) is future:
+                del self._async_calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report how many calls ran and how many were collapsed into them.
+
+        Returns:
+            Dictionary of executed, collapsed and in-flight counts
+        """
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "collapsed": self.collapsed,
+                "in_flight": len(self._calls) + len(self._async_calls)
+            }
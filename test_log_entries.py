@@ -0,0 +1,81 @@
+"""
+Tests for the columnar LogEntries container.
+"""
+
+from log_entries import LogEntries
+
+
+def make_entries(rows):
+    """Build a container from (timestamp, message, labels) rows in the given order."""
+    entries = LogEntries()
+    for timestamp_ns, message, labels in rows:
+        entries.append(timestamp_ns, message, labels)
+    return entries
+
+
+def rows_of(entries):
+    """Read a container back as (timestamp, message, labels) rows."""
+    return [(entry["timestamp"], entry["message"], entry["labels"]) for entry in entries]
+
+
+def test_merge_interleaves_newest_first():
+    """Merging two newest-first containers keeps timestamps descending and remaps streams."""
+    newer = make_entries([(50, "n50", {"job": "api"}), (30, "n30", {"job": "api"}), (10, "n10", {"job": "web"})])
+    older = make_entries([(40, "o40", {"job": "db"}), (20, "o20", {"job": "api"}), (5, "o5", {"job": "db"})])
+
+    merged = newer.merge(older)
+
+    assert rows_of(merged) == [
+        (50, "n50", {"job": "api"}),
+        (40, "o40", {"job": "db"}),
+        (30, "n30", {"job": "api"}),
+        (20, "o20", {"job": "api"}),
+        (10, "n10", {"job": "web"}),
+        (5, "o5", {"job": "db"}),
+    ]
+    # Identical label sets share one stream
+    assert len(merged.streams) == 3
+
+
+def test_merge_ties_keep_this_container_first():
+    """On equal timestamps the entries of the container merged into come first."""
+    newer = make_entries([(20, "newer", {"job": "api"})])
+    older = make_entries([(20, "older", {"job": "api"})])
+
+    assert [entry["message"] for entry in newer.merge(older)] == ["newer", "older"]
+
+
+def test_merge_with_empty_containers():
+    """Merging with an empty container copies the other one."""
+    entries = make_entries([(20, "b", {"job": "api"}), (10, "a", {"job": "api"})])
+
+    assert rows_of(entries.merge(LogEntries())) == rows_of(entries)
+    assert rows_of(LogEntries().merge(entries)) == rows_of(entries)
+
+
+def test_merge_leaves_inputs_unchanged():
+    """Merge builds a new container."""
+    newer = make_entries([(20, "b", {"job": "api"})])
+    older = make_entries([(10, "a", {"job": "web"})])
+
+    newer.merge(older)
+
+    assert rows_of(newer) == [(20, "b", {"job": "api"})]
+    assert rows_of(older) == [(10, "a", {"job": "web"})]
+
+
+def test_since_trims_older_entries():
+    """since() keeps entries at or after the start time, inclusive."""
+    entries = make_entries([(t, f"m{t}", {"job": "api"}) for t in (50, 40, 30, 30, 20, 10)])
+
+    assert [entry["timestamp"] for entry in entries.since(30)] == [50, 40, 30, 30]
+    assert [entry["timestamp"] for entry in entries.since(31)] == [50, 40]
+    assert len(entries.since(51)) == 0
+
+
+def test_since_returns_self_when_nothing_is_older():
+    """No copy is made when every entry is recent enough."""
+    entries = make_entries([(20, "b", {"job": "api"}), (10, "a", {"job": "api"})])
+
+    assert entries.since(10) is entries
+    assert len(LogEntries().since(0)) == 0
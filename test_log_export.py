@@ -0,0 +1,54 @@
+"""
+Tests for confining client-supplied export paths to the export directory.
+"""
+
+import os
+
+import pytest
+
+from log_export import export_file_path
+
+
+@pytest.mark.parametrize("path", [
+    "logs.jsonl",
+    "nested/logs.jsonl.gz",
+    "./logs.jsonl",
+    "dots..in..name.jsonl",
+])
+def test_relative_paths_are_accepted(tmp_path, path):
+    """Plain file names and sub-paths resolve inside the directory."""
+    assert export_file_path(str(tmp_path), path) == os.path.join(str(tmp_path), path)
+
+
+@pytest.mark.parametrize("path", [
+    "/etc/passwd",
+    "~/logs.jsonl",
+    "../logs.jsonl",
+    "nested/../../logs.jsonl",
+    "nested\\..\\..\\logs.jsonl",
+    "..",
+])
+def test_escaping_paths_are_rejected(tmp_path, path):
+    """Absolute paths, home directories and '..' segments are refused."""
+    with pytest.raises(ValueError):
+        export_file_path(str(tmp_path), path)
+
+
+def test_symlink_out_of_directory_is_rejected(tmp_path):
+    """A symlink inside the directory that points outside it is refused."""
+    exports = tmp_path / "exports"
+    outside = tmp_path / "outside"
+    exports.mkdir()
+    outside.mkdir()
+    (exports / "link").symlink_to(outside, target_is_directory=True)
+
+    with pytest.raises(ValueError):
+        export_file_path(str(exports), "link/logs.jsonl")
+
+
+def test_symlink_within_directory_is_accepted(tmp_path):
+    """A symlink that stays inside the directory is allowed."""
+    (tmp_path / "real").mkdir()
+    (tmp_path / "link").symlink_to(tmp_path / "real", target_is_directory=True)
+
+    assert export_file_path(str(tmp_path), "link/logs.jsonl") == os.path.join(str(tmp_path), "link/logs.jsonl")
@@ -0,0 +1,88 @@
+"""
+Tests for the incremental Loki stream decoder.
+"""
+
+import json
+
+import pytest
+
+from loki_stream import LokiStreamDecoder
+
+
+# Messages with escapes, multi-byte UTF-8 and a surrogate pair, so chunk
+# boundaries fall inside strings, escape sequences and encoded characters
+BODY = json.dumps({
+    "status": "success",
+    "data": {
+        "resultType": "streams",
+        "result": [
+            {
+                "stream": {"job": "api", "path": "C:\\logs\\api"},
+                "values": [
+                    ["1700000000000000002", "say \"hello\" \\ goodbye"],
+                    ["1700000000000000001", "tab\there\nnewline caf\u00e9 \U0001F600"]
+                ]
+            },
+            {
+                "stream": {"job": "worker"},
+                "values": [["1700000000000000003", "{\"nested\": [1, 2]}"]]
+            }
+        ],
+        "stats": {"summary": {"bytesProcessedPerSecond": 1}}
+    }
+}).encode("utf-8")
+
+# The same body with the characters encoded as UTF-8 instead of \u escapes
+UTF8_BODY = json.dumps(json.loads(BODY), ensure_ascii=False).encode("utf-8")
+
+
+def expected_entries(body):
+    """Flatten a body with json.loads into (timestamp, message, labels) tuples."""
+    data = json.loads(body)
+    return [
+        (int(timestamp), message, item["stream"])
+        for item in data["data"]["result"]
+        for timestamp, message in item["values"]
+    ]
+
+
+def decoded_entries(decoder):
+    """Read the entries of a finished decoder as (timestamp, message, labels) tuples."""
+    return [(entry["timestamp"], entry["message"], entry["labels"]) for entry in decoder.entries]
+
+
+def decode(chunks):
+    """Feed the chunks to a new decoder and close it."""
+    decoder = LokiStreamDecoder()
+    for chunk in chunks:
+        decoder.feed(chunk)
+    decoder.close()
+    return decoder
+
+
+@pytest.mark.parametrize("body", [BODY, UTF8_BODY], ids=["escaped", "utf8"])
+def test_decode_byte_by_byte(body):
+    """Feeding one byte at a time gives the same entries as json.loads."""
+    decoder = decode(body[index:index + 1] for index in range(len(body)))
+    assert decoder.status == "success"
+    assert decoder.result_type == "streams"
+    assert decoder.total_entries == 3
+    assert decoder.bytes_received == len(body)
+    assert decoded_entries(decoder) == expected_entries(body)
+
+
+def test_decode_every_split_point():
+    """Splitting the body in two anywhere, including inside strings and escapes, decodes the same entries."""
+    for body in (BODY, UTF8_BODY):
+        expected = expected_entries(body)
+        for split in range(1, len(body)):
+            decoder = decode([body[:split], body[split:]])
+            assert decoded_entries(decoder) == expected, f"split at byte {split}"
+
+
+def test_truncated_body_raises():
+    """A body cut off mid-stream is reported on close."""
+    decoder = LokiStreamDecoder()
+    decoder.feed(BODY[:len(BODY) // 2])
+    with pytest.raises(ValueError):
+        decoder.close()
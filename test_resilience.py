@@ -0,0 +1,105 @@
+"""
+Tests for the circuit breaker's half-open admission.
+"""
+
+import pytest
+
+import resilience
+from resilience import CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    """Stands in for time.monotonic so tests can move time forward."""
+
+    def __init__(self):
+        """Start the clock at an arbitrary time."""
+        self.now = 1000.0
+
+    def __call__(self):
+        """Return the current fake time in seconds."""
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Patch the breaker's clock."""
+    fake = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", fake)
+    return fake
+
+
+def open_breaker(clock):
+    """Return a breaker that has just opened after two failures."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_open_circuit_rejects_calls(clock):
+    """Calls fail fast until the reset timeout has passed."""
+    breaker = open_breaker(clock)
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_half_open_admits_a_single_trial(clock):
+    """After the timeout one trial goes through and concurrent calls are rejected."""
+    breaker = open_breaker(clock)
+    clock.now += 30
+
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    for _ in range(3):
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+    assert breaker.stats()["rejected"] == 3
+
+
+def test_successful_trial_closes_the_circuit(clock):
+    """A successful trial lets every call through again."""
+    breaker = open_breaker(clock)
+    clock.now += 30
+    breaker.before_call()
+
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+    breaker.before_call()
+
+
+def test_failed_trial_reopens_the_circuit(clock):
+    """A failed trial opens the circuit for another full timeout."""
+    breaker = open_breaker(clock)
+    clock.now += 30
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock.now += 1
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_abandoned_trial_is_replaced(clock):
+    """A trial that never reports back stops blocking calls after the timeout."""
+    breaker = open_breaker(clock)
+    clock.now += 30
+    breaker.before_call()
+
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock.now += 1
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
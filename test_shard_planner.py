@@ -0,0 +1,64 @@
+"""
+Tests for adaptive shard planning.
+"""
+
+from shard_planner import plan_shards
+
+
+BUCKET = 100
+
+
+def assert_covers(shards, start_time, end_time):
+    """Fail unless the shards are contiguous, oldest first and cover the window."""
+    assert shards[0]["start"] == start_time
+    assert shards[-1]["end"] == end_time
+    for earlier, later in zip(shards, shards[1:]):
+        assert earlier["end"] == later["start"]
+        assert earlier["start"] < earlier["end"]
+
+
+def test_quiet_window_is_one_shard():
+    """Buckets whose total fits the target are read with a single request."""
+    counts = {0: 10, 100: 0, 200: 30, 300: 5}
+
+    shards = plan_shards(counts, 0, 400, BUCKET, target_lines=100)
+
+    assert shards == [{"start": 0, "end": 400, "expected": 45}]
+
+
+def test_busy_bucket_is_split_evenly():
+    """A bucket above the target is cut into equal pieces sharing its count."""
+    shards = plan_shards({0: 250}, 0, 100, BUCKET, target_lines=100)
+
+    assert [shard["expected"] for shard in shards] == [84, 83, 83]
+    assert_covers(shards, 0, 100)
+
+
+def test_empty_buckets_stay_covered():
+    """Buckets expected to be empty join a neighbouring shard instead of being skipped."""
+    counts = {200: 150, 400: 90}
+
+    shards = plan_shards(counts, 0, 500, BUCKET, target_lines=100)
+
+    assert_covers(shards, 0, 500)
+    assert sum(shard["expected"] for shard in shards) == 240
+    # The leading empty buckets are read with the first piece of the busy one
+    assert shards[0]["start"] == 0 and shards[0]["expected"] > 0
+
+
+def test_unaligned_window_is_clipped():
+    """A window starting or ending mid-bucket is clipped to the window."""
+    shards = plan_shards({0: 10, 100: 10}, 50, 150, BUCKET, target_lines=100)
+
+    assert shards == [{"start": 50, "end": 150, "expected": 20}]
+
+
+def test_shard_count_is_capped():
+    """The target is raised so a plan never exceeds max_shards."""
+    counts = {bucket: 1000 for bucket in range(0, 2000, BUCKET)}
+
+    shards = plan_shards(counts, 0, 2000, BUCKET, target_lines=10, max_shards=8)
+
+    assert len(shards) <= 8
+    assert_covers(shards, 0, 2000)
+    assert sum(shard["expected"] for shard in shards) == 20_000
@@ -0,0 +1,177 @@
+"""
+Chronological cross-service timeline of the log entries for one correlation ID.
+
+Loki returns each stream's entries already sorted, so the timeline is a k-way
+heap merge of those per-stream runs rather than a full sort. Hops between
+services are measured while walking the merged sequence.
+"""
+
+import heapq
+from typing import Optional, Dict, Any, List
+
+from log_entries import LogEntries
+
+
+# Labels that name the emitting service, in order of preference
+SERVICE_LABELS = ("service_name", "service", "app", "container", "job")
+
+
+def service_of(labels: Dict[str, str]) -> str:
+    """Return the service a stream belongs to, or "unknown"."""
+    for name in SERVICE_LABELS:
+        if labels.get(name):
+            return labels[name]
+    return "unknown"
+
+
+def stream_runs(entries: LogEntries) -> List[List[int]]:
+    """
+    Split entries into runs of indexes that are each in chronological order.
+
+    Entries of one stream arrive sorted, newest or oldest first; a stream seen
+    in several responses (shards, cache deltas) yields one run per sorted
+    stretch. Descending runs are reversed, so the result needs no sorting.
+
+    Args:
+        entries: Entries in any order that keeps each stream's lines sorted
+
+    Returns:
+        Lists of entry indexes, each oldest first
+    """
+    by_stream: Dict[int, List[int]] = {}
+    for index, stream_id in enumerate(entries.stream_ids):
+        by_stream.setdefault(stream_id, []).append(index)
+
+    timestamps = entries.timestamps
+    runs = []
+    for indexes in by_stream.values():
+        run = [indexes[0]]
+        descending: Optional[bool] = None
+        for index in indexes[1:]:
+            step = timestamps[index] - timestamps[run[-1]]
+            if step and descending is None:
+                descending = step < 0
+            elif step and (step < 0) != descending:
+                runs.append(run[::-1] if descending else run)
+                run, descending = [], None
+            run.append(index)
+        runs.append(run[::-1] if descending else run)
+    return runs
+
+
+def merge_timeline(entries: LogEntries) -> LogEntries:
+    """
+    Merge the per-stream runs of entries into one oldest-first sequence.
+
+    Args:
+        entries: Entries as returned by a search
+
+    Returns:
+        New container holding the same entries, oldest first
+    """
+    timestamps = entries.timestamps
+    order = heapq.merge(*stream_runs(entries), key=timestamps.__getitem__)
+    return entries.take(order)
+
+
+def compute_hops(timeline: LogEntries, services: List[str]) -> List[Dict[str, Any]]:
+    """
+    Measure each hand-off between services along a merged timeline.
+
+    Args:
+        timeline: Oldest-first entries from merge_timeline()
+        services: Service of each stream, indexed by stream ID
+
+    Returns:
+        One dictionary per hop with the services involved, the last line of
+        the caller, the first line of the callee and the latency in ms
+    """
+    hops = []
+    timestamps, stream_ids = timeline.timestamps, timeline.stream_ids
+    for index in range(1, len(timestamps)):
+        before = services[stream_ids[index - 1]]
+        after = services[stream_ids[index]]
+        if before != after:
+            hops.append({
+                "from_service": before,
+                "to_service": after,
+                "from_index": index - 1,
+                "to_index": index,
+                "latency_ms": round((timestamps[index] - timestamps[index - 1]) / 1_000_000, 3)
+            })
+    return hops
+
+
+def summarize_hops(hops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Aggregate hops by the pair of services involved.
+
+    Args:
+        hops: Hops from compute_hops()
+
+    Returns:
+        One dictionary per service pair with the hop count and the average and
+        maximum latency, the pair with the most total latency first
+    """
+    pairs: Dict[Any, Dict[str, Any]] = {}
+    for hop in hops:
+        key = (hop["from_service"], hop["to_service"])
+        pair = pairs.get(key)
+        if pair is None:
+            pair = pairs[key] = {"from_service": key[0], "to_service": key[1], "count": 0, "total_ms": 0.0, "max_ms": 0.0}
+        pair["count"] += 1
+        pair["total_ms"] += hop["latency_ms"]
+        pair["max_ms"] = max(pair["max_ms"], hop["latency_ms"])
+
+    summary = sorted(pairs.values(), key=lambda pair: pair["total_ms"], reverse=True)
+    for pair in summary:
+        pair["avg_ms"] = round(pair["total_ms"] / pair["count"], 3)
+        pair["total_ms"] = round(pair["total_ms"], 3)
+    return summary
+
+
+def build_timeline(entries: LogEntries) -> Dict[str, Any]:
+    """
+    Reconstruct the path of a request through its services.
+
+    Args:
+        entries: Entries of one correlation ID as returned by a search
+
+    Returns:
+        Dictionary with the oldest-first "entries", the "service" of each
+        stream ID, the per-service "spans", the "hops" between services, their
+        per-pair "hop_summary" and the overall "duration_ms"
+    """
+    timeline = merge_timeline(entries)
+    services = [service_of(labels) for labels in timeline.streams]
+
+    spans: Dict[str, Dict[str, Any]] = {}
+    for timestamp_ns, stream_id in zip(timeline.timestamps, timeline.stream_ids):
+        service = services[stream_id]
+        span = spans.get(service)
+        if span is None:
+            spans[service] = {"first": timestamp_ns, "last": timestamp_ns, "entries": 1}
+        else:
+            span["last"] = timestamp_ns
+            span["entries"] += 1
+
+    duration_ms = 0.0
+    if len(timeline):
+        duration_ms = round((timeline.timestamps[-1] - timeline.timestamps[0]) / 1_000_000, 3)
+
+    hops = compute_hops(timeline, services)
+    return {
+        "entries": timeline,
+        "services": services,
+        "spans": {
+            service: {
+                "entries": span["entries"],
+                "start_offset_ms": round((span["first"] - timeline.timestamps[0]) / 1_000_000, 3),
+                "duration_ms": round((span["last"] - span["first"]) / 1_000_000, 3)
+            }
+            for service, span in spans.items()
+        },
+        "hops": hops,
+        "hop_summary": summarize_hops(hops),
+        "duration_ms": duration_ms
+    }